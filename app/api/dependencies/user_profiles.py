@@ -0,0 +1,128 @@
+"""
+User Profile Loader
+
+A DataLoader-style loader of complete user profiles for a single request.
+Every `load()` made while the event loop is busy with the same step (e.g. the
+coroutines of an `asyncio.gather`, or several dependencies of a route) is
+collected and answered by one `get_user_profiles` call, which costs four
+queries whatever the number of users. Each user is loaded at most once per
+request; later loads of the same user return the cached profile.
+
+Usage:
+
+    @router.get("/example")
+    async def example(loader: UserProfileLoader = Depends(get_user_profile_loader)):
+        owner, *members = await loader.load_many([1, 2, 3])
+"""
+
+import asyncio
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from database.operations.user_profiles_ops import get_user_profiles
+
+
+class UserProfileLoader:
+    """
+    Batches and caches user profile loads.
+
+    Attributes:
+        batch_load (Callable): Receives a list of user IDs and returns a dict of
+            user ID -> profile; it runs in the thread pool.
+    """
+
+    def __init__(self, batch_load: Callable[[List[int]], Dict[int, dict]] = get_user_profiles):
+        self.batch_load = batch_load
+        self._cache: Dict[int, asyncio.Future] = {}
+        self._pending: List[Tuple[int, asyncio.Future]] = []
+        self._dispatch_task: Optional[asyncio.Task] = None
+
+    async def load(self, user_id: int) -> Optional[dict]:
+        """
+        Loads the profile of a user.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            dict: The profile, or None if the user does not exist.
+        """
+        future = self._cache.get(user_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._cache[user_id] = future
+            self._pending.append((user_id, future))
+            if self._dispatch_task is None:
+                # Runs after the callbacks already scheduled, so it sees their loads too
+                self._dispatch_task = loop.create_task(self._dispatch())
+        return await asyncio.shield(future)
+
+    async def load_many(self, user_ids: Iterable[int]) -> List[Optional[dict]]:
+        """
+        Loads the profiles of several users with a single batch.
+
+        Args:
+            user_ids (iterable of int): User IDs.
+
+        Returns:
+            list: The profiles (None for missing users), in the order of `user_ids`.
+        """
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    def prime(self, user_id: int, profile: Optional[dict]):
+        """
+        Stores a profile that is already known, so it is not loaded.
+
+        Args:
+            user_id (int): User ID.
+            profile (dict): The profile.
+        """
+        if user_id not in self._cache:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(profile)
+            self._cache[user_id] = future
+
+    def clear(self, user_id: int):
+        """
+        Forgets the cached profile of a user (e.g. after updating it).
+
+        Args:
+            user_id (int): User ID.
+        """
+        self._cache.pop(user_id, None)
+
+    async def _dispatch(self):
+        # Let the loads scheduled in this step of the event loop join the batch
+        await asyncio.sleep(0)
+        pending, self._pending = self._pending, []
+        self._dispatch_task = None
+        try:
+            profiles = await run_in_threadpool(
+                self.batch_load, [user_id for user_id, _ in pending]
+            )
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            for user_id, future in pending:
+                # Failed loads are retried by the next call
+                if self._cache.get(user_id) is future:
+                    del self._cache[user_id]
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for user_id, future in pending:
+            if not future.done():
+                future.set_result(profiles.get(user_id))
+
+
+def get_user_profile_loader() -> UserProfileLoader:
+    """
+    FastAPI dependency that provides the profile loader of the current request.
+
+    FastAPI resolves a dependency once per request, so every route parameter
+    and sub-dependency of a request shares the same loader and its cache.
+
+    Returns:
+        UserProfileLoader: A new loader.
+    """
+    return UserProfileLoader()
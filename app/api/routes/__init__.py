@@ -8,17 +8,19 @@ Available routers:
     - public_router: Contains public endpoints.
     - private_router: Contains endpoints that require authentication.
     - health_router: Contains endpoints for health checks.
+    - metrics_router: Contains the Prometheus metrics endpoint.
 """
 
 from typing import Any, Dict, List
 
-from app.api.routes import health, private, public
+from app.api.routes import health, metrics, private, public
 
 # List of all routers to be included in the main FastAPI application
 routers: List[Dict[str, Any]] = [
     {"router": health.router, "prefix": "/api/v1", "tags": ["Health"]},
     {"router": public.router, "prefix": "/api/v1", "tags": ["Public"]},
     {"router": private.router, "prefix": "/api/v1", "tags": ["Private"]},
+    {"router": metrics.router, "prefix": "", "tags": ["Metrics"]},
 ]
 
 # Expose only the routers variable when importing this package
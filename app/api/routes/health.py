@@ -1,19 +1,38 @@
 """
-Health Check Route for FastAPI
+Health Check Routes for FastAPI
 
-This module defines an endpoint for monitoring the health status of the API.
-It can be used to verify if the server is running and responding properly.
+This module defines the endpoints for monitoring the health status of the API.
 
-Endpoint:
+Endpoints:
 - `/health` (Health Check): Returns a status message indicating API health.
+- `/health/live` (Liveness): The process answers requests. A failure means
+  the worker must be restarted.
+- `/health/ready` (Readiness): The worker finished its startup (database,
+  warmups, background workers), is not shutting down, and can read the
+  database. Returns 503 otherwise, so load balancers stop sending traffic to
+  the worker without restarting it.
 
-This route is useful for uptime monitoring, automated health checks,
+These routes are useful for uptime monitoring, automated health checks,
 and ensuring system availability.
 """
 
+import sqlite3
+
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
 
+from app.auth.login_throttle import login_throttle
+from app.core.activity import activity_tracker
+from app.core.audit import audit_writer
+from app.core.background import PeriodicWorker
+from app.core.lifespan import lifespan_state
 from app.core.logging import logger
+from app.core.metrics import metrics_flusher
+from app.core.settings import DB_MAINTENANCE, METRICS_DIR
+from database.db_config import close_db_connection, get_db_read_connection
+from database.maintenance import db_maintenance
+from database.permission_snapshot import permission_snapshots
 
 router = APIRouter()
 
@@ -28,3 +47,72 @@ async def health_check():
     """
     logger.debug("/health endpoint accessed successfully.")
     return {"status": "ok"}
+
+
+@router.get(
+    "/health/live",
+    summary="Liveness Check",
+    description="Returns 200 while the process answers requests.",
+)
+async def liveness_check():
+    """
+    Liveness endpoint: answers without touching the database.
+
+    Returns:
+        dict: A JSON object with a status message.
+    """
+    return {"status": "ok"}
+
+
+def _database_check() -> str:
+    connection = get_db_read_connection()
+    try:
+        connection.execute("SELECT 1").fetchone()
+        return "ok"
+    except sqlite3.Error as error:
+        return f"error: {error}"
+    finally:
+        close_db_connection(connection)
+
+
+def _worker_check(worker: PeriodicWorker) -> str:
+    return "ok" if worker.running else "stopped"
+
+
+@router.get(
+    "/health/ready",
+    summary="Readiness Check",
+    description="Returns 200 when the worker can serve traffic, 503 otherwise.",
+)
+async def readiness_check():
+    """
+    Readiness endpoint: reports the startup state, the database and the background workers.
+
+    Returns:
+        JSONResponse: The checks, with status 200 if the worker is ready, 503 otherwise.
+    """
+    checks = {"startup": "ok" if lifespan_state.ready else "pending"}
+    if lifespan_state.draining:
+        checks["startup"] = "draining"
+    if lifespan_state.ready:
+        checks["database"] = await run_in_threadpool(_database_check)
+        checks["audit_writer"] = _worker_check(audit_writer)
+        checks["activity_tracker"] = _worker_check(activity_tracker)
+        checks["login_throttle"] = _worker_check(login_throttle)
+        if permission_snapshots.enabled:
+            checks["permission_snapshot"] = _worker_check(permission_snapshots)
+        if DB_MAINTENANCE:
+            checks["db_maintenance"] = _worker_check(db_maintenance)
+        if METRICS_DIR:
+            checks["metrics_flusher"] = _worker_check(metrics_flusher)
+    ready = all(value == "ok" for value in checks.values())
+
+    body = {
+        "status": "ready" if ready else "unavailable",
+        "checks": checks,
+        "warmups": lifespan_state.warmups,
+        "pending_migrations": lifespan_state.pending_migrations,
+    }
+    if not ready:
+        logger.warning("Readiness check failed: %s", checks)
+    return JSONResponse(body, status_code=200 if ready else 503)
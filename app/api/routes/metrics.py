@@ -0,0 +1,35 @@
+"""
+Metrics Route for FastAPI
+
+This module exposes the application metrics in the Prometheus text format,
+aggregated across every uvicorn worker of the host.
+
+Endpoint:
+- `/metrics` (Metrics): Returns the metrics for Prometheus to scrape.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.logging import logger
+from app.core.metrics import CONTENT_TYPE_LATEST, REGISTRY
+
+router = APIRouter()
+
+
+@router.get(
+    "/metrics",
+    summary="Metrics",
+    description="Returns the application metrics in Prometheus text format.",
+    response_class=PlainTextResponse,
+)
+async def metrics():
+    """
+    Metrics endpoint for Prometheus.
+
+    Returns:
+        PlainTextResponse: The metrics of every worker in Prometheus text format.
+    """
+    logger.debug("/metrics endpoint accessed successfully.")
+    REGISTRY.flush()
+    return PlainTextResponse(REGISTRY.exposition(), media_type=CONTENT_TYPE_LATEST)
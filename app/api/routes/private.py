@@ -8,13 +8,28 @@ Authorization token in the request header.
 Endpoints:
 - /dashboard: Returns a welcome message for authenticated users.
 - /admin: Returns admin panel information for authenticated users.
+- /admin/db/statements: Returns the traced SQL statements with the highest total time (admins only).
+- /users/search: Full-text search of users, paginated with a cursor (admins only).
+- /admin/audit-logs/export: Streams the audit logs matching the filters as NDJSON or CSV
+  (admins only).
 
 """
 
-from fastapi import APIRouter, Depends
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Literal
 
-from app.auth.auth import combined_auth
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.auth import admin_auth, combined_auth
 from app.core.logging import logger
+from database.instrumentation import TRACER, top_statements
+from database.operations.audit_logs_ops import iter_audit_logs
+from database.operations.user_search_ops import search_users
 
 router = APIRouter()
 
@@ -59,3 +74,155 @@ async def admin(user: dict = Depends(combined_auth)):
     """
     logger.debug("/admin endpoint accessed successfully (user: %s).", user["user"])
     return {"message": f"Admin panel for {user['user']}"}
+
+
+@router.get(
+    "/admin/db/statements",
+    summary="Top SQL Statements",
+    description=(
+        "Returns the traced SQL statements of this worker with the highest total time. "
+        "Requires the admin data permission."
+    ),
+)
+async def db_statements(
+    limit: int = Query(10, ge=1, le=100),
+    user: dict = Depends(admin_auth),
+):
+    """
+    SQL statement statistics endpoint.
+
+    Requires:
+        A JWT of a user with the `ADMIN_PERMISSION` permission (default `admin_data`).
+        Statement tracing enabled with `DB_TRACE=True`.
+
+    Args:
+        limit (int): Maximum number of statements to return.
+
+    Returns:
+        dict: Whether tracing is enabled and the top statements by total time.
+
+    Raises:
+        HTTPException: 401 Unauthorized if the Authorization token is missing or invalid.
+        HTTPException: 403 Forbidden for the fake token or a user without the permission.
+    """
+    logger.debug("/admin/db/statements endpoint accessed (user: %s).", user["user"])
+    return {"enabled": TRACER is not None, "statements": top_statements(limit)}
+
+
+@router.get(
+    "/users/search",
+    summary="Search Users",
+    description=(
+        "Full-text search of users by name, email, and Telegram and Google account data. "
+        "Every word matches as a prefix; results are ordered by relevance. "
+        "Requires the admin data permission."
+    ),
+)
+async def users_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, max_length=200),
+    user: dict = Depends(admin_auth),
+):
+    """
+    User search endpoint.
+
+    The results include personal data (emails, full names), and the query
+    matches them, so the search is restricted to admins.
+
+    Requires:
+        A JWT of a user with the `ADMIN_PERMISSION` permission (default `admin_data`).
+
+    Args:
+        q (str): Search query.
+        limit (int): Maximum number of results.
+        cursor (str, optional): `next_cursor` of the previous page.
+
+    Returns:
+        dict: The matching users (`results`) and the cursor of the next page
+            (`next_cursor`, null on the last page).
+
+    Raises:
+        HTTPException: 400 Bad Request if the cursor is invalid.
+        HTTPException: 401 Unauthorized if the Authorization token is missing or invalid.
+        HTTPException: 403 Forbidden for the fake token or a user without the permission.
+    """
+    logger.debug("/users/search endpoint accessed (user: %s).", user["user"])
+    try:
+        return await run_in_threadpool(search_users, q, limit, cursor)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)
+        ) from error
+
+
+AUDIT_EXPORT_COLUMNS = ("id", "user_id", "action", "details", "created_at")
+
+
+async def _audit_export_lines(chunks, export_format: str):
+    """Serializes the chunks of `iter_audit_logs`, reading each one in the thread pool."""
+    if export_format == "csv":
+        yield ",".join(AUDIT_EXPORT_COLUMNS) + "\r\n"
+    while True:
+        chunk = await run_in_threadpool(next, chunks, None)
+        if chunk is None:
+            return
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=AUDIT_EXPORT_COLUMNS)
+            writer.writerows(chunk)
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(row) + "\n" for row in chunk)
+
+
+@router.get(
+    "/admin/audit-logs/export",
+    summary="Export Audit Logs",
+    description=(
+        "Streams the audit logs matching the filters, oldest first, as NDJSON or CSV. "
+        "Requires the admin data permission."
+    ),
+)
+async def audit_logs_export(
+    export_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    user_id: int | None = Query(None),
+    action: str | None = Query(None, max_length=100),
+    start: datetime | None = Query(None, description="Inclusive; UTC unless it has an offset."),
+    end: datetime | None = Query(None, description="Exclusive; UTC unless it has an offset."),
+    user: dict = Depends(admin_auth),
+):
+    """
+    Audit log export endpoint.
+
+    The rows are read in chunks with keyset pagination on (created_at, id);
+    the database connection is released between chunks, so the export holds
+    neither the whole result in memory nor a long read transaction.
+
+    Requires:
+        A JWT of a user with the `ADMIN_PERMISSION` permission (default `admin_data`).
+
+    Args:
+        export_format (str): "ndjson" (default) or "csv".
+        user_id (int, optional): Only the logs of this user.
+        action (str, optional): Only the logs of this action.
+        start (datetime, optional): Only the logs created at or after this time.
+        end (datetime, optional): Only the logs created before this time.
+
+    Returns:
+        StreamingResponse: The audit logs, one per line.
+
+    Raises:
+        HTTPException: 401 Unauthorized if the Authorization token is missing or invalid.
+        HTTPException: 403 Forbidden for the fake token or a user without the permission.
+    """
+    logger.info("/admin/audit-logs/export endpoint accessed (user: %s).", user["user"])
+    chunks = iter_audit_logs(user_id=user_id, action=action, start=start, end=end)
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _audit_export_lines(chunks, export_format),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="audit_logs.{export_format}"'
+        },
+    )
@@ -8,16 +8,19 @@ It allows authentication using either:
 
 Functions:
     - combined_auth: Determines whether to authenticate using `fake_auth` or `verify_telegram_token`.
+    - admin_auth: Requires a JWT whose user has `ADMIN_PERMISSION` (never the fake token).
 """
 
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 
-from app.auth.fake_auth import fake_auth  # Your existing fake_auth function
 from app.auth.telegram_auth import (
     verify_telegram_token,
 )  # Your function that verifies the JWT
+from app.core.activity import record_activity
 from app.core.logging import logger
+from app.core.metrics import AUTH_ATTEMPTS
+from app.core.settings import ADMIN_PERMISSION
 
 # Define the OAuth2 scheme to extract the token from the Authorization header
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/telegram")
@@ -43,12 +46,56 @@ def combined_auth(token: str = Depends(oauth2_scheme)):
     """
     logger.debug("Attempting authentication with provided token.")
 
-    # If the token is the simulated one, use fake_auth
-    if token == "secret_token":
-        # Call fake_auth, passing the token as the header value
-        logger.info("Using fake authentication method.")
-        return fake_auth(authorization=token)
+    method = "fake" if token == "secret_token" else "jwt"
+    try:
+        # If the token is the simulated one, use fake_auth
+        if method == "fake":
+            # Call fake_auth, passing the token as the header value
+            logger.info("Using fake authentication method.")
+            # Imported on first use: the fake method is only meant for development
+            # pylint: disable=import-outside-toplevel
+            from app.auth.fake_auth import fake_auth
+
+            user = fake_auth(authorization=token)
+        else:
+            # Otherwise, use real JWT verification
+            logger.info("Using real JWT authentication method.")
+            user = verify_telegram_token(token)
+    except HTTPException:
+        AUTH_ATTEMPTS.inc(method, "failure")
+        raise
+    AUTH_ATTEMPTS.inc(method, "success")
+    if method == "jwt":
+        record_activity("telegram", user["user"])  # Coalesced last_login update
+    return user
+
+
+def admin_auth(token: str = Depends(oauth2_scheme)):
+    """
+    Authentication dependency of the admin data endpoints.
+
+    The token must be a valid JWT (the fake token is rejected) whose user has
+    `ADMIN_PERMISSION` through its roles.
+
+    Args:
+        token (str): The token extracted from the Authorization header.
+
+    Returns:
+        dict: A dictionary containing the authenticated user's information.
 
-    # Otherwise, use real JWT verification
-    logger.info("Using real JWT authentication method.")
-    return verify_telegram_token(token)
+    Raises:
+        HTTPException: 401 if the token is missing or invalid, 403 if the token
+            is the fake one or the user lacks the permission.
+    """
+    # Imported on first use, so the permission checks add nothing to the import time
+    # pylint: disable=import-outside-toplevel
+    from database.operations.permissions_ops import telegram_user_has_permission
+
+    if token == "secret_token":
+        logger.warning("Fake authentication rejected on an admin endpoint.")
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    user = combined_auth(token)
+    if not telegram_user_has_permission(user["user"], ADMIN_PERMISSION):
+        logger.warning("User %s lacks the %s permission.", user["user"], ADMIN_PERMISSION)
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return user
@@ -0,0 +1,362 @@
+"""
+Failed Login Throttling
+
+This module counts failed logins in memory and locks out the identities
+(e.g. a Telegram account) and users that fail too often. Lockout checks are
+answered from memory, before the signature of a login is verified, so a
+burst of failed logins costs neither a hash computation nor a write each.
+
+How it works:
+- Failures are counted per identity ("telegram", telegram_id) and per user
+  (all the identities of a user share the user's counter). The users of new
+  identities are looked up by the periodic flush, in one query per batch,
+  never in the request; the failures counted meanwhile are then added to the
+  user's counter.
+- After `LOGIN_LOCKOUT_THRESHOLD` failures, each further failure locks the
+  identity and its user for `LOGIN_LOCKOUT_BASE_SECONDS`, doubled at every
+  failure up to `LOGIN_LOCKOUT_MAX_SECONDS`. Attempts during a lockout are
+  rejected without being verified nor counted.
+- Counters are forgotten `LOGIN_FAILURE_WINDOW` seconds after the last
+  failure (or after the end of the lockout), and on a successful login.
+- The per-user counters are written to `users.failed_attempts` and
+  `users.last_failed_attempt` every `LOGIN_THROTTLE_FLUSH_INTERVAL` seconds,
+  one transaction per flush and one row per user whatever the number of
+  failures in between. They are loaded back at startup.
+- At most `LOGIN_THROTTLE_MAX_ENTRIES` counters are kept. When full, a tenth
+  of them is freed at once: expired counters first, then the least recently
+  used ones that are not locked. Locked counters are only dropped when
+  nothing else is left, so flooding new identities cannot lift a lockout.
+
+Counters are kept per process: with several workers, each worker counts the
+failures it receives, and the persisted counters are shared at startup.
+
+Usage:
+
+    retry_after = login_throttle.retry_after("telegram", telegram_id)
+    if retry_after:
+        ...  # Reject with 429 and Retry-After
+    if verified:
+        login_throttle.record_success("telegram", telegram_id)
+    else:
+        login_throttle.record_failure("telegram", telegram_id)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.background import PeriodicWorker
+from app.core.logging import logger
+from app.core.metrics import LOGIN_LOCKOUTS
+from app.core.settings import (
+    LOGIN_FAILURE_WINDOW,
+    LOGIN_LOCKOUT_BASE_SECONDS,
+    LOGIN_LOCKOUT_MAX_SECONDS,
+    LOGIN_LOCKOUT_THRESHOLD,
+    LOGIN_THROTTLE_FLUSH_INTERVAL,
+    LOGIN_THROTTLE_MAX_ENTRIES,
+)
+from database.operations.login_attempts_ops import (
+    get_recent_failed_logins,
+    get_user_ids_by_telegram_ids,
+    save_failed_login_attempts,
+)
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Looks up the users of several identities (user ID by identity ID), by provider
+USER_RESOLVERS: Dict[str, Callable[[Iterable], Dict[object, int]]] = {
+    "telegram": get_user_ids_by_telegram_ids,
+}
+
+Key = Tuple[str, object]
+
+
+@dataclass
+class FailureCounter:
+    """
+    Failed logins of an identity or a user.
+
+    Attributes:
+        count (int): Failures since the counter was last reset.
+        last_failure (float): UNIX time of the last failure.
+        locked_until (float): UNIX time at which the lockout ends (0: not locked).
+        user_id (int, optional): User of an identity, None for user counters.
+        resolved (bool): Whether the user of an identity was looked up.
+    """
+
+    count: int = 0
+    last_failure: float = 0.0
+    locked_until: float = 0.0
+    user_id: Optional[int] = None
+    resolved: bool = False
+
+
+def format_timestamp(value: float) -> str:
+    """Formats a UNIX time like SQLite's CURRENT_TIMESTAMP (UTC)."""
+    return datetime.fromtimestamp(value, timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def parse_timestamp(value: str) -> float:
+    """Parses a SQLite UTC timestamp into a UNIX time."""
+    return datetime.strptime(value[:19], TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+class LoginThrottle(PeriodicWorker):
+    """
+    In-memory failed login counters with exponential lockout, persisted in batches.
+
+    Attributes:
+        threshold (int): Failures allowed before a lockout.
+        base_delay (float): Seconds of the first lockout.
+        max_delay (float): Maximum seconds of a lockout.
+        window (float): Seconds after which the failures are forgotten.
+        max_entries (int): Maximum number of counters kept in memory.
+    """
+
+    def __init__(
+        self,
+        threshold: int = LOGIN_LOCKOUT_THRESHOLD,
+        base_delay: float = LOGIN_LOCKOUT_BASE_SECONDS,
+        max_delay: float = LOGIN_LOCKOUT_MAX_SECONDS,
+        window: float = LOGIN_FAILURE_WINDOW,
+        max_entries: int = LOGIN_THROTTLE_MAX_ENTRIES,
+        interval: float = LOGIN_THROTTLE_FLUSH_INTERVAL,
+        clock: Callable[[], float] = time.time,
+    ):
+        super().__init__("login-throttle", interval)
+        self.threshold = max(1, threshold)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.window = window
+        self.max_entries = max_entries
+        self._clock = clock
+        self._counters: "OrderedDict[Key, FailureCounter]" = OrderedDict()
+        self._dirty: Dict[int, Tuple[int, Optional[str]]] = {}  # user_id -> (count, last)
+        self._unresolved: Set[Key] = set()  # Identities whose user is looked up by the flush
+        self._counters_lock = threading.Lock()
+
+    def lockout_delay(self, count: int) -> float:
+        """
+        Returns the lockout following a number of failures.
+
+        Args:
+            count (int): Failures in a row.
+
+        Returns:
+            float: Seconds of lockout (0 below the threshold).
+        """
+        if count < self.threshold:
+            return 0.0
+        return min(self.max_delay, self.base_delay * 2 ** min(count - self.threshold, 32))
+
+    def retry_after(self, provider: str, provider_id) -> float:
+        """
+        Returns how long an identity is locked out. Never touches the database.
+
+        Args:
+            provider (str): Identity provider, e.g. "telegram".
+            provider_id: ID of the identity at the provider.
+
+        Returns:
+            float: Seconds until the next attempt is allowed (0: allowed now).
+        """
+        now = self._clock()
+        with self._counters_lock:
+            counter = self._counters.get((provider, provider_id))
+            if counter is None:
+                return 0.0
+            locked_until = counter.locked_until
+            if counter.user_id is not None:
+                user_counter = self._counters.get(("user", counter.user_id))
+                if user_counter is not None:
+                    locked_until = max(locked_until, user_counter.locked_until)
+        return max(0.0, locked_until - now)
+
+    def record_failure(self, provider: str, provider_id) -> float:
+        """
+        Counts a failed login of an identity and of its user.
+
+        Args:
+            provider (str): Identity provider, e.g. "telegram".
+            provider_id: ID of the identity at the provider.
+
+        Returns:
+            float: Seconds of lockout started by this failure (0: not locked).
+        """
+        key = (provider, provider_id)
+        now = self._clock()
+        with self._counters_lock:
+            delay = self._fail(key, now)
+            counter = self._counters[key]
+            if not counter.resolved:
+                if provider in USER_RESOLVERS:
+                    self._unresolved.add(key)
+                else:
+                    counter.resolved = True
+            elif counter.user_id is not None:
+                delay = max(delay, self._fail_user(counter.user_id, now, 1))
+            self._evict(now)
+        if delay:
+            LOGIN_LOCKOUTS.inc(provider)
+            logger.warning("Login locked for %ss: %s %s.", delay, provider, provider_id)
+        return delay
+
+    def record_success(self, provider: str, provider_id):
+        """
+        Forgets the failures of an identity and of its user after a successful login.
+
+        Args:
+            provider (str): Identity provider, e.g. "telegram".
+            provider_id: ID of the identity at the provider.
+        """
+        with self._counters_lock:
+            counter = self._counters.pop((provider, provider_id), None)
+            if counter is not None and counter.user_id is not None:
+                user_counter = self._counters.pop(("user", counter.user_id), None)
+                if user_counter is not None and user_counter.count:
+                    self._dirty[counter.user_id] = (0, None)
+
+    def load(self) -> int:
+        """
+        Loads the failures persisted by previous runs that are still relevant.
+
+        Returns:
+            int: Number of users loaded.
+        """
+        now = self._clock()
+        since = format_timestamp(now - self.window - self.max_delay)
+        rows = get_recent_failed_logins(since)
+        with self._counters_lock:
+            for user_id, count, last_failure, telegram_id in rows:
+                last = parse_timestamp(last_failure)
+                counter = FailureCounter(count, last, last + self.lockout_delay(count))
+                if self._expired(counter, now):
+                    continue
+                self._counters[("user", user_id)] = counter
+                if telegram_id is not None:
+                    self._counters[("telegram", telegram_id)] = FailureCounter(
+                        count, last, counter.locked_until, user_id, resolved=True
+                    )
+            self._evict(now)
+        return len(rows)
+
+    def reset(self):
+        """
+        Forgets every counter, without persisting anything.
+        """
+        with self._counters_lock:
+            self._counters.clear()
+            self._dirty.clear()
+            self._unresolved.clear()
+
+    def run_once(self):
+        """
+        Looks up the users of the new identities, then writes the changed user
+        counters in one transaction.
+        """
+        with self._counters_lock:
+            unresolved, self._unresolved = self._unresolved, set()
+        if unresolved:
+            self._resolve(unresolved)
+        with self._counters_lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return
+        try:
+            save_failed_login_attempts(
+                [(count, last, user_id) for user_id, (count, last) in dirty.items()]
+            )
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Could not save the failed logins of %s users.", len(dirty))
+            with self._counters_lock:
+                for user_id, value in dirty.items():
+                    self._dirty.setdefault(user_id, value)  # Retried at the next flush
+
+    def _expired(self, counter: FailureCounter, now: float) -> bool:
+        return now - max(counter.last_failure, counter.locked_until) > self.window
+
+    def _resolve(self, keys: Set[Key]):
+        """Looks up the users of identities and charges them their failures so far."""
+        by_provider: Dict[str, list] = {}
+        for provider, provider_id in keys:
+            by_provider.setdefault(provider, []).append(provider_id)
+        found: Dict[Key, Optional[int]] = {}
+        for provider, provider_ids in by_provider.items():
+            try:
+                users = USER_RESOLVERS[provider](provider_ids)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Could not look up the users of %s identities.", len(provider_ids))
+                with self._counters_lock:
+                    self._unresolved.update((provider, value) for value in provider_ids)
+                continue
+            for provider_id in provider_ids:
+                found[(provider, provider_id)] = users.get(provider_id)
+
+        now = self._clock()
+        with self._counters_lock:
+            for key, user_id in found.items():
+                counter = self._counters.get(key)
+                if counter is None or counter.resolved:
+                    continue  # Evicted, or forgotten after a successful login
+                counter.user_id, counter.resolved = user_id, True
+                if user_id is None or self._expired(counter, now):
+                    continue
+                if self._fail_user(user_id, counter.last_failure, counter.count):
+                    LOGIN_LOCKOUTS.inc(key[0])
+                    logger.warning("Login locked: user %s of %s %s.", user_id, *key)
+
+    def _expired(self, counter: FailureCounter, now: float) -> bool:
+        return now - max(counter.last_failure, counter.locked_until) > self.window
+
+    def _fail(self, key: Key, now: float, failures: int = 1) -> float:
+        """Counts failures on a counter; called with the lock held."""
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters[key] = FailureCounter()
+        elif self._expired(counter, now):
+            # The failures are forgotten, not the user of the identity
+            counter = self._counters[key] = FailureCounter(
+                user_id=counter.user_id, resolved=counter.resolved
+            )
+        self._counters.move_to_end(key)
+        counter.count += failures
+        counter.last_failure = now
+        delay = self.lockout_delay(counter.count)
+        if delay:
+            counter.locked_until = now + delay
+        return delay
+
+    def _fail_user(self, user_id: int, now: float, failures: int) -> float:
+        """Counts failures on a user's counter and marks it to be saved; lock held."""
+        delay = self._fail(("user", user_id), now, failures)
+        self._dirty[user_id] = (self._counters[("user", user_id)].count, format_timestamp(now))
+        return delay
+
+    def _evict(self, now: float):
+        """Frees a tenth of the counters when there are too many; called with the lock held."""
+        if len(self._counters) <= self.max_entries:
+            return
+        target = self.max_entries - self.max_entries // 10
+        for key in [key for key, counter in self._counters.items() if self._expired(counter, now)]:
+            self._drop(key)
+        if len(self._counters) > target:
+            # Least recently used first, sparing the locked counters
+            for key, counter in list(self._counters.items()):
+                if len(self._counters) <= target:
+                    break
+                if counter.locked_until <= now:
+                    self._drop(key)
+        while len(self._counters) > self.max_entries:
+            self._drop(next(iter(self._counters)))  # Only locked counters are left
+
+    def _drop(self, key: Key):
+        del self._counters[key]
+        self._unresolved.discard(key)
+
+
+# Process-wide login throttle, started by the application lifespan
+login_throttle = LoginThrottle()
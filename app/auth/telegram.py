@@ -9,9 +9,12 @@ Authentication flow:
 1. The frontend uses the Telegram Login Widget to obtain authentication data.
 2. The frontend sends this data to the `/auth/telegram` API endpoint.
 3. The backend validates the data, generates a JWT token if valid, and returns it.
+   Telegram accounts that failed too many times are locked out for a while
+   (see `app/auth/login_throttle.py`); their attempts are rejected before validation.
 4. The frontend stores and uses the JWT token for subsequent authenticated API requests.
 """
 
+import math
 from dataclasses import dataclass
 from datetime import timedelta
 from typing import Optional
@@ -19,10 +22,14 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 
+from app.auth.login_throttle import login_throttle
 from app.auth.schemas.auth import TokenSchema
 from app.auth.token import create_access_token
 from app.auth.validator import check_telegram_auth
+from app.core.activity import record_activity
+from app.core.audit import record_audit_event
 from app.core.logging import logger
+from app.core.metrics import AUTH_ATTEMPTS
 from app.core.settings import ACCESS_TOKEN_EXPIRE_MINUTES
 
 router = APIRouter()
@@ -78,15 +85,34 @@ def authenticate_via_telegram(telegram_data: TelegramAuthData):
 
     Raises:
     - **400 Bad Request**: If the authentication data is invalid or expired.
+    - **429 Too Many Requests**: If the Telegram account is locked out after failed logins.
     """
     logger.debug("Received authentication request from Telegram: %s", telegram_data)
 
+    # Locked out identities are rejected before the (costly) signature check
+    retry_after = login_throttle.retry_after("telegram", telegram_data.id)
+    if retry_after:
+        AUTH_ATTEMPTS.inc("telegram_login", "locked")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
     # Extracting the authentication data to verify
     user_data = telegram_data.__dict__
 
     # Verifying the Telegram authentication data
     if not check_telegram_auth(user_data):
         logger.warning(f"Authentication failed for user ID: {telegram_data.id}")
+        AUTH_ATTEMPTS.inc("telegram_login", "failure")
+        login_throttle.record_failure("telegram", telegram_data.id)
+        # The attempted ID is kept in the details: unknown accounts have no user_id
+        record_audit_event(
+            "login_failed",
+            telegram_id=telegram_data.id,
+            details={"provider": "telegram", "telegram_id": telegram_data.id},
+        )
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid authentication data",  # Inform the client that data is invalid
@@ -94,6 +120,12 @@ def authenticate_via_telegram(telegram_data: TelegramAuthData):
 
     # If authentication is successful, proceed with JWT token creation
     logger.info(f"User {telegram_data.id} authenticated successfully")
+    AUTH_ATTEMPTS.inc("telegram_login", "success")
+    login_throttle.record_success("telegram", telegram_data.id)
+    record_activity("telegram", telegram_data.id)
+    record_audit_event(
+        "login_success", telegram_id=telegram_data.id, details={"provider": "telegram"}
+    )
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": str(telegram_data.id)}, expires_delta=access_token_expires
@@ -18,7 +18,6 @@ that require Telegram authentication.
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
 
 from app.core.logging import logger
 from app.core.settings import ALGORITHM, SECRET_KEY
@@ -41,6 +40,9 @@ def verify_telegram_token(token: str = Depends(oauth2_scheme)):
     Raises:
         HTTPException: If the token is invalid or expired.
     """
+    # python-jose is imported on first use to keep it out of the application import time
+    from jose import JWTError, jwt  # pylint: disable=import-outside-toplevel
+
     try:
         logger.debug(f"Verifying Telegram token: {token}")
 
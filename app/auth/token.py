@@ -7,8 +7,6 @@ for authenticating users in the application.
 
 from datetime import datetime, timedelta
 
-from jose import jwt  # Using python-jose for JWT handling
-
 from app.core.logging import logger
 from app.core.settings import ALGORITHM, SECRET_KEY
 
@@ -27,6 +25,9 @@ def create_access_token(data: dict, expires_delta: timedelta) -> str:
     Raises:
         Exception: Error generating JWT token
     """
+    # python-jose is imported on first use to keep it out of the application import time
+    from jose import jwt  # pylint: disable=import-outside-toplevel
+
     try:
         to_encode = data.copy()
         expire = datetime.utcnow() + expires_delta
@@ -8,11 +8,23 @@ received from the Telegram login widget.
 import hashlib
 import hmac
 import time
+from functools import lru_cache
 
 from app.core.logging import logger
 from app.core.settings import TELEGRAM_BOT_TOKEN
 
 
+@lru_cache(maxsize=1)
+def telegram_secret_key() -> bytes:
+    """
+    Returns the key of the Telegram login widget signatures: SHA-256 of the bot token.
+
+    Returns:
+        bytes: The secret key.
+    """
+    return hashlib.sha256(TELEGRAM_BOT_TOKEN.encode()).digest()
+
+
 def check_telegram_auth(data: dict) -> bool:
     """
     Verifies the Telegram authentication data using the bot token.
@@ -59,7 +71,7 @@ def check_telegram_auth(data: dict) -> bool:
         )
 
         # Create a secret key from the Telegram bot token.
-        secret_key = hashlib.sha256(TELEGRAM_BOT_TOKEN.encode()).digest()
+        secret_key = telegram_secret_key()
 
         # Calculate the hash using HMAC with SHA256.
         calculated_hash = hmac.new(
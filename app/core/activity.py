@@ -0,0 +1,110 @@
+"""
+Activity Tracking
+
+This module keeps `auth_providers.last_login` up to date without turning
+authenticated reads into writes. Authenticated requests and logins only
+record the time in memory; a background worker writes the latest time of
+each provider account in batches.
+
+How it works:
+- `record_activity(provider, provider_id)` stores the current time for the
+  account, replacing the previous one: any number of requests of the same
+  account between two flushes results in a single update.
+- Every `ACTIVITY_FLUSH_INTERVAL` seconds, the worker writes the pending
+  times in one transaction (`update_last_logins`). The worker is also woken
+  up when `ACTIVITY_MAX_PENDING` accounts are pending.
+- On shutdown (and at interpreter exit), the pending times are flushed. A
+  crash loses at most the last flush interval.
+- If a flush fails, its times are merged back and retried at the next flush.
+
+Accounts without an `auth_providers` row are not tracked (the update does
+not insert rows).
+"""
+
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Tuple
+
+from app.core.background import PeriodicWorker
+from app.core.logging import logger
+from app.core.metrics import ACTIVITY_UPDATES
+from app.core.settings import ACTIVITY_FLUSH_INTERVAL, ACTIVITY_MAX_PENDING
+from database.operations.auth_providers_ops import update_last_logins
+
+Account = Tuple[str, str]  # (provider, provider_id)
+
+
+class ActivityTracker(PeriodicWorker):
+    """
+    Latest activity time per provider account, written to the database in batches.
+
+    Attributes:
+        max_pending (int): Pending accounts that trigger an early flush.
+    """
+
+    def __init__(
+        self, interval: float = ACTIVITY_FLUSH_INTERVAL, max_pending: int = ACTIVITY_MAX_PENDING
+    ):
+        super().__init__("activity-tracker", interval)
+        self.max_pending = max_pending
+        self._pending: Dict[Account, str] = {}
+        self._pending_lock = threading.Lock()
+
+    def record(self, provider: str, provider_id, timestamp: str):
+        """
+        Records the activity of an account; only the latest time is kept.
+
+        Args:
+            provider (str): Provider name, e.g. "telegram".
+            provider_id: ID of the account at the provider (stored as text).
+            timestamp (str): UTC timestamp ("YYYY-MM-DD HH:MM:SS").
+        """
+        if not self.running:
+            self.start()
+
+        account = (provider, str(provider_id))
+        with self._pending_lock:
+            if self._pending.get(account, "") < timestamp:
+                self._pending[account] = timestamp
+            pending = len(self._pending)
+
+        ACTIVITY_UPDATES.inc("recorded")
+        if pending >= self.max_pending:
+            self.wake()
+
+    def run_once(self):
+        """
+        Writes the pending activity times in one transaction.
+        """
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            updated = update_last_logins(
+                [(timestamp, *account) for account, timestamp in pending.items()]
+            )
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Could not write the activity of %s accounts.", len(pending))
+            with self._pending_lock:
+                for account, timestamp in pending.items():
+                    if self._pending.get(account, "") < timestamp:
+                        self._pending[account] = timestamp
+            return
+        ACTIVITY_UPDATES.inc("written", amount=updated)
+
+
+# Process-wide activity tracker, started by the application lifespan
+activity_tracker = ActivityTracker()
+
+
+def record_activity(provider: str, provider_id):
+    """
+    Records that a provider account just authenticated.
+
+    Args:
+        provider (str): Provider name, e.g. "telegram".
+        provider_id: ID of the account at the provider.
+    """
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    activity_tracker.record(provider, provider_id, timestamp)
@@ -0,0 +1,182 @@
+"""
+Audit Log Writer
+
+This module buffers audit events (logins, role and permission changes) in
+memory and writes them to the `audit_logs` table in batches from a background
+worker, so recording an event never adds a commit to the request path.
+
+Behavior:
+- Events are queued with `record_audit_event()` and written with one
+  `executemany` transaction per batch (`AUDIT_BATCH_SIZE`), every
+  `AUDIT_FLUSH_INTERVAL` seconds or as soon as a full batch is waiting.
+- Memory is bounded by `AUDIT_QUEUE_SIZE`. When the queue is full,
+  `AUDIT_OVERFLOW_POLICY` decides: `drop_oldest` (default) discards the oldest
+  queued event, `drop_newest` discards the new one, and `block` makes the
+  caller wait up to `AUDIT_BLOCK_TIMEOUT` seconds for room before dropping it.
+- If a batch cannot be written, it is put back at the head of the queue and
+  retried at the next flush (`requeued` in `audit_events_total`); events that
+  no longer fit are dropped, oldest first.
+- The queue is flushed when the worker stops (application shutdown or exit).
+"""
+
+import json
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Optional, Tuple
+
+from app.core.background import PeriodicWorker
+from app.core.logging import logger
+from app.core.metrics import AUDIT_EVENTS, AUDIT_QUEUE_LENGTH
+from app.core.settings import (
+    AUDIT_BATCH_SIZE,
+    AUDIT_BLOCK_TIMEOUT,
+    AUDIT_FLUSH_INTERVAL,
+    AUDIT_OVERFLOW_POLICY,
+    AUDIT_QUEUE_SIZE,
+)
+from database.operations.audit_logs_ops import create_audit_logs
+
+# (user_id, telegram_id, action, details, created_at), as expected by create_audit_logs
+AuditEntry = Tuple[Optional[int], Optional[int], str, Optional[str], str]
+
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+
+class AuditLogWriter(PeriodicWorker):
+    """
+    Bounded in-memory queue of audit events, written in batches by a worker thread.
+
+    Attributes:
+        capacity (int): Maximum number of queued events.
+        batch_size (int): Maximum number of events written per transaction.
+        overflow_policy (str): Policy applied when the queue is full.
+        block_timeout (float): Seconds a producer waits for room with the "block" policy.
+    """
+
+    def __init__(
+        self,
+        capacity: int = AUDIT_QUEUE_SIZE,
+        batch_size: int = AUDIT_BATCH_SIZE,
+        interval: float = AUDIT_FLUSH_INTERVAL,
+        overflow_policy: str = AUDIT_OVERFLOW_POLICY,
+        block_timeout: float = AUDIT_BLOCK_TIMEOUT,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Invalid audit overflow policy: {overflow_policy}")
+        super().__init__("audit-log-writer", interval)
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self._queue: Deque[AuditEntry] = deque()
+        self._not_full = threading.Condition()
+
+    def enqueue(self, entry: AuditEntry) -> bool:
+        """
+        Adds an event to the queue, applying the overflow policy if it is full.
+
+        Args:
+            entry (tuple): (user_id, telegram_id, action, details, created_at).
+
+        Returns:
+            bool: True if the event was queued, False if it was dropped.
+        """
+        if not self.running:
+            self.start()
+
+        with self._not_full:
+            if len(self._queue) >= self.capacity:
+                if self.overflow_policy == "drop_oldest":
+                    self._queue.popleft()
+                    AUDIT_QUEUE_LENGTH.dec()
+                    AUDIT_EVENTS.inc("dropped")
+                elif self.overflow_policy == "block":
+                    self.wake()
+                    if not self._not_full.wait_for(
+                        lambda: len(self._queue) < self.capacity, self.block_timeout
+                    ):
+                        AUDIT_EVENTS.inc("dropped")
+                        return False
+                else:
+                    AUDIT_EVENTS.inc("dropped")
+                    return False
+            self._queue.append(entry)
+            queued = len(self._queue)
+
+        AUDIT_QUEUE_LENGTH.inc()
+        if queued >= self.batch_size:
+            self.wake()
+        return True
+
+    def run_once(self):
+        """
+        Writes every queued event, one transaction per batch.
+        """
+        while True:
+            with self._not_full:
+                batch = [
+                    self._queue.popleft()
+                    for _ in range(min(self.batch_size, len(self._queue)))
+                ]
+                self._not_full.notify_all()
+            if not batch:
+                return
+            AUDIT_QUEUE_LENGTH.dec(amount=len(batch))
+            try:
+                create_audit_logs(batch)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Could not write %s audit events; retrying later.", len(batch))
+                self._requeue(batch)
+                return
+            AUDIT_EVENTS.inc("written", amount=len(batch))
+
+    def _requeue(self, batch):
+        """Puts a batch that could not be written back at the head of the queue."""
+        with self._not_full:
+            self._queue.extendleft(reversed(batch))
+            dropped = 0
+            while len(self._queue) > self.capacity:
+                self._queue.popleft()  # New events came in meanwhile: drop the oldest
+                dropped += 1
+        if len(batch) > dropped:
+            AUDIT_QUEUE_LENGTH.inc(amount=len(batch) - dropped)
+            AUDIT_EVENTS.inc("requeued", amount=len(batch) - dropped)
+        if dropped:
+            AUDIT_EVENTS.inc("dropped", amount=dropped)
+
+
+# Process-wide audit log writer, started by the application lifespan
+audit_writer = AuditLogWriter()
+
+
+def record_audit_event(
+    action: str,
+    *,
+    user_id: Optional[int] = None,
+    telegram_id: Optional[int] = None,
+    details: Optional[dict] = None,
+) -> bool:
+    """
+    Queues an audit event to be written to `audit_logs`.
+
+    Args:
+        action (str): Event type, e.g. "login_success", "login_failed", "role_change".
+        user_id (int, optional): ID of the user the event refers to.
+        telegram_id (int, optional): Telegram ID, used to resolve the user when
+            `user_id` is not known.
+        details (dict, optional): Event details, stored as JSON.
+
+    Returns:
+        bool: True if the event was queued, False if it was dropped.
+    """
+    created_at = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return audit_writer.enqueue(
+        (
+            user_id,
+            telegram_id,
+            action,
+            json.dumps(details, separators=(",", ":")) if details is not None else None,
+            created_at,
+        )
+    )
@@ -0,0 +1,104 @@
+"""
+Background Workers
+
+This module provides `PeriodicWorker`, the base class of the in-process
+background jobs (audit log writer, maintenance, flushers...). A worker runs
+`run_once()` in a daemon thread every `interval` seconds, can be woken up
+early with `wake()`, and runs a final `run_once()` when stopped, so buffered
+work is flushed on shutdown.
+
+Workers are started and stopped by the FastAPI lifespan (see `app/core/lifespan.py`).
+Starting a worker also registers it to be stopped at interpreter exit, so
+command line tools that use the same code paths flush on exit as well.
+"""
+
+import atexit
+import threading
+from typing import Optional
+
+from app.core.logging import logger
+
+
+class PeriodicWorker:
+    """
+    Runs `run_once()` periodically in a background thread.
+
+    Attributes:
+        name (str): Name of the worker thread.
+        interval (float): Seconds between two runs.
+    """
+
+    def __init__(self, name: str, interval: float):
+        self.name = name
+        self.interval = interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._atexit_registered = False
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the worker thread is running.
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Starts the worker thread. Does nothing if it is already running.
+        """
+        with self._lock:
+            if self.running:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+        logger.debug("Background worker %s started.", self.name)
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Stops the worker after a final run and waits for its thread.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait for the thread.
+        """
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping.set()
+            self._wake.set()
+        thread.join(timeout)
+        with self._lock:
+            if self._thread is thread and not thread.is_alive():
+                self._thread = None
+        logger.debug("Background worker %s stopped.", self.name)
+
+    def wake(self):
+        """
+        Makes the worker run as soon as possible instead of waiting for the interval.
+        """
+        self._wake.set()
+
+    def run_once(self):
+        """
+        Does one unit of periodic work. Implemented by subclasses.
+        """
+        raise NotImplementedError
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self._safe_run_once()
+        self._safe_run_once()  # Final run, so pending work is not lost on shutdown
+
+    def _safe_run_once(self):
+        try:
+            self.run_once()
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Background worker %s failed.", self.name)
@@ -0,0 +1,278 @@
+"""
+Application Lifespan
+
+This module provides the FastAPI lifespan of the application: what runs
+before a worker accepts traffic and after it stopped accepting it.
+
+Startup:
+- Initializes the database (`init_db`), opens the writer connection and
+  fills the read pool with `DB_READ_POOL_PREWARM` connections.
+- Runs the registered warmups (OpenAPI schema, token keys, permission
+  snapshot...), so the first requests do not pay for them. A failing warmup is
+  logged and reported by the readiness endpoint; it does not stop the worker.
+- Checks that every migration is applied.
+- Starts the background workers (audit log writer, activity tracker, login
+  throttle, permission snapshot, database maintenance, metrics flusher).
+
+Shutdown:
+- Marks the worker as not ready, so load balancers stop sending requests.
+- Stops the background workers, which flush what they buffered.
+- Checkpoints the WAL into the database and closes the connections.
+- Writes the last metrics snapshot, so `/metrics` keeps the worker's final counts.
+
+Liveness (`/health/live`) only tells that the process answers; readiness
+(`/health/ready`, see `app/api/routes/health.py`) uses `lifespan_state`.
+
+Usage:
+
+    from app.core.lifespan import register_warmup
+
+    @register_warmup("my_cache")
+    def warm_my_cache(app):
+        my_cache.load()
+"""
+
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
+
+from app.auth.login_throttle import login_throttle
+from app.core.activity import activity_tracker
+from app.core.audit import audit_writer
+from app.core.logging import logger
+from app.core.metrics import metrics_flusher
+from app.core.settings import DB_MAINTENANCE, DB_READ_POOL_PREWARM, METRICS_DIR
+from database.cache_versions import cache_versions
+from database.db_config import (
+    close_db_connection,
+    get_db_connection,
+    get_db_read_connection,
+    init_db,
+    prewarm_db_pools,
+    reset_db_pools,
+)
+from database.maintenance import checkpoint, db_maintenance
+from database.permission_snapshot import permission_snapshots
+
+Warmup = Callable[[FastAPI], None]
+
+_warmups: List[Tuple[str, Warmup]] = []
+
+
+class LifespanState:
+    """
+    Startup and shutdown progress of the worker, reported by the readiness endpoint.
+
+    Attributes:
+        ready (bool): The worker finished its startup and is not shutting down.
+        draining (bool): The worker is shutting down.
+        started_at (float, optional): UNIX time at which the startup finished.
+        warmups (dict): Duration in seconds, or error message, by warmup name.
+        pending_migrations (list): Migrations not applied to the database.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forgets a previous run (the application can be started again in tests)."""
+        self.ready = False
+        self.draining = False
+        self.started_at: Optional[float] = None
+        self.warmups: Dict[str, object] = {}
+        self.pending_migrations: List[str] = []
+
+    @property
+    def failed_warmups(self) -> List[str]:
+        """Names of the warmups that raised an error."""
+        return [name for name, result in self.warmups.items() if isinstance(result, str)]
+
+
+lifespan_state = LifespanState()
+
+
+def register_warmup(name: str):
+    """
+    Registers a function to run at startup, before the worker is ready.
+
+    Warmups run in order of registration, in a thread (they can block), and
+    receive the application.
+
+    Args:
+        name (str): Name reported by the readiness endpoint.
+
+    Returns:
+        callable: Decorator registering the function.
+    """
+
+    def decorator(function: Warmup) -> Warmup:
+        _warmups[:] = [(key, value) for key, value in _warmups if key != name]
+        _warmups.append((name, function))
+        return function
+
+    return decorator
+
+
+def run_warmups(app: FastAPI) -> Dict[str, object]:
+    """
+    Runs the registered warmups.
+
+    Args:
+        app (FastAPI): The application instance.
+
+    Returns:
+        dict: Duration in seconds, or error message, by warmup name.
+    """
+    results = {}
+    for name, function in list(_warmups):
+        start = time.perf_counter()
+        try:
+            function(app)
+            results[name] = round(time.perf_counter() - start, 4)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.exception("Warmup %s failed.", name)
+            results[name] = f"{type(error).__name__}: {error}"
+    return results
+
+
+@register_warmup("openapi")
+def warm_openapi(app: FastAPI):
+    """Builds the OpenAPI schema, which FastAPI otherwise builds on the first docs request."""
+    app.openapi()
+
+
+@register_warmup("token_keys")
+def warm_token_keys(_app: FastAPI):
+    """Derives the Telegram signature key and loads python-jose with a token round trip."""
+    # python-jose is kept out of the application import time (see app/auth/token.py)
+    # pylint: disable=import-outside-toplevel
+    from datetime import timedelta
+
+    from jose import jwt
+
+    from app.auth.token import create_access_token
+    from app.auth.validator import telegram_secret_key
+    from app.core.settings import ALGORITHM, SECRET_KEY
+
+    telegram_secret_key()
+    token = create_access_token({"sub": "warmup"}, timedelta(minutes=1))
+    jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+@register_warmup("permission_snapshot")
+def warm_permission_snapshot(_app: FastAPI):
+    """Publishes the permission snapshot (shared by the workers) and maps it."""
+    permission_snapshots.load()
+
+
+@register_warmup("login_throttle")
+def warm_login_throttle(_app: FastAPI):
+    """Loads the failed logins persisted by the previous run, so lockouts survive restarts."""
+    login_throttle.reset()
+    login_throttle.load()
+
+
+def pending_migrations() -> List[str]:
+    """
+    Lists the migrations that are not applied to the database.
+
+    Returns:
+        list: Migration names, in application order.
+    """
+    # Imported on first use, so the migration tooling adds nothing to the import time
+    # pylint: disable=import-outside-toplevel
+    from database.migrate import available_migrations
+
+    connection = get_db_read_connection()
+    try:
+        applied = {row[0] for row in connection.execute("SELECT filename FROM migrations")}
+    except sqlite3.OperationalError:  # No migrations table: nothing applied
+        applied = set()
+    finally:
+        close_db_connection(connection)
+    return [name for name in available_migrations() if name not in applied]
+
+
+def startup(app: FastAPI):
+    """
+    Prepares the database and caches of the worker. Blocking; run it in a thread.
+
+    Args:
+        app (FastAPI): The application instance.
+    """
+    init_db()
+    opened = prewarm_db_pools(DB_READ_POOL_PREWARM)
+    logger.debug("Database initialized, %d read connections opened.", opened)
+
+    lifespan_state.warmups = run_warmups(app)
+    lifespan_state.pending_migrations = pending_migrations()
+    if lifespan_state.pending_migrations:
+        logger.warning(
+            "Pending migrations: %s. Run python -m database.migrate.",
+            ", ".join(lifespan_state.pending_migrations),
+        )
+
+
+def shutdown():
+    """
+    Checkpoints the WAL and closes the connections. Blocking; run it in a thread.
+    """
+    connection = get_db_connection()
+    try:
+        # Do not wait for other processes' readers: a busy checkpoint copies what it can
+        connection.execute("PRAGMA busy_timeout = 0;")
+        busy, frames, copied = checkpoint(connection, "TRUNCATE")
+        logger.debug("Shutdown checkpoint: busy=%s, %s/%s frames copied.", busy, copied, frames)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception("Shutdown checkpoint failed.")
+    finally:
+        close_db_connection(connection)
+    cache_versions.reset()
+    reset_db_pools()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Starts the worker before serving and stops it in order on shutdown.
+
+    Args:
+        app (FastAPI): The application instance.
+    """
+    lifespan_state.reset()
+    start = time.perf_counter()
+    await run_in_threadpool(startup, app)
+
+    logger.debug("Start the audit log writer.")
+    audit_writer.start()
+    activity_tracker.start()
+    login_throttle.start()
+    if permission_snapshots.enabled:
+        permission_snapshots.start()
+    if DB_MAINTENANCE:
+        logger.debug("Start the database maintenance worker.")
+        db_maintenance.start()
+    if METRICS_DIR:
+        metrics_flusher.start()
+
+    lifespan_state.started_at = time.time()
+    lifespan_state.ready = True
+    logger.info("Worker ready in %.3fs.", time.perf_counter() - start)
+    try:
+        yield
+    finally:
+        lifespan_state.ready = False
+        lifespan_state.draining = True
+        db_maintenance.stop()
+        login_throttle.stop()  # Saves the last failure counters
+        activity_tracker.stop()  # Writes the last activity times
+        permission_snapshots.stop()
+        logger.debug("Stop the audit log writer (flushes queued events).")
+        audit_writer.stop()
+        await run_in_threadpool(shutdown)
+        metrics_flusher.stop()  # Writes the last snapshot, shutdown included
+        logger.info("Worker stopped.")
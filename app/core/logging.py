@@ -3,18 +3,24 @@ Logging configuration.
 """
 
 import logging
+import os
 import sys
 from logging.handlers import RotatingFileHandler
 
-from app.core.settings import DEBUG, LOG_FILE, LOG_LEVEL
+from app.core.settings import DB_SLOW_QUERY_LOG, DEBUG, LOG_FILE, LOG_LEVEL
 
 # Determine the logging level
 level = logging.getLevelName(LOG_LEVEL.upper())  # INFO, DEBUG, etc.
 # Log format
 formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
 
+# Create the log directories; the files themselves are only opened on the first record
+for log_file in (LOG_FILE, DB_SLOW_QUERY_LOG):
+    if os.path.dirname(log_file):
+        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+
 # Size handler (rotates every time the file reaches 1 MB)
-size_handler = RotatingFileHandler(LOG_FILE, maxBytes=int(1e6), backupCount=5)
+size_handler = RotatingFileHandler(LOG_FILE, maxBytes=int(1e6), backupCount=5, delay=True)
 size_handler.setLevel(level)
 size_handler.setFormatter(formatter)
 
@@ -31,3 +37,14 @@ if DEBUG:
     stream_handler.setLevel(level)
     stream_handler.setFormatter(formatter)
     logger.addHandler(stream_handler)
+
+# Slow-query logger, used by the SQL statement tracer (database/instrumentation.py).
+# The file is only created when the first slow statement is logged.
+slow_query_logger = logging.getLogger(f"{__name__}.slow_queries")
+slow_query_logger.setLevel(logging.WARNING)
+slow_query_logger.propagate = False
+slow_query_handler = RotatingFileHandler(
+    DB_SLOW_QUERY_LOG, maxBytes=int(1e6), backupCount=5, delay=True
+)
+slow_query_handler.setFormatter(formatter)
+slow_query_logger.addHandler(slow_query_handler)
@@ -0,0 +1,614 @@
+"""
+Prometheus Metrics
+
+This module implements a small, dependency-free metrics registry exposed in
+the Prometheus text format, plus the middleware that records HTTP metrics.
+
+Design:
+- Counters, gauges and histograms keep their values in per-thread shards.
+  Recording a value only touches the calling thread's dictionary, so the hot
+  path takes no lock; shards are summed when metrics are collected.
+- With several uvicorn workers, every process writes a snapshot of its values
+  to `METRICS_DIR` every `METRICS_FLUSH_INTERVAL` seconds and when it stops,
+  from a background worker (`metrics_flusher`), never from the request path.
+  Files are named after the PID and the process start time, so a reused PID
+  never overwrites the snapshot of the worker that had it before.
+- The worker serving /metrics merges all snapshots, so the exposed values
+  cover the whole host. The counters and histograms of dead workers are merged
+  into one archive (`metrics_archived.json`) and their snapshots removed;
+  gauges only count live workers. The launcher (`server.py`) removes the
+  snapshots of the previous run when the service (re)starts.
+
+Metrics:
+- http_requests_total, http_request_duration_seconds, http_requests_in_flight
+- auth_attempts_total (method: jwt, fake, telegram_login; outcome: success, failure, locked)
+- login_lockouts_total (provider)
+- rate_limit_rejections_total
+- audit_events_total (outcome: written, requeued, dropped), audit_queue_length
+- activity_updates_total (outcome: recorded, written)
+- db_queries_total, db_query_duration_seconds, db_connections_opened_total,
+  db_connections_open
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.background import PeriodicWorker
+from app.core.settings import METRICS_DIR, METRICS_FLUSH_INTERVAL
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: archiving is not serialized between processes
+    fcntl = None  # pylint: disable=invalid-name
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+LabelValues = Tuple[str, ...]
+
+# Counters and histograms of the workers that exited, in `METRICS_DIR`
+ARCHIVE_FILE = "metrics_archived.json"
+
+
+class Metric:
+    """
+    Base class of every metric: holds per-thread value shards.
+
+    Attributes:
+        name (str): Metric name.
+        documentation (str): Help text.
+        labelnames (tuple): Names of the labels, in the order values are passed.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def _shard(self) -> dict:
+        """Returns the calling thread's shard, creating it on first use."""
+        try:
+            return self._local.values
+        except AttributeError:
+            values: dict = {}
+            with self._shards_lock:  # Taken once per thread, never on the hot path
+                self._shards.append(values)
+            self._local.values = values
+            return values
+
+    def collect(self) -> Dict[LabelValues, object]:
+        """
+        Sums the shards of every thread.
+
+        Returns:
+            dict: Value by label values.
+        """
+        totals: Dict[LabelValues, float] = {}
+        for shard in list(self._shards):
+            for labels, value in shard.copy().items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+
+class Counter(Metric):
+    """A monotonically increasing counter."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        """
+        Increments the counter.
+
+        Args:
+            *labels (str): Label values, in `labelnames` order.
+            amount (float): Amount to add.
+        """
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+
+class Gauge(Metric):
+    """
+    A value that can go up and down.
+
+    Attributes:
+        multiprocess_mode (str): How values of several workers are merged: "sum" or "max".
+    """
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        multiprocess_mode: str = "sum",
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.multiprocess_mode = multiprocess_mode
+        self._set_values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        """
+        Increments the gauge.
+
+        Args:
+            *labels (str): Label values, in `labelnames` order.
+            amount (float): Amount to add.
+        """
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        """
+        Decrements the gauge.
+
+        Args:
+            *labels (str): Label values, in `labelnames` order.
+            amount (float): Amount to subtract.
+        """
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        """
+        Sets the gauge to an absolute value.
+
+        Args:
+            value (float): The new value.
+            *labels (str): Label values, in `labelnames` order.
+        """
+        self._set_values[labels] = value
+
+    def collect(self) -> Dict[LabelValues, object]:
+        totals = super().collect()
+        for labels, value in self._set_values.copy().items():
+            totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+
+class Histogram(Metric):
+    """
+    A histogram of observed values.
+
+    Each shard stores, per label values, a list with the (non-cumulative)
+    count of every bucket, followed by the sum and the count of observations.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames)
+
+    def observe(self, value: float, *labels: str):
+        """
+        Records an observation.
+
+        Args:
+            value (float): The observed value (seconds for durations).
+            *labels (str): Label values, in `labelnames` order.
+        """
+        shard = self._shard()
+        values = shard.get(labels)
+        if values is None:
+            values = shard[labels] = [0] * (len(self.buckets) + 3)
+        values[bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def collect(self) -> Dict[LabelValues, object]:
+        totals: Dict[LabelValues, List[float]] = {}
+        for shard in list(self._shards):
+            for labels, values in shard.copy().items():
+                current = totals.setdefault(labels, [0] * len(values))
+                for i, value in enumerate(list(values)):
+                    current[i] += value
+        return totals
+
+
+class Registry:
+    """
+    Collection of metrics, with multi-process aggregation and text exposition.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        """
+        Adds a metric to the registry.
+
+        Args:
+            metric (Metric): The metric to register.
+
+        Raises:
+            ValueError: If a metric with the same name is already registered.
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicated metric: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def snapshot(self) -> dict:
+        """
+        Collects the values of this process in a JSON-serializable form.
+
+        Returns:
+            dict: Samples per metric name.
+        """
+        return {
+            name: [[list(labels), value] for labels, value in metric.collect().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def flush(self):
+        """
+        Writes this process' snapshot to `METRICS_DIR`, if configured.
+
+        The file is replaced atomically, so readers never see a partial snapshot.
+        """
+        if not METRICS_DIR:
+            return
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"metrics_{_own_process_key()}.json")
+        _write_json(path, self.snapshot())
+
+    def _process_snapshots(self) -> List[Tuple[bool, dict]]:
+        """Returns (alive, snapshot) for this process, every other worker and the archive."""
+        own_key = _own_process_key()
+        snapshots = [(True, self.snapshot())]
+        if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+            return snapshots
+        dead = []
+        for filename in os.listdir(METRICS_DIR):
+            key = _snapshot_key(filename)
+            if key is None or key == own_key:
+                continue
+            if not _process_alive(key):
+                dead.append(filename)
+                continue
+            snapshot = _read_json(os.path.join(METRICS_DIR, filename))
+            if snapshot is not None:
+                snapshots.append((True, snapshot))
+        if dead:
+            self._archive(dead)
+        archive = _read_json(os.path.join(METRICS_DIR, ARCHIVE_FILE))
+        if archive is not None:
+            snapshots.append((False, archive.get("metrics", {})))
+        return snapshots
+
+    def _archive(self, filenames: List[str]):
+        """
+        Merges the counters and histograms of dead workers into the archive
+        and removes their snapshots, so the directory does not grow with recycling.
+
+        Args:
+            filenames (list): Snapshot files of dead workers.
+        """
+        lock_path = os.path.join(METRICS_DIR, f"{ARCHIVE_FILE}.lock")
+        with open(lock_path, "a", encoding="utf-8") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # Released when the file is closed
+            archive_path = os.path.join(METRICS_DIR, ARCHIVE_FILE)
+            archive = _read_json(archive_path) or {}
+            metrics = archive.get("metrics", {})
+            # Files merged before a crash prevented their removal are not merged twice
+            merged = [
+                name
+                for name in archive.get("merged", [])
+                if os.path.exists(os.path.join(METRICS_DIR, name))
+            ]
+            for filename in filenames:
+                if filename in merged:
+                    continue
+                snapshot = _read_json(os.path.join(METRICS_DIR, filename))
+                if snapshot is None:
+                    continue  # Archived by another worker meanwhile
+                for name, samples in snapshot.items():
+                    metric = self._metrics.get(name)
+                    if metric is None or isinstance(metric, Gauge):
+                        continue
+                    values = {tuple(labels): value for labels, value in metrics.get(name, [])}
+                    _merge_samples(metric, values, samples)
+                    metrics[name] = [[list(labels), value] for labels, value in values.items()]
+                merged.append(filename)
+            _write_json(archive_path, {"merged": merged, "metrics": metrics})
+            for filename in merged:
+                try:
+                    os.remove(os.path.join(METRICS_DIR, filename))
+                except FileNotFoundError:
+                    pass
+
+    def aggregate(self) -> Dict[str, Dict[LabelValues, object]]:
+        """
+        Merges the values of every worker process.
+
+        Returns:
+            dict: Value by label values, per metric name.
+        """
+        merged: Dict[str, Dict[LabelValues, object]] = {name: {} for name in self._metrics}
+        for alive, snapshot in self._process_snapshots():
+            for name, samples in snapshot.items():
+                metric = self._metrics.get(name)
+                if metric is None or (isinstance(metric, Gauge) and not alive):
+                    continue
+                _merge_samples(metric, merged[name], samples)
+        return merged
+
+    def exposition(self) -> str:
+        """
+        Renders the aggregated metrics in the Prometheus text format.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines = []
+        for name, values in self.aggregate().items():
+            metric = self._metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for labels, value in sorted(values.items()):
+                pairs = list(zip(metric.labelnames, labels))
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float("inf"),), value):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(
+                            f"{name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}"
+                        )
+                    lines.append(f"{name}_sum{_format_labels(pairs)} {value[-2]}")
+                    lines.append(f"{name}_count{_format_labels(pairs)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_format_labels(pairs)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge_samples(metric: Metric, values: Dict[LabelValues, object], samples: list):
+    """Adds the samples of a snapshot to merged values, in place."""
+    for labels, value in samples:
+        key = tuple(labels)
+        previous = values.get(key)
+        if previous is None:
+            values[key] = value
+        elif isinstance(metric, Histogram):
+            values[key] = [a + b for a, b in zip(previous, value)]
+        elif isinstance(metric, Gauge) and metric.multiprocess_mode == "max":
+            values[key] = max(previous, value)
+        else:
+            values[key] = previous + value
+
+
+def _process_start(pid: int) -> str:
+    """
+    Returns the start time of a process (in clock ticks since boot), so a
+    reused PID is not mistaken for the process that had it before.
+
+    Args:
+        pid (int): Process ID.
+
+    Returns:
+        str: The start time, or "0" where `/proc` is not available (or the process is gone).
+    """
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as stat_file:
+            stat = stat_file.read()
+    except OSError:
+        return "0"
+    # The command name can contain spaces and parentheses: the fields follow the last ")"
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+# Snapshot key of this process, computed again in forked workers
+_own_key = None  # pylint: disable=invalid-name
+_own_pid = None  # pylint: disable=invalid-name
+
+
+def _own_process_key() -> str:
+    """Returns "<pid>_<start time>", the key of this process' snapshot file."""
+    global _own_key, _own_pid  # pylint: disable=global-statement,invalid-name
+    pid = os.getpid()
+    if _own_pid != pid:
+        _own_key, _own_pid = f"{pid}_{_process_start(pid)}", pid
+    return _own_key
+
+
+def _snapshot_key(filename: str) -> Optional[str]:
+    """Returns the process key of a worker snapshot file, or None for any other file."""
+    if not (filename.startswith("metrics_") and filename.endswith(".json")):
+        return None
+    key = filename[len("metrics_") : -len(".json")]
+    pid, _, start = key.partition("_")
+    if not (pid.isdigit() and start.isdigit()):
+        return None  # The archive, or a stray file
+    return key
+
+
+def _process_alive(key: str) -> bool:
+    """Whether the process of a snapshot key is still running (and is the same process)."""
+    pid, _, start = key.partition("_")
+    return _pid_alive(int(pid)) and _process_start(int(pid)) == start
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path: str) -> Optional[dict]:
+    try:
+        with open(path, encoding="utf-8") as json_file:
+            return json.load(json_file)
+    except (OSError, ValueError):
+        return None  # Missing, or being replaced by its writer
+
+
+def _write_json(path: str, value: dict):
+    """Replaces a JSON file atomically."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as json_file:
+        json.dump(value, json_file)
+    os.replace(tmp_path, path)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "Total HTTP requests.", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency in seconds.", ("method", "route")
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being processed.")
+AUTH_ATTEMPTS = Counter(
+    "auth_attempts_total", "Authentication attempts.", ("method", "outcome")
+)
+LOGIN_LOCKOUTS = Counter(
+    "login_lockouts_total", "Lockouts started by failed logins.", ("provider",)
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests rejected by the rate limiter.", ("route",)
+)
+AUDIT_EVENTS = Counter(
+    "audit_events_total",
+    "Audit events written, requeued after a failed write or dropped.",
+    ("outcome",),
+)
+ACTIVITY_UPDATES = Counter(
+    "activity_updates_total", "Activity times recorded in memory and written.", ("outcome",)
+)
+CACHE_INVALIDATIONS = Counter(
+    "cache_invalidations_total", "Cache namespaces invalidated by database changes.", ("namespace",)
+)
+AUDIT_QUEUE_LENGTH = Gauge("audit_queue_length", "Audit events waiting to be written.")
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed.", ("operation",))
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time in seconds.",
+    ("operation",),
+    buckets=DB_BUCKETS,
+)
+DB_CONNECTIONS_OPENED = Counter(
+    "db_connections_opened_total", "SQLite connections opened."
+)
+DB_CONNECTIONS_OPEN = Gauge("db_connections_open", "SQLite connections currently open.")
+DB_WAL_SIZE = Gauge(
+    "db_wal_size_bytes", "Size of the SQLite WAL file.", multiprocess_mode="max"
+)
+DB_CHECKPOINT_DURATION = Histogram(
+    "db_checkpoint_duration_seconds",
+    "WAL checkpoint duration in seconds.",
+    ("mode",),
+    buckets=DB_BUCKETS,
+)
+DB_MAINTENANCE_TASKS = Counter(
+    "db_maintenance_tasks_total", "Database maintenance tasks run.", ("task",)
+)
+
+
+class MetricsFlusher(PeriodicWorker):
+    """
+    Writes the snapshot of this process to `METRICS_DIR` periodically and on stop.
+    """
+
+    def __init__(self, interval: float = METRICS_FLUSH_INTERVAL):
+        super().__init__("metrics-flusher", interval)
+
+    def run_once(self):
+        """
+        Writes the snapshot.
+        """
+        REGISTRY.flush()
+
+
+# Process-wide flusher, started by the lifespan when `METRICS_DIR` is set
+metrics_flusher = MetricsFlusher()
+
+
+def route_label(request: Request) -> str:
+    """
+    Returns the route template of a request, to keep label cardinality bounded.
+
+    Args:
+        request (Request): The processed request.
+
+    Returns:
+        str: The route path (e.g. "/api/v1/health"), or "<unmatched>".
+    """
+    route = request.scope.get("route")
+    return getattr(route, "path", "<unmatched>")
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """
+    Middleware that records request counts, latencies and in-flight requests.
+    """
+
+    async def dispatch(
+        self,
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]],
+    ) -> Response:
+        """
+        Times the request and records its metrics.
+
+        Parameters:
+            request (Request): The incoming HTTP request object.
+            call_next (Callable): A function that takes the request as a parameter
+                                  and returns an HTTP Response.
+
+        Returns:
+            Response: The HTTP response.
+
+        Raises:
+            Exception: Propagates any exception raised during the processing of the request.
+        """
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        status = "500"
+        try:
+            response = await call_next(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = route_label(request)
+            HTTP_REQUESTS.inc(request.method, route, status)
+            HTTP_REQUEST_DURATION.observe(elapsed, request.method, route)
@@ -0,0 +1,222 @@
+"""
+On-demand Request Profiling
+
+This module provides an ASGI middleware that profiles a single request when
+it carries the profiling header (`X-Profile: 1` by default) and the
+authenticated user has the `profile_requests` permission through its roles.
+
+How it works:
+- Requests without the header are passed straight to the application: the
+  only cost is scanning the request headers once.
+- For a triggered request, the bearer token is verified and the permission is
+  checked in the roles/permissions tables. Unauthorized triggers are ignored.
+- A sampling profiler thread records the stacks of every thread running
+  application code (the event loop and the threadpool used by sync endpoints)
+  while the request is processed.
+- The profile is stored in `PROFILE_DIR` in speedscope format
+  (https://www.speedscope.app) and its file name is returned in the
+  `X-Profile-Id` response header.
+
+Only one request is profiled at a time; concurrent requests running in the
+same process may appear in the profile.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.logging import logger
+from app.core.settings import (
+    PROFILE_DIR,
+    PROFILE_HEADER,
+    PROFILE_PERMISSION,
+    PROFILE_SAMPLE_INTERVAL_MS,
+)
+
+# Only stacks with frames from the project are kept (idle threads are skipped)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+Frame = Tuple[str, str, int]
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of every thread running project code at a fixed interval.
+
+    Attributes:
+        interval (float): Sampling interval in seconds.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._frames: Dict[Frame, int] = {}
+        self._samples: Dict[int, List[List[int]]] = {}
+        self._weights: Dict[int, List[float]] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._start = 0.0
+        self._end = 0.0
+
+    def start(self):
+        """
+        Starts sampling in a background thread.
+        """
+        self._start = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stops sampling and waits for the sampler thread.
+        """
+        self._stop.set()
+        self._thread.join()
+        self._end = time.perf_counter()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            for thread_id, frame in sys._current_frames().items():  # pylint: disable=protected-access
+                if thread_id != own_id:
+                    self._sample(thread_id, frame, now - last)
+            last = now
+
+    def _sample(self, thread_id: int, frame, weight: float):
+        stack = []
+        in_project = False
+        while frame is not None:
+            code = frame.f_code
+            if code.co_filename.startswith(PROJECT_ROOT) and "site-packages" not in code.co_filename:
+                in_project = True
+            key = (code.co_name, code.co_filename, code.co_firstlineno)
+            index = self._frames.get(key)
+            if index is None:
+                index = self._frames[key] = len(self._frames)
+            stack.append(index)
+            frame = frame.f_back
+        if in_project:
+            stack.reverse()  # speedscope expects stacks from the root to the leaf
+            self._samples.setdefault(thread_id, []).append(stack)
+            self._weights.setdefault(thread_id, []).append(weight)
+
+    def speedscope(self, name: str) -> dict:
+        """
+        Exports the collected samples in speedscope's file format.
+
+        Args:
+            name (str): Name of the profile.
+
+        Returns:
+            dict: The speedscope document, with one sampled profile per thread.
+        """
+        frames = [
+            {"name": func, "file": filename, "line": line}
+            for (func, filename, line), _ in sorted(self._frames.items(), key=lambda f: f[1])
+        ]
+        profiles = [
+            {
+                "type": "sampled",
+                "name": f"Thread {thread_id}",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self._end - self._start,
+                "samples": samples,
+                "weights": self._weights[thread_id],
+            }
+            for thread_id, samples in self._samples.items()
+        ]
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "jakanode-back",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _can_profile(scope) -> bool:
+    """Checks the bearer token and the profiling permission of the request user."""
+    # Imported on first use, so profiling support adds nothing to the import time
+    # pylint: disable=import-outside-toplevel
+    from app.auth.telegram_auth import verify_telegram_token
+    from database.operations.permissions_ops import telegram_user_has_permission
+
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = verify_telegram_token(token)
+    except HTTPException:
+        return False
+    return telegram_user_has_permission(user["user"], PROFILE_PERMISSION)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles requests carrying the profiling header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.header = PROFILE_HEADER.lower().encode("latin-1")
+        self._lock = threading.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or _header(scope, self.header) is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await run_in_threadpool(_can_profile, scope):
+            logger.warning("Ignoring profiling request from an unauthorized user.")
+            await self.app(scope, receive, send)
+            return
+
+        if not self._lock.acquire(blocking=False):
+            logger.info("Another request is being profiled; skipping.")
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        try:
+            profiler.start()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profiler.stop()
+            name = f"{scope['method']} {scope['path']}"
+            await run_in_threadpool(_save_profile, profile_id, profiler.speedscope(name))
+        finally:
+            self._lock.release()
+
+
+def _save_profile(profile_id: str, profile: dict):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{profile_id}.speedscope.json")
+    with open(path, "w", encoding="utf-8") as profile_file:
+        json.dump(profile, profile_file)
+    logger.info("Request profile saved to %s", path)
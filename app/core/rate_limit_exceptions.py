@@ -16,6 +16,7 @@ from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
 from app.core.logging import logger
+from app.core.metrics import RATE_LIMIT_REJECTIONS, route_label
 
 
 async def rate_limit_exceeded_handler(request: Request, exc: Exception) -> Response:
@@ -30,6 +31,7 @@ async def rate_limit_exceeded_handler(request: Request, exc: Exception) -> Respo
         Response: A custom response indicating the rate limit has been exceeded.
     """
     if isinstance(exc, RateLimitExceeded):  # ✅ Verifica si es un RateLimitExceeded
+        RATE_LIMIT_REJECTIONS.inc(route_label(request))
         return _rate_limit_exceeded_handler(request, exc)
     logger.debug("Rate limit exceeded error (429).")
     raise exc
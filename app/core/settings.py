@@ -26,3 +26,99 @@ LOG_FILE = os.getenv("LOG_FILE", "logs/jakanode_back.log")
 # Database configuration
 DB_NAME = os.getenv("DB_NAME", "db.sqlite3")
 DB_PATH = os.getenv("DB_PATH", "./")
+# PRAGMA set applied to every connection: durable, balanced or throughput
+DB_STORAGE_PROFILE = os.getenv("DB_STORAGE_PROFILE", "balanced")
+# Idle read-only connections kept per process (reads never wait for a connection)
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(max(4, 2 * (os.cpu_count() or 1)))))
+# Read-only connections opened at startup, before the worker accepts traffic
+DB_READ_POOL_PREWARM = int(os.getenv("DB_READ_POOL_PREWARM", str(min(4, DB_READ_POOL_SIZE))))
+# Seconds a write waits for the process's writer connection before failing
+DB_WRITER_TIMEOUT = float(os.getenv("DB_WRITER_TIMEOUT", "10"))
+
+# Seconds between two checks of the database for changes invalidating the caches
+# (database/cache_versions.py); 0 checks on every cached read
+CACHE_VERSIONS_CHECK_INTERVAL = float(os.getenv("CACHE_VERSIONS_CHECK_INTERVAL", "0.5"))
+
+# Permission snapshot shared by the worker processes (database/permission_snapshot.py)
+PERMISSION_SNAPSHOT = os.getenv("PERMISSION_SNAPSHOT", "True").lower() in ["true", "1", "yes"]
+# Snapshot file (default: next to the database)
+PERMISSION_SNAPSHOT_PATH = os.getenv("PERMISSION_SNAPSHOT_PATH", "")
+# Seconds between two checks for a snapshot published by another process
+PERMISSION_SNAPSHOT_CHECK_INTERVAL = float(os.getenv("PERMISSION_SNAPSHOT_CHECK_INTERVAL", "1"))
+
+# Metrics configuration
+# Directory where each worker process writes its metrics snapshot (empty: single process)
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+# Seconds between two snapshot writes of the same worker
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# SQL statement tracing (opt-in, per process)
+DB_TRACE = os.getenv("DB_TRACE", "False").lower() in ["true", "1", "yes"]
+# Statements slower than this (in milliseconds) are written to the slow-query log
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "100"))
+DB_SLOW_QUERY_LOG = os.getenv("DB_SLOW_QUERY_LOG", "logs/slow_queries.log")
+
+# Permission required by the admin data endpoints (e.g. the audit log export)
+ADMIN_PERMISSION = os.getenv("ADMIN_PERMISSION", "admin_data")
+
+# On-demand request profiling
+# Requests carrying this header are profiled if the user has PROFILE_PERMISSION
+PROFILE_HEADER = os.getenv("PROFILE_HEADER", "X-Profile")
+PROFILE_PERMISSION = os.getenv("PROFILE_PERMISSION", "profile_requests")
+PROFILE_DIR = os.getenv("PROFILE_DIR", "logs/profiles")
+# Sampling interval of the profiler, in milliseconds
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+
+# Failed login throttling
+# Failures allowed before a lockout; each further failure doubles the lockout
+LOGIN_LOCKOUT_THRESHOLD = int(os.getenv("LOGIN_LOCKOUT_THRESHOLD", "5"))
+LOGIN_LOCKOUT_BASE_SECONDS = float(os.getenv("LOGIN_LOCKOUT_BASE_SECONDS", "30"))
+LOGIN_LOCKOUT_MAX_SECONDS = float(os.getenv("LOGIN_LOCKOUT_MAX_SECONDS", "3600"))
+# Seconds after the last failure (or the end of the lockout) when failures are forgotten
+LOGIN_FAILURE_WINDOW = float(os.getenv("LOGIN_FAILURE_WINDOW", "900"))
+LOGIN_THROTTLE_MAX_ENTRIES = int(os.getenv("LOGIN_THROTTLE_MAX_ENTRIES", "100000"))
+# Seconds between two writes of the failure counters to the users table
+LOGIN_THROTTLE_FLUSH_INTERVAL = float(os.getenv("LOGIN_THROTTLE_FLUSH_INTERVAL", "5"))
+
+# Audit log writer
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))  # Max buffered events
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))  # Max events per transaction
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))  # Seconds
+# What to do when the queue is full: drop_oldest, drop_newest or block
+AUDIT_OVERFLOW_POLICY = os.getenv("AUDIT_OVERFLOW_POLICY", "drop_oldest")
+AUDIT_BLOCK_TIMEOUT = float(os.getenv("AUDIT_BLOCK_TIMEOUT", "0.1"))  # Seconds (block policy)
+
+# Activity tracking (auth_providers.last_login)
+ACTIVITY_FLUSH_INTERVAL = float(os.getenv("ACTIVITY_FLUSH_INTERVAL", "5"))  # Seconds
+# Pending accounts that trigger a flush before the interval
+ACTIVITY_MAX_PENDING = int(os.getenv("ACTIVITY_MAX_PENDING", "10000"))
+
+# Audit log archive
+# Rows older than AUDIT_RETENTION_DAYS are moved to compressed segment files
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "90"))
+AUDIT_ARCHIVE_DIR = os.getenv("AUDIT_ARCHIVE_DIR", "archive/audit_logs")
+AUDIT_ARCHIVE_CHUNK_ROWS = int(os.getenv("AUDIT_ARCHIVE_CHUNK_ROWS", "10000"))  # Rows per block
+
+# Database maintenance (WAL checkpoints, PRAGMA optimize, incremental vacuum)
+DB_MAINTENANCE = os.getenv("DB_MAINTENANCE", "True").lower() in ["true", "1", "yes"]
+DB_MAINTENANCE_INTERVAL = float(os.getenv("DB_MAINTENANCE_INTERVAL", "30"))  # Seconds
+# Under load, a passive checkpoint runs once the WAL file is bigger than this
+DB_WAL_CHECKPOINT_BYTES = int(os.getenv("DB_WAL_CHECKPOINT_BYTES", str(4 * 1024 * 1024)))
+DB_OPTIMIZE_INTERVAL = float(os.getenv("DB_OPTIMIZE_INTERVAL", "3600"))  # Seconds
+# Maximum free pages released by each incremental vacuum
+DB_INCREMENTAL_VACUUM_PAGES = int(os.getenv("DB_INCREMENTAL_VACUUM_PAGES", "1000"))
+
+# Production server (server.py)
+SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))
+SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))  # Pending connections queue
+# Seconds an idle keep-alive connection stays open; keep it above the proxy's idle timeout
+SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "65"))
+# A worker is replaced after this many requests (0: never), plus a random 0..jitter
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+# Seconds a stopping worker has to finish its requests before it is killed
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+# Each worker binds its own SO_REUSEPORT socket instead of sharing the master's
+SERVER_REUSE_PORT = os.getenv("SERVER_REUSE_PORT", "False").lower() in ["true", "1", "yes"]
@@ -0,0 +1,16 @@
+"""
+Benchmarks package.
+
+This package contains reproducible benchmark suites for the Jakanode API.
+Each suite can be run as a module and prints a summary table, optionally
+saving the results as a JSON baseline and failing when a regression exceeds
+a configurable threshold.
+
+Available suites:
+    - benchmarks.http_bench: In-process HTTP benchmarks of the API endpoints.
+    - benchmarks.db_bench: Micro-benchmarks of the database operations.
+    - benchmarks.storage_profiles: The database benchmarks run with every storage profile.
+    - benchmarks.role_hierarchy: Role inheritance on deep and wide hierarchies.
+    - benchmarks.datagen: Synthetic data generator used by the database benchmarks.
+    - benchmarks.import_time: Application import time report and budget check.
+"""
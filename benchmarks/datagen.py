@@ -0,0 +1,284 @@
+"""
+Synthetic Data Generator
+
+This module fills a database created by the migrations with synthetic,
+deterministic data for benchmarks: users with Telegram and Google identities,
+auth providers, roles, permissions, their assignments and audit logs.
+
+Scales:
+    - small: 10,000 users
+    - medium: 100,000 users
+    - large: 1,000,000 users
+
+Usage:
+
+    python -m benchmarks.datagen --scale small --output /tmp/bench_small.sqlite3
+
+Rows are inserted with `executemany` from generators inside a single
+transaction, so memory stays flat regardless of the scale.
+
+`synthetic_template()` returns a template database (see `database/fixtures.py`)
+seeded with a dataset, to clone fresh copies of it in milliseconds.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, Optional
+
+from database.db_config import get_db_connection, set_db_path
+from database.fixtures import TemplateDatabase
+from database.migrate import migrate
+
+SCALES: Dict[str, int] = {
+    "small": 10_000,
+    "medium": 100_000,
+    "large": 1_000_000,
+}
+
+PERMISSIONS = 200  # Number of permissions
+PERMISSIONS_PER_ROLE = 20  # Permissions assigned to every role
+AUDIT_LOGS_PER_USER = 2  # Audit log rows generated per user
+TELEGRAM_RATIO = 0.7  # Share of users with a Telegram identity
+GOOGLE_RATIO = 0.4  # Share of users with a Google identity
+AUDIT_ACTIONS = ("login_success", "login_failed", "role_change")
+EPOCH = datetime(2024, 1, 1)
+
+
+def roles_for(users: int) -> int:
+    """
+    Returns the number of roles generated for a number of users.
+
+    Args:
+        users (int): Number of users.
+
+    Returns:
+        int: Number of roles (one per thousand users, at least 50).
+    """
+    return max(50, users // 1000)
+
+
+def _timestamp(rng: random.Random) -> str:
+    return (EPOCH + timedelta(seconds=rng.randrange(365 * 24 * 3600))).strftime(
+        "%Y-%m-%d %H:%M:%S"
+    )
+
+
+def _users(count: int) -> Iterator[tuple]:
+    for user_id in range(1, count + 1):
+        yield (user_id, f"user{user_id}@example.com", f"User {user_id}")
+
+
+def _telegram(count: int, seed: int) -> Iterator[tuple]:
+    rng = random.Random(seed)
+    for user_id in range(1, count + 1):
+        if rng.random() < TELEGRAM_RATIO:
+            yield (user_id, 100_000_000 + user_id, f"tg_user{user_id}", "Tele", f"Gram{user_id}")
+
+
+def _google(count: int, seed: int) -> Iterator[tuple]:
+    rng = random.Random(seed + 1)
+    for user_id in range(1, count + 1):
+        if rng.random() < GOOGLE_RATIO:
+            yield (user_id, f"g{user_id:012d}", f"User {user_id}", f"user{user_id}@gmail.com")
+
+
+def _providers(count: int, seed: int) -> Iterator[tuple]:
+    telegram_rng = random.Random(seed)
+    google_rng = random.Random(seed + 1)
+    for user_id in range(1, count + 1):
+        if telegram_rng.random() < TELEGRAM_RATIO:
+            yield (user_id, "telegram", str(100_000_000 + user_id))
+        if google_rng.random() < GOOGLE_RATIO:
+            yield (user_id, "google", f"g{user_id:012d}")
+
+
+def _role_permissions(roles: int, seed: int, first_permission: int) -> Iterator[tuple]:
+    rng = random.Random(seed + 2)
+    permission_ids = range(first_permission, first_permission + PERMISSIONS)
+    for role_id in range(1, roles + 1):
+        for permission_id in rng.sample(permission_ids, PERMISSIONS_PER_ROLE):
+            yield (role_id, permission_id)
+
+
+def _user_roles(count: int, roles: int, seed: int) -> Iterator[tuple]:
+    rng = random.Random(seed + 3)
+    for user_id in range(1, count + 1):
+        for role_id in rng.sample(range(1, roles + 1), rng.choice((1, 1, 2))):
+            yield (user_id, role_id)
+
+
+def _audit_logs(count: int, seed: int) -> Iterator[tuple]:
+    rng = random.Random(seed + 4)
+    for _ in range(count * AUDIT_LOGS_PER_USER):
+        user_id = rng.randint(1, count)
+        yield (user_id, rng.choice(AUDIT_ACTIONS), f"user {user_id}", _timestamp(rng))
+
+
+def create_schema():
+    """
+    Creates the schema by applying every migration to the current database.
+    """
+    migrate(log=lambda message: None)
+
+
+def populate(connection, users: int, seed: int = 42) -> Dict[str, int]:
+    """
+    Inserts a synthetic dataset into a newly migrated database.
+
+    Args:
+        connection (sqlite3.Connection): Connection to the database to fill.
+        users (int): Number of users to generate.
+        seed (int): Seed of the random generators, for reproducible datasets.
+
+    Returns:
+        dict: Number of rows inserted per table.
+    """
+    roles = roles_for(users)
+    cursor = connection.cursor()
+    # Synthetic permissions come after the ones created by migrations
+    first_permission = cursor.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM permissions"
+    ).fetchone()[0]
+    cursor.execute("PRAGMA synchronous = OFF;")
+    cursor.execute("BEGIN")
+    statements = [
+        (
+            "users",
+            "INSERT INTO users (id, email, full_name) VALUES (?, ?, ?)",
+            _users(users),
+        ),
+        (
+            "auth_telegram",
+            "INSERT INTO auth_telegram (user_id, telegram_id, username, first_name, last_name) "
+            "VALUES (?, ?, ?, ?, ?)",
+            _telegram(users, seed),
+        ),
+        (
+            "auth_google",
+            "INSERT INTO auth_google (user_id, google_id, full_name, email) VALUES (?, ?, ?, ?)",
+            _google(users, seed),
+        ),
+        (
+            "auth_providers",
+            "INSERT INTO auth_providers (user_id, provider, provider_id) VALUES (?, ?, ?)",
+            _providers(users, seed),
+        ),
+        (
+            "roles",
+            "INSERT INTO roles (id, name, description) VALUES (?, ?, ?)",
+            ((i, f"role_{i}", f"Synthetic role {i}") for i in range(1, roles + 1)),
+        ),
+        (
+            "permissions",
+            "INSERT INTO permissions (id, name, description) VALUES (?, ?, ?)",
+            (
+                (i, f"permission_{i}", None)
+                for i in range(first_permission, first_permission + PERMISSIONS)
+            ),
+        ),
+        (
+            "role_permissions",
+            "INSERT INTO role_permissions (role_id, permission_id) VALUES (?, ?)",
+            _role_permissions(roles, seed, first_permission),
+        ),
+        (
+            "user_roles",
+            "INSERT INTO user_roles (user_id, role_id) VALUES (?, ?)",
+            _user_roles(users, roles, seed),
+        ),
+        (
+            "audit_logs",
+            "INSERT INTO audit_logs (user_id, action, details, created_at) VALUES (?, ?, ?, ?)",
+            _audit_logs(users, seed),
+        ),
+    ]
+    counts = {}
+    for table, sql, rows in statements:
+        cursor.executemany(sql, rows)
+        counts[table] = cursor.rowcount
+    cursor.execute("COMMIT")
+    cursor.execute("PRAGMA synchronous = NORMAL;")
+    cursor.execute("ANALYZE;")
+    return counts
+
+
+def synthetic_template(
+    users: int, seed: int = 42, cache_dir: Optional[str] = None
+) -> TemplateDatabase:
+    """
+    Returns a template database seeded with a synthetic dataset.
+
+    Args:
+        users (int): Number of users to generate.
+        seed (int): Seed of the random generators.
+        cache_dir (str, optional): Directory where the template file is kept
+            across runs; in memory if omitted.
+
+    Returns:
+        TemplateDatabase: The template; built on first clone.
+    """
+    return TemplateDatabase(
+        f"synthetic_{users}_{seed}",
+        seeder=lambda connection: populate(connection, users, seed),
+        cache_dir=cache_dir,
+    )
+
+
+def generate(path: str, users: int, seed: int = 42) -> Dict[str, int]:
+    """
+    Creates a new database file with the schema and a synthetic dataset.
+
+    The generated database becomes the current one for `get_db_connection`.
+
+    Args:
+        path (str): Database file to create; an existing file is replaced.
+        users (int): Number of users to generate.
+        seed (int): Seed of the random generators.
+
+    Returns:
+        dict: Number of rows inserted per table.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    set_db_path(path)
+    create_schema()
+    connection = get_db_connection()
+    connection.isolation_level = None  # Transactions are managed explicitly
+    try:
+        return populate(connection, users, seed)
+    finally:
+        connection.close()
+
+
+def main(argv=None) -> int:
+    """
+    Generates a synthetic database from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark database.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--output", required=True, help="Database file to create.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    counts = generate(args.output, SCALES[args.scale], args.seed)
+    elapsed = time.perf_counter() - start
+    for table, count in counts.items():
+        print(f"{table:<20}{count:>12}")
+    print(f"Generated in {elapsed:.1f}s ({sum(counts.values()) / elapsed:,.0f} rows/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
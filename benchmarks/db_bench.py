@@ -0,0 +1,254 @@
+"""
+Database Micro-benchmarks
+
+This module times the operations in `database/operations` against synthetic
+datasets generated by `benchmarks.datagen`, so pool, index and PRAGMA changes
+can be judged with numbers.
+
+Cases:
+    - create_role: Inserts new roles, one commit each.
+    - get_all_roles: Lists every role.
+    - get_role_by_id: Looks up random roles by primary key.
+    - delete_role: Deletes roles that have users and permissions assigned
+      (cascading through user_roles and role_permissions).
+    - get_auth_telegram_by_user / get_auth_google_by_user: Auth lookups by user.
+
+Every case reports its latency distribution and rows/sec (rows returned or
+affected per second).
+
+Usage:
+
+    python -m benchmarks.db_bench --scale small
+    python -m benchmarks.db_bench --scale small --scale medium --save-baseline
+    python -m benchmarks.db_bench --data-dir /var/tmp/jakanode-bench --threshold 0.15
+
+Generated datasets are kept in `--data-dir` as template databases (see
+`database/fixtures.py`) and reused by later runs until a migration changes;
+every run works on a fresh clone, so the dataset stays unchanged between runs.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from benchmarks.datagen import SCALES, roles_for, synthetic_template
+from benchmarks.stats import compare, format_table, load_baseline, save_baseline, summarize
+from database.db_config import set_db_path
+from database.operations.auth_google_ops import get_auth_google_by_user
+from database.operations.auth_telegram_ops import get_auth_telegram_by_user
+from database.operations.roles_ops import (
+    create_role,
+    delete_role,
+    get_all_roles,
+    get_role_by_id,
+)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "db.json")
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "jakanode_bench")
+
+# A case receives the iteration number and returns the number of rows it touched
+Case = Callable[[int], int]
+
+
+def clone_dataset(data_dir: str, scale: str, seed: int, path: str) -> str:
+    """
+    Creates a fresh copy of the dataset of a scale, generating it if needed.
+
+    Args:
+        data_dir (str): Directory holding the generated datasets.
+        scale (str): Name of the scale.
+        seed (int): Seed of the synthetic data.
+        path (str): Database file to create.
+
+    Returns:
+        str: The path.
+    """
+    template = synthetic_template(SCALES[scale], seed, cache_dir=data_dir)
+    if not os.path.exists(template.path):
+        print(f"Generating {scale} dataset ({SCALES[scale]:,} users) in {template.path}...")
+    start = time.perf_counter()
+    template.clone(path)
+    print(f"Dataset {scale} ready in {time.perf_counter() - start:.2f}s")
+    return path
+
+
+def build_cases(users: int, seed: int) -> Dict[str, Tuple[Case, int]]:
+    """
+    Builds the benchmark cases and their iteration counts.
+
+    Args:
+        users (int): Number of users in the dataset.
+        seed (int): Seed used to pick random keys.
+
+    Returns:
+        dict: (case, iterations) by case name.
+    """
+    rng = random.Random(seed)
+    roles = roles_for(users)
+    run_id = int(time.time())
+
+    def create(i):
+        create_role(f"bench_{run_id}_{i}", "Benchmark role")
+        return 1
+
+    def list_roles(_):
+        return len(get_all_roles())
+
+    def role_by_id(_):
+        return 1 if get_role_by_id(rng.randint(1, roles)) else 0
+
+    # Every delete targets a different seeded role, which has users and permissions
+    deletable = rng.sample(range(1, roles + 1), min(20, roles))
+
+    def delete(i):
+        return 1 if delete_role(deletable[i]) else 0
+
+    def telegram_by_user(_):
+        return 1 if get_auth_telegram_by_user(rng.randint(1, users)) else 0
+
+    def google_by_user(_):
+        return 1 if get_auth_google_by_user(rng.randint(1, users)) else 0
+
+    return {
+        "create_role": (create, 500),
+        "get_all_roles": (list_roles, 200),
+        "get_role_by_id": (role_by_id, 2000),
+        "delete_role": (delete, len(deletable)),
+        "get_auth_telegram_by_user": (telegram_by_user, 2000),
+        "get_auth_google_by_user": (google_by_user, 2000),
+    }
+
+
+def run_case(case: Case, iterations: int) -> dict:
+    """
+    Runs a benchmark case and summarizes its latencies and rows/sec.
+
+    Args:
+        case (Callable): The case to run.
+        iterations (int): Number of times the case is called.
+
+    Returns:
+        dict: The summary, including `rows` and `rows_per_sec`.
+    """
+    latencies: List[float] = []
+    rows = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        op_start = time.perf_counter()
+        rows += case(i)
+        latencies.append(time.perf_counter() - op_start)
+    elapsed = time.perf_counter() - start
+    summary = summarize(latencies, elapsed)
+    summary["rows"] = rows
+    summary["rows_per_sec"] = rows / elapsed if elapsed > 0 else 0.0
+    return summary
+
+
+def run_scale(
+    scale: str,
+    data_dir: str,
+    seed: int,
+    cases: List[str],
+    prepare: Optional[Callable[[str], None]] = None,
+) -> Dict[str, dict]:
+    """
+    Runs the selected cases against the dataset of a scale.
+
+    Args:
+        scale (str): Name of the scale.
+        data_dir (str): Directory holding the generated datasets.
+        seed (int): Seed of the synthetic data.
+        cases (list): Names of the cases to run, or an empty list for all.
+        prepare (Callable, optional): Called with the path of the working copy
+            of the dataset before the cases run.
+
+    Returns:
+        dict: Summary per "<scale>.<case>".
+    """
+    work = clone_dataset(data_dir, scale, seed, os.path.join(data_dir, f"work_{scale}.sqlite3"))
+    if prepare:
+        prepare(work)
+    set_db_path(work)
+
+    results = {}
+    try:
+        for name, (case, iterations) in build_cases(SCALES[scale], seed).items():
+            if cases and name not in cases:
+                continue
+            results[f"{scale}.{name}"] = run_case(case, iterations)
+    finally:
+        set_db_path(None)
+    return results
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Database micro-benchmarks.")
+    parser.add_argument(
+        "--scale", action="append", choices=SCALES, help="Dataset scale (repeatable)."
+    )
+    parser.add_argument("--case", action="append", help="Run only this case (repeatable).")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Dataset directory.")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Save the results as the new baseline."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative regression before failing (default: 0.2 = 20%%).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """
+    Runs the database benchmarks from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: 0 on success, 1 if a regression exceeded the threshold.
+    """
+    args = parse_args(argv)
+    results = {}
+    for scale in args.scale or ["small"]:
+        results.update(run_scale(scale, args.data_dir, args.seed, args.case or []))
+
+    print(format_table(results))
+    print()
+    for name, summary in results.items():
+        print(f"{name:<40}{summary['rows']:>10} rows{summary['rows_per_sec']:>14,.0f} rows/s")
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, {"scales": args.scale or ["small"]})
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}; skipping regression check.")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+In-process HTTP Benchmarks
+
+This module benchmarks the API endpoints by driving the ASGI application from
+`main.py` in-process through `httpx.ASGITransport`. No socket is opened, so the
+results measure the application stack (middlewares, routing, dependencies,
+authentication and serialization) without network noise. The application
+runs against a fresh migrated database (see `database/fixtures.py`), with its
+lifespan started, so the background workers write to real tables.
+
+Scenarios:
+    - health: GET /api/v1/health
+    - public_home: GET /api/v1/ (rate limited; every request uses a new client address)
+    - dashboard_jwt: GET /api/v1/dashboard with a JWT issued by `create_access_token`
+    - dashboard_fake: GET /api/v1/dashboard with the fake `secret_token`
+    - auth_telegram: POST /api/v1/auth/telegram with a validly signed payload
+
+Usage:
+
+    python -m benchmarks.http_bench
+    python -m benchmarks.http_bench --requests 5000 --concurrency 16 --save-baseline
+    python -m benchmarks.http_bench --baseline benchmarks/baselines/http.json --threshold 0.15
+
+The command exits with status 1 if any metric regresses past the threshold
+compared to the baseline.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import hmac
+import os
+import sys
+import tempfile
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Tuple
+
+from benchmarks.stats import compare, format_table, load_baseline, save_baseline, summarize
+
+# Default settings for a self-contained run. They must be in place before the
+# application modules read them at import time.
+os.environ.setdefault("TELEGRAM_BOT_TOKEN", "benchmark-bot-token")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+os.environ.setdefault(
+    "LOG_FILE", os.path.join(tempfile.gettempdir(), "jakanode_back_bench.log")
+)
+
+# pylint: disable=wrong-import-position
+import httpx
+
+from app.auth.token import create_access_token
+from app.core.settings import TELEGRAM_BOT_TOKEN
+from database.fixtures import TemplateDatabase
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "http.json")
+
+# A request factory returns the arguments for `httpx.AsyncClient.request`
+RequestFactory = Callable[[], Tuple[str, str, dict]]
+
+
+def rotate_client_address(asgi_app):
+    """
+    Wraps an ASGI application so every request comes from a different client address.
+
+    The public endpoints are rate limited per client IP; rotating the address
+    keeps the limiter in the measured path without turning the run into 429s.
+
+    Args:
+        asgi_app: The ASGI application to wrap.
+
+    Returns:
+        Callable: An ASGI application.
+    """
+    counter = 0
+
+    async def wrapper(scope, receive, send):
+        nonlocal counter
+        if scope["type"] == "http":
+            counter += 1
+            address = f"10.{(counter >> 16) & 255}.{(counter >> 8) & 255}.{counter & 255}"
+            scope = dict(scope, client=(address, 50000))
+        await asgi_app(scope, receive, send)
+
+    return wrapper
+
+
+def signed_telegram_payload(telegram_id: int) -> dict:
+    """
+    Builds Telegram Login Widget data signed with the configured bot token.
+
+    Args:
+        telegram_id (int): Telegram user ID to authenticate.
+
+    Returns:
+        dict: Authentication data including a valid `hash`.
+    """
+    payload = {
+        "id": telegram_id,
+        "auth_date": int(time.time()),
+        "first_name": "Bench",
+        "last_name": None,
+        "username": f"bench_{telegram_id}",
+        "photo_url": None,
+    }
+    data_str = "\n".join(
+        f"{k}={v}" for k, v in sorted(payload.items()) if v is not None
+    )
+    secret_key = hashlib.sha256(TELEGRAM_BOT_TOKEN.encode()).digest()
+    payload["hash"] = hmac.new(secret_key, data_str.encode(), hashlib.sha256).hexdigest()
+    return payload
+
+
+def build_scenarios() -> Dict[str, RequestFactory]:
+    """
+    Builds the request factory of every benchmark scenario.
+
+    Returns:
+        dict: Request factories by scenario name.
+    """
+    jwt_token = create_access_token(data={"sub": "1001"}, expires_delta=timedelta(hours=1))
+    jwt_headers = {"Authorization": f"Bearer {jwt_token}"}
+    fake_headers = {"Authorization": "Bearer secret_token"}
+
+    return {
+        "health": lambda: ("GET", "/api/v1/health", {}),
+        "public_home": lambda: ("GET", "/api/v1/", {}),
+        "dashboard_jwt": lambda: ("GET", "/api/v1/dashboard", {"headers": jwt_headers}),
+        "dashboard_fake": lambda: ("GET", "/api/v1/dashboard", {"headers": fake_headers}),
+        "auth_telegram": lambda: (
+            "POST",
+            "/api/v1/auth/telegram",
+            {"json": signed_telegram_payload(1001)},
+        ),
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    factory: RequestFactory,
+    requests: int,
+    concurrency: int,
+) -> Tuple[List[float], float, Dict[int, int]]:
+    """
+    Sends `requests` requests with `concurrency` concurrent workers.
+
+    Request arguments are built before the timer starts, so payload signing
+    is not part of the measured latency.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the in-process transport.
+        factory (Callable): Request factory of the scenario.
+        requests (int): Total number of requests.
+        concurrency (int): Number of concurrent workers.
+
+    Returns:
+        tuple: Latencies in seconds, elapsed wall time and a count per status code.
+    """
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            method, url, kwargs = factory()
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, time.perf_counter() - start, statuses
+
+
+async def run_benchmarks(
+    scenarios: Dict[str, RequestFactory], requests: int, concurrency: int, warmup: int
+) -> Dict[str, dict]:
+    """
+    Runs every scenario and summarizes its results.
+
+    Args:
+        scenarios (dict): Request factories by scenario name.
+        requests (int): Measured requests per scenario.
+        concurrency (int): Concurrent workers per scenario.
+        warmup (int): Unmeasured requests sent before each scenario.
+
+    Returns:
+        dict: Summary per scenario.
+
+    Raises:
+        RuntimeError: If a scenario returns an unexpected status code.
+    """
+    # Imported once the benchmark database is in use
+    from main import app  # pylint: disable=import-outside-toplevel
+
+    transport = httpx.ASGITransport(app=rotate_client_address(app))
+    results = {}
+    async with app.router.lifespan_context(app), httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        for name, factory in scenarios.items():
+            await run_scenario(client, factory, warmup, concurrency)
+            latencies, elapsed, statuses = await run_scenario(
+                client, factory, requests, concurrency
+            )
+            if set(statuses) != {200}:
+                raise RuntimeError(f"Scenario {name} returned unexpected statuses: {statuses}")
+            results[name] = summarize(latencies, elapsed)
+    return results
+
+
+def parse_args(argv=None):
+    """
+    Parses the command line arguments.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="In-process HTTP benchmarks.")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per scenario.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients.")
+    parser.add_argument("--warmup", type=int, default=100, help="Warmup requests per scenario.")
+    parser.add_argument(
+        "--scenario", action="append", help="Run only this scenario (repeatable)."
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="Save the results as the new baseline."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Allowed relative regression before failing (default: 0.2 = 20%%).",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    """
+    Runs the HTTP benchmarks from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: 0 on success, 1 if a regression exceeded the threshold.
+    """
+    args = parse_args(argv)
+    scenarios = build_scenarios()
+    if args.scenario:
+        scenarios = {name: scenarios[name] for name in args.scenario}
+
+    with TemplateDatabase().database():
+        results = asyncio.run(
+            run_benchmarks(scenarios, args.requests, args.concurrency, args.warmup)
+        )
+    print(format_table(results))
+
+    if args.save_baseline:
+        config = {"requests": args.requests, "concurrency": args.concurrency}
+        save_baseline(args.baseline, results, config)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline found at {args.baseline}; skipping regression check.")
+        return 0
+
+    regressions = compare(results, load_baseline(args.baseline), args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Application Import Time Report and Budget
+
+This module measures how long `import main` takes in a fresh interpreter,
+using Python's `-X importtime`, and reports where the time goes:
+    - Total import time of the application (median of several runs).
+    - Cumulative time per top-level package (fastapi, slowapi, app, database...).
+    - The slowest individual modules by self time.
+
+It also acts as the import-time budget check: the command exits with status 1
+if the median import time exceeds `--budget-ms`. The same check runs in the
+test suite (`tests/test_import_time.py`).
+
+Usage:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --runs 7 --budget-ms 800 --top 30
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+# Default budget for `import main`, in milliseconds: about 20% above the
+# measured median (~650 ms), so a regression of that size fails the check
+DEFAULT_BUDGET_MS = 780.0
+
+# One `-X importtime` line: "import time: self [us] | cumulative | imported package"
+ImportRecord = Tuple[str, int, int, int]  # (module, depth, self_us, cumulative_us)
+
+
+def budget_ms() -> float:
+    """
+    Returns the import-time budget: `IMPORT_BUDGET_MS`, or `DEFAULT_BUDGET_MS`.
+
+    Returns:
+        float: Budget in milliseconds.
+    """
+    return float(os.getenv("IMPORT_BUDGET_MS", str(DEFAULT_BUDGET_MS)))
+
+
+def measure(target: str = "main") -> List[ImportRecord]:
+    """
+    Imports a module in a fresh interpreter and parses the `-X importtime` output.
+
+    Args:
+        target (str): Module to import.
+
+    Returns:
+        list: (module, depth, self time, cumulative time) of every imported module,
+              times in microseconds.
+
+    Raises:
+        RuntimeError: If the import fails.
+    """
+    env = dict(os.environ)
+    env.setdefault("LOG_FILE", os.path.join(tempfile.gettempdir(), "jakanode_back_bench.log"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{result.stderr}")
+
+    records = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        fields = line[len("import time:") :].split("|")
+        self_us, cumulative_us, name = int(fields[0]), int(fields[1]), fields[2]
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append((name.strip(), depth, self_us, cumulative_us))
+    return records
+
+
+def total_ms(records: List[ImportRecord], target: str = "main") -> float:
+    """
+    Returns the cumulative import time of the target module.
+
+    Args:
+        records (list): Parsed `-X importtime` records.
+        target (str): The imported module.
+
+    Returns:
+        float: Import time in milliseconds.
+    """
+    return next(cumulative for name, _, _, cumulative in records if name == target) / 1000
+
+
+def by_package(records: List[ImportRecord]) -> Dict[str, float]:
+    """
+    Sums the self time of every module per top-level package.
+
+    Args:
+        records (list): Parsed `-X importtime` records.
+
+    Returns:
+        dict: Milliseconds per top-level package, slowest first.
+    """
+    totals: Dict[str, float] = {}
+    for name, _, self_us, _ in records:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0.0) + self_us / 1000
+    return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+def report(records: List[ImportRecord], top: int) -> str:
+    """
+    Formats the import time breakdown.
+
+    Args:
+        records (list): Parsed `-X importtime` records of one run.
+        top (int): Number of packages and modules to list.
+
+    Returns:
+        str: The formatted report.
+    """
+    lines = [f"{'package':<30}{'self ms':>10}", "-" * 40]
+    for package, elapsed in list(by_package(records).items())[:top]:
+        lines.append(f"{package:<30}{elapsed:>10.1f}")
+    lines += ["", f"{'module':<50}{'self ms':>10}{'cumulative ms':>15}", "-" * 75]
+    slowest = sorted(records, key=lambda record: record[2], reverse=True)[:top]
+    for name, _, self_us, cumulative_us in slowest:
+        lines.append(f"{name:<50}{self_us / 1000:>10.1f}{cumulative_us / 1000:>15.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    """
+    Reports the application import time and checks it against the budget.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: 0 if the import time is within budget, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description="Application import time report.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure.")
+    parser.add_argument("--top", type=int, default=20, help="Packages and modules to list.")
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=budget_ms(),
+        help="Maximum median import time of main.py "
+        f"(default: IMPORT_BUDGET_MS or {DEFAULT_BUDGET_MS:.0f}).",
+    )
+    args = parser.parse_args(argv)
+
+    runs = [measure() for _ in range(args.runs)]
+    totals = [total_ms(records) for records in runs]
+    median = statistics.median(totals)
+    # Report the run closest to the median, so the breakdown is representative
+    representative = runs[min(range(len(totals)), key=lambda i: abs(totals[i] - median))]
+
+    print(report(representative, args.top))
+    print()
+    print(f"import main: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f}); budget {args.budget_ms:.0f} ms")
+    if median > args.budget_ms:
+        print("FAIL: import time exceeds the budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""
+Role Hierarchy Benchmarks
+
+This module measures the role hierarchy (migration `0006`) on two shapes:
+    - deep: a chain of roles, each one inheriting from the previous one.
+    - wide: a tree where every role has `--fanout` children, `--levels` deep.
+
+Each role gets one permission of its own and a user is assigned to every
+leaf role. For each shape the suite measures:
+    - add_edge: Adding an inheritance edge (closure maintenance included),
+      while the hierarchy is built.
+    - check_closure: Checking that a leaf user has the root's permission with
+      the closure join used by `telegram_user_has_permission`.
+    - check_cte: The same check with a recursive CTE over the edges, which
+      is what the closure avoids.
+    - move_subtree: Detaching the subtree below the root and attaching it
+      again (the most expensive closure update).
+
+Usage:
+
+    python -m benchmarks.role_hierarchy
+    python -m benchmarks.role_hierarchy --depth 500 --fanout 20 --levels 3
+"""
+
+import argparse
+import random
+import sys
+from typing import Dict, List
+
+from benchmarks.db_bench import run_case
+from benchmarks.stats import format_table
+from database.db_config import close_db_connection, get_db_read_connection
+from database.fixtures import TemplateDatabase
+from database.operations.permissions_ops import create_permission
+from database.operations.role_hierarchy_ops import add_parent_role, remove_parent_role
+from database.operations.role_permissions_ops import assign_permission_to_role
+from database.operations.roles_ops import create_role
+from database.operations.user_roles_ops import assign_role_to_user
+
+CLOSURE_CHECK = """
+    SELECT 1
+    FROM user_roles ur
+    JOIN role_closure c ON c.descendant_id = ur.role_id
+    JOIN role_permissions rp ON rp.role_id = c.ancestor_id
+    WHERE ur.user_id = ? AND rp.permission_id = ?
+    LIMIT 1
+"""
+
+CTE_CHECK = """
+    WITH RECURSIVE ancestors(role_id) AS (
+        SELECT role_id FROM user_roles WHERE user_id = ?
+        UNION
+        SELECT i.parent_role_id
+        FROM role_inheritance i JOIN ancestors a ON i.role_id = a.role_id
+    )
+    SELECT 1
+    FROM ancestors a
+    JOIN role_permissions rp ON rp.role_id = a.role_id
+    WHERE rp.permission_id = ?
+    LIMIT 1
+"""
+
+
+def build_edges(shape: str, depth: int, fanout: int, levels: int) -> List[tuple]:
+    """
+    Returns the edges of a hierarchy shape, parents first.
+
+    Args:
+        shape (str): "deep" or "wide".
+        depth (int): Length of the deep chain.
+        fanout (int): Children per role of the wide tree.
+        levels (int): Levels below the root of the wide tree.
+
+    Returns:
+        list: (child index, parent index) pairs; index 0 is the root.
+    """
+    if shape == "deep":
+        return [(i, i - 1) for i in range(1, depth)]
+    edges, level, next_index = [], [0], 1
+    for _ in range(levels):
+        children = []
+        for parent in level:
+            for _ in range(fanout):
+                edges.append((next_index, parent))
+                children.append(next_index)
+                next_index += 1
+        level = children
+    return edges
+
+
+def run_shape(shape: str, edges: List[tuple], seed: int) -> Dict[str, dict]:
+    """
+    Builds a hierarchy in a new database and runs the cases on it.
+
+    Args:
+        shape (str): Name of the shape, used as the results prefix.
+        edges (list): Edges from `build_edges`.
+        seed (int): Seed of the random leaf choice.
+
+    Returns:
+        dict: Summary per "<shape>.<case>".
+    """
+    rng = random.Random(seed)
+    results = {}
+    with TemplateDatabase().database():
+        roles = [create_role(f"{shape}_role_{i}") for i in range(len(edges) + 1)]
+        permissions = []
+        for index, role_id in enumerate(roles):
+            permission_id = create_permission(f"{shape}_permission_{index}")
+            assign_permission_to_role(role_id, permission_id)
+            permissions.append(permission_id)
+
+        results[f"{shape}.add_edge"] = run_case(
+            lambda i: int(add_parent_role(roles[edges[i][0]], roles[edges[i][1]])), len(edges)
+        )
+
+        parents = {parent for _, parent in edges}
+        leaves = [index for index in range(len(roles)) if index not in parents]
+        for user_id, index in enumerate(leaves, start=1):
+            assign_role_to_user(user_id, roles[index])
+        checks = [rng.randrange(len(leaves)) + 1 for _ in range(2000)]
+
+        def check(sql):
+            def case(i):
+                connection = get_db_read_connection()
+                found = connection.execute(sql, (checks[i], permissions[0])).fetchone()
+                close_db_connection(connection)
+                return 1 if found else 0
+
+            return case
+
+        results[f"{shape}.check_closure"] = run_case(check(CLOSURE_CHECK), len(checks))
+        results[f"{shape}.check_cte"] = run_case(check(CTE_CHECK), len(checks))
+
+        child, parent = roles[edges[0][0]], roles[edges[0][1]]
+
+        def move(i):
+            if i % 2 == 0:
+                return int(remove_parent_role(child, parent))
+            return int(add_parent_role(child, parent))
+
+        results[f"{shape}.move_subtree"] = run_case(move, 20)
+    return results
+
+
+def main(argv=None) -> int:
+    """
+    Runs the role hierarchy benchmarks from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Role hierarchy benchmarks.")
+    parser.add_argument("--depth", type=int, default=200, help="Roles in the deep chain.")
+    parser.add_argument("--fanout", type=int, default=10, help="Children per role (wide).")
+    parser.add_argument("--levels", type=int, default=3, help="Levels below the root (wide).")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for shape in ("deep", "wide"):
+        edges = build_edges(shape, args.depth, args.fanout, args.levels)
+        print(f"Running {shape} ({len(edges) + 1} roles)...")
+        results.update(run_shape(shape, edges, args.seed))
+
+    print(format_table(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
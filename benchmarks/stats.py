@@ -0,0 +1,169 @@
+"""
+Benchmark Statistics and Baselines
+
+This module provides helpers shared by the benchmark suites:
+    - Summarizing a list of latency samples into throughput and percentiles.
+    - Saving and loading results as JSON baselines.
+    - Comparing results against a baseline with a regression threshold.
+
+Latencies are collected in seconds and reported in milliseconds.
+"""
+
+import json
+import math
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Dict, List
+
+# Metrics where a higher value is better; every other metric is "lower is better"
+HIGHER_IS_BETTER = {"throughput_rps", "rows_per_sec"}
+
+# Metrics compared against the baseline when looking for regressions
+COMPARED_METRICS = ("throughput_rps", "rows_per_sec", "p50_ms", "p95_ms", "p99_ms")
+
+
+def percentile(sorted_samples: List[float], pct: float) -> float:
+    """
+    Returns the nearest-rank percentile of an already sorted list.
+
+    Args:
+        sorted_samples (list): Samples sorted in ascending order.
+        pct (float): Percentile to compute (0-100).
+
+    Returns:
+        float: The requested percentile, or 0.0 if there are no samples.
+    """
+    if not sorted_samples:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """
+    Summarizes latency samples into throughput and latency percentiles.
+
+    Args:
+        latencies (list): Per-operation latencies in seconds.
+        elapsed (float): Wall-clock time of the whole run in seconds.
+
+    Returns:
+        dict: Count, throughput (operations per second) and latencies in milliseconds.
+    """
+    samples = sorted(latencies)
+    count = len(samples)
+    return {
+        "count": count,
+        "throughput_rps": count / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": (sum(samples) / count * 1000) if count else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": (samples[-1] * 1000) if count else 0.0,
+    }
+
+
+def environment_info() -> Dict[str, str]:
+    """
+    Describes the environment the benchmark ran in, stored alongside baselines.
+
+    Returns:
+        dict: Python version, implementation, platform and timestamp.
+    """
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": str(os.cpu_count()),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def save_baseline(path: str, results: Dict[str, dict], config: dict):
+    """
+    Saves benchmark results as a JSON baseline.
+
+    Args:
+        path (str): Destination file.
+        results (dict): Results per scenario, as returned by `summarize`.
+        config (dict): Parameters the benchmark was run with.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    baseline = {"environment": environment_info(), "config": config, "results": results}
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+
+
+def load_baseline(path: str) -> Dict[str, dict]:
+    """
+    Loads the results of a JSON baseline.
+
+    Args:
+        path (str): Baseline file.
+
+    Returns:
+        dict: Results per scenario.
+    """
+    with open(path, encoding="utf-8") as baseline_file:
+        return json.load(baseline_file)["results"]
+
+
+def compare(
+    results: Dict[str, dict], baseline: Dict[str, dict], threshold: float
+) -> List[str]:
+    """
+    Compares results against a baseline.
+
+    A metric regresses when it is worse than the baseline by more than
+    `threshold` (a fraction, e.g. 0.2 for 20%). Scenarios or metrics missing
+    from either side are ignored.
+
+    Args:
+        results (dict): Current results per scenario.
+        baseline (dict): Baseline results per scenario.
+        threshold (float): Allowed relative regression.
+
+    Returns:
+        list: Human readable descriptions of every regression found.
+    """
+    regressions = []
+    for scenario, current in results.items():
+        previous = baseline.get(scenario)
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in current or not previous.get(metric):
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric]
+            if metric in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append(
+                    f"{scenario}.{metric}: {previous[metric]:.3f} -> {current[metric]:.3f} "
+                    f"({change:+.1%} worse, threshold {threshold:.0%})"
+                )
+    return regressions
+
+
+def format_table(results: Dict[str, dict]) -> str:
+    """
+    Formats results as a plain text table.
+
+    Args:
+        results (dict): Results per scenario.
+
+    Returns:
+        str: The formatted table.
+    """
+    header = f"{'scenario':<40}{'count':>8}{'ops/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    lines = [header, "-" * len(header)]
+    for scenario, summary in results.items():
+        lines.append(
+            f"{scenario:<40}{summary['count']:>8}{summary['throughput_rps']:>12.1f}"
+            f"{summary['p50_ms']:>10.3f}{summary['p95_ms']:>10.3f}{summary['p99_ms']:>10.3f}"
+        )
+    return "\n".join(lines)
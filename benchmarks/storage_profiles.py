@@ -0,0 +1,128 @@
+"""
+Storage Profile Comparison
+
+This module runs the database micro-benchmarks (`benchmarks.db_bench`) once
+per storage profile (see `STORAGE_PROFILES` in `database/db_config.py`) and
+prints the throughput of every case side by side, so the profile set in
+`DB_STORAGE_PROFILE` can be chosen with numbers from this project's workload.
+
+Each profile runs on a fresh copy of the same dataset, rebuilt with the
+profile's page size.
+
+Usage:
+
+    python -m benchmarks.storage_profiles
+    python -m benchmarks.storage_profiles --scale medium --profile balanced --profile throughput
+"""
+
+import argparse
+import sqlite3
+import sys
+from typing import Dict
+
+from benchmarks.datagen import SCALES
+from benchmarks.db_bench import DEFAULT_DATA_DIR, run_scale
+from benchmarks.stats import format_table
+from database.db_config import STORAGE_PROFILES, set_storage_profile
+
+
+def set_page_size(path: str, page_size: int):
+    """
+    Rebuilds a database file with another page size.
+
+    Args:
+        path (str): Database file.
+        page_size (int): New page size in bytes.
+    """
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        if connection.execute("PRAGMA page_size").fetchone()[0] != page_size:
+            # The page size of a WAL database cannot change
+            connection.execute("PRAGMA journal_mode = DELETE")
+            connection.execute(f"PRAGMA page_size = {page_size}")
+            connection.execute("VACUUM")
+            connection.execute("PRAGMA journal_mode = WAL")
+    finally:
+        connection.close()
+
+
+def run_profile(profile: str, scale: str, data_dir: str, seed: int) -> Dict[str, dict]:
+    """
+    Runs the database benchmarks with a storage profile.
+
+    Args:
+        profile (str): Name of the storage profile.
+        scale (str): Name of the dataset scale.
+        data_dir (str): Directory holding the generated datasets.
+        seed (int): Seed of the synthetic data.
+
+    Returns:
+        dict: Summary per "<scale>.<case>".
+    """
+    set_storage_profile(profile)
+    try:
+        return run_scale(
+            scale,
+            data_dir,
+            seed,
+            [],
+            prepare=lambda path: set_page_size(path, STORAGE_PROFILES[profile]["page_size"]),
+        )
+    finally:
+        set_storage_profile(None)
+
+
+def comparison_table(results: Dict[str, Dict[str, dict]]) -> str:
+    """
+    Formats the throughput of every case per profile.
+
+    Args:
+        results (dict): Results per profile, then per case.
+
+    Returns:
+        str: The formatted table, in ops/s.
+    """
+    profiles = list(results)
+    cases = list(next(iter(results.values())))
+    header = f"{'case (ops/s)':<40}" + "".join(f"{profile:>14}" for profile in profiles)
+    lines = [header, "-" * len(header)]
+    for case in cases:
+        lines.append(
+            f"{case:<40}"
+            + "".join(f"{results[profile][case]['throughput_rps']:>14.1f}" for profile in profiles)
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    """
+    Compares the storage profiles from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Storage profile comparison.")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="Dataset scale.")
+    parser.add_argument(
+        "--profile", action="append", choices=STORAGE_PROFILES, help="Profile (repeatable)."
+    )
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Dataset directory.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    results = {}
+    for profile in args.profile or list(STORAGE_PROFILES):
+        print(f"Running profile {profile}...")
+        results[profile] = run_profile(profile, args.scale, args.data_dir, args.seed)
+        print(format_table(results[profile]))
+        print()
+
+    print(comparison_table(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,7 +4,8 @@ This module contains utility functions and operations for interacting with the S
 including connection handling, transaction management, and user-related queries.
 
 Functions include:
-- Getting a connection to the database
+- Getting a connection to the database (pooled read-only connections and the
+  process's dedicated writer connection)
 - Committing and rolling back transactions
 - Closing the database connection
 - Performing various user-related operations like creating, fetching, updating, and deleting users
@@ -14,11 +15,15 @@ from .db_config import (
     close_db_connection,
     commit_db_connection,
     get_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
     rollback_db_connection,
 )
 
 __all__ = [
     "get_db_connection",
+    "get_db_read_connection",
+    "get_db_write_connection",
     "close_db_connection",
     "commit_db_connection",
     "rollback_db_connection",
@@ -0,0 +1,384 @@
+"""
+Audit Log Archive
+
+This module keeps the `audit_logs` table small by moving old rows into
+compressed, append-only segment files, and reads them back without restoring
+them into SQLite.
+
+Archiving:
+- Rows older than `AUDIT_RETENTION_DAYS` are read in chunks of
+  `AUDIT_ARCHIVE_CHUNK_ROWS` (keyset pagination on `id`).
+- Each chunk is written as a zlib-compressed block of NDJSON rows appended to
+  the run's segment file, the segment index is updated, and only then the
+  chunk is deleted from SQLite in a short transaction.
+- If the process dies between writing a block and deleting its rows, the next
+  run deletes them before archiving anything else, so no row is archived twice.
+
+Segment index (`<segment>.idx.json`), one entry per block:
+- offset/length of the compressed block and its row count.
+- id range, created_at range and user_id range of its rows.
+- A small bloom filter of its user IDs, so lookups by user skip most blocks.
+
+Reading:
+- `ArchiveReader` memory-maps the segment files and only decompresses the
+  blocks whose index entry matches the user and time range of the query.
+
+Usage:
+
+    python -m database.audit_archive archive --days 90
+    python -m database.audit_archive query --user-id 42 --start "2024-01-01" --end "2024-02-01"
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import mmap
+import os
+import sys
+import time
+import uuid
+import zlib
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional
+
+from app.core.settings import (
+    AUDIT_ARCHIVE_CHUNK_ROWS,
+    AUDIT_ARCHIVE_DIR,
+    AUDIT_RETENTION_DAYS,
+)
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+
+COLUMNS = ("id", "user_id", "action", "details", "created_at")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"  # Format of SQLite's CURRENT_TIMESTAMP
+
+BLOOM_BITS = 4096  # Size of the per-block user ID bloom filter
+BLOOM_HASHES = 3
+
+
+@dataclass
+class BlockIndex:
+    """
+    Index entry of a compressed block in a segment file.
+
+    Attributes:
+        offset (int): Position of the block in the segment file.
+        length (int): Compressed size of the block.
+        rows (int): Number of rows in the block.
+        cutoff (str): created_at cutoff of the run that archived the block.
+        min_id (int): Lowest row id.
+        max_id (int): Highest row id.
+        min_created_at (str): Oldest created_at.
+        max_created_at (str): Newest created_at.
+        min_user_id (int): Lowest user_id, or None if every row has a NULL user_id.
+        max_user_id (int): Highest user_id, or None.
+        has_null_user (bool): Whether any row has a NULL user_id.
+        user_bloom (str): Base64 bloom filter of the user IDs.
+    """
+
+    offset: int
+    length: int
+    rows: int
+    cutoff: str
+    min_id: int
+    max_id: int
+    min_created_at: str
+    max_created_at: str
+    min_user_id: Optional[int]
+    max_user_id: Optional[int]
+    has_null_user: bool
+    user_bloom: str
+
+    def may_contain_user(self, user_id: int) -> bool:
+        """
+        Checks whether the block may contain rows of a user (false positives possible).
+
+        Args:
+            user_id (int): The user ID.
+
+        Returns:
+            bool: False if the block surely has no rows of the user.
+        """
+        if self.min_user_id is None or not self.min_user_id <= user_id <= self.max_user_id:
+            return False
+        bloom = base64.b64decode(self.user_bloom)
+        return all(bloom[bit // 8] & (1 << (bit % 8)) for bit in _bloom_bits(user_id))
+
+    def overlaps(self, start: Optional[str], end: Optional[str]) -> bool:
+        """
+        Checks whether the block's created_at range overlaps [start, end).
+
+        Args:
+            start (str, optional): Inclusive lower bound.
+            end (str, optional): Exclusive upper bound.
+
+        Returns:
+            bool: True if some rows of the block may be in the range.
+        """
+        return (start is None or self.max_created_at >= start) and (
+            end is None or self.min_created_at < end
+        )
+
+
+def _bloom_bits(user_id: int) -> List[int]:
+    digest = hashlib.blake2b(str(user_id).encode(), digest_size=4 * BLOOM_HASHES).digest()
+    return [
+        int.from_bytes(digest[i * 4 : (i + 1) * 4], "little") % BLOOM_BITS
+        for i in range(BLOOM_HASHES)
+    ]
+
+
+def _build_block_index(rows: List[tuple], offset: int, length: int, cutoff: str) -> BlockIndex:
+    bloom = bytearray(BLOOM_BITS // 8)
+    user_ids = [row[1] for row in rows if row[1] is not None]
+    for user_id in user_ids:
+        for bit in _bloom_bits(user_id):
+            bloom[bit // 8] |= 1 << (bit % 8)
+    created = [row[4] for row in rows]
+    return BlockIndex(
+        offset=offset,
+        length=length,
+        rows=len(rows),
+        cutoff=cutoff,
+        min_id=min(row[0] for row in rows),
+        max_id=max(row[0] for row in rows),
+        min_created_at=min(created),
+        max_created_at=max(created),
+        min_user_id=min(user_ids) if user_ids else None,
+        max_user_id=max(user_ids) if user_ids else None,
+        has_null_user=len(user_ids) < len(rows),
+        user_bloom=base64.b64encode(bytes(bloom)).decode("ascii"),
+    )
+
+
+def normalize_timestamp(value) -> Optional[str]:
+    """
+    Converts a datetime or ISO date string to the created_at format (UTC).
+
+    Args:
+        value (datetime or str, optional): The timestamp; naive values are taken as UTC,
+            aware ones are converted to UTC.
+
+    Returns:
+        str: The timestamp as "YYYY-MM-DD HH:MM:SS", or None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def _index_path(segment_path: str) -> str:
+    return f"{segment_path}.idx.json"
+
+
+def _load_index(segment_path: str) -> List[BlockIndex]:
+    try:
+        with open(_index_path(segment_path), encoding="utf-8") as index_file:
+            return [BlockIndex(**block) for block in json.load(index_file)]
+    except FileNotFoundError:
+        return []
+
+
+def _write_index(segment_path: str, blocks: List[BlockIndex]):
+    tmp_path = f"{_index_path(segment_path)}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as index_file:
+        json.dump([asdict(block) for block in blocks], index_file, separators=(",", ":"))
+        index_file.flush()
+        os.fsync(index_file.fileno())
+    os.replace(tmp_path, _index_path(segment_path))
+
+
+def list_segments(directory: str = AUDIT_ARCHIVE_DIR) -> List[str]:
+    """
+    Returns the segment files of an archive directory, oldest first.
+
+    Args:
+        directory (str): Archive directory.
+
+    Returns:
+        list: Paths of the segment files.
+    """
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".seg")
+    )
+
+
+def _delete_archived(cursor, block: BlockIndex) -> int:
+    cursor.execute(
+        "DELETE FROM audit_logs WHERE id BETWEEN ? AND ? AND created_at < ?",
+        (block.min_id, block.max_id, block.cutoff),
+    )
+    return cursor.rowcount
+
+
+def archive_audit_logs(
+    retention_days: int = AUDIT_RETENTION_DAYS,
+    directory: str = AUDIT_ARCHIVE_DIR,
+    chunk_rows: int = AUDIT_ARCHIVE_CHUNK_ROWS,
+) -> int:
+    """
+    Moves audit log rows older than the retention period into a new segment file.
+
+    Args:
+        retention_days (int): Rows older than this many days are archived.
+        directory (str): Archive directory.
+        chunk_rows (int): Rows per compressed block (and per delete transaction).
+
+    Returns:
+        int: The number of archived rows.
+    """
+    os.makedirs(directory, exist_ok=True)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime(
+        TIMESTAMP_FORMAT
+    )
+    connection = get_db_connection()
+    cursor = connection.cursor()
+
+    # Finish the last block of every segment, in case a run died before deleting it
+    for segment_path in list_segments(directory):
+        blocks = _load_index(segment_path)
+        if blocks and _delete_archived(cursor, blocks[-1]):
+            commit_db_connection(connection)
+
+    segment_path = os.path.join(
+        directory, f"audit-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}.seg"
+    )
+    blocks: List[BlockIndex] = []
+    archived = 0
+    last_id = 0
+    created = False
+    try:
+        with open(segment_path, "xb") as segment_file:
+            created = True
+            while True:
+                cursor.execute(
+                    f"SELECT {', '.join(COLUMNS)} FROM audit_logs "
+                    "WHERE id > ? AND created_at < ? ORDER BY id LIMIT ?",
+                    (last_id, cutoff, chunk_rows),
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                payload = "".join(
+                    json.dumps(dict(zip(COLUMNS, row)), separators=(",", ":")) + "\n"
+                    for row in rows
+                ).encode("utf-8")
+                block = zlib.compress(payload, 6)
+                offset = segment_file.tell()
+                segment_file.write(block)
+                segment_file.flush()
+                os.fsync(segment_file.fileno())
+
+                blocks.append(_build_block_index(rows, offset, len(block), cutoff))
+                _write_index(segment_path, blocks)
+
+                _delete_archived(cursor, blocks[-1])
+                commit_db_connection(connection)
+                archived += len(rows)
+                last_id = rows[-1][0]
+    finally:
+        close_db_connection(connection)
+        if created and not blocks:
+            os.remove(segment_path)  # Nothing was archived in this run
+    return archived
+
+
+class ArchiveReader:
+    """
+    Queries archived audit logs directly from the segment files.
+
+    Attributes:
+        directory (str): Archive directory.
+    """
+
+    def __init__(self, directory: str = AUDIT_ARCHIVE_DIR):
+        self.directory = directory
+
+    def query(
+        self,
+        user_id: Optional[int] = None,
+        start=None,
+        end=None,
+    ) -> Iterator[dict]:
+        """
+        Yields archived rows matching a user and a created_at range.
+
+        Args:
+            user_id (int, optional): Only rows of this user.
+            start (datetime or str, optional): Inclusive lower bound of created_at.
+            end (datetime or str, optional): Exclusive upper bound of created_at.
+
+        Yields:
+            dict: Archived audit log rows, in archive order.
+        """
+        start, end = normalize_timestamp(start), normalize_timestamp(end)
+        for segment_path in list_segments(self.directory):
+            blocks = [
+                block
+                for block in _load_index(segment_path)
+                if block.overlaps(start, end)
+                and (user_id is None or block.may_contain_user(user_id))
+            ]
+            if not blocks:
+                continue
+            with open(segment_path, "rb") as segment_file, mmap.mmap(
+                segment_file.fileno(), 0, access=mmap.ACCESS_READ
+            ) as segment:
+                for block in blocks:
+                    data = zlib.decompress(segment[block.offset : block.offset + block.length])
+                    for line in data.splitlines():
+                        row = json.loads(line)
+                        if user_id is not None and row["user_id"] != user_id:
+                            continue
+                        if start is not None and row["created_at"] < start:
+                            continue
+                        if end is not None and row["created_at"] >= end:
+                            continue
+                        yield row
+
+
+def main(argv=None) -> int:
+    """
+    Archives or queries audit logs from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Audit log archive.")
+    parser.add_argument("--dir", default=AUDIT_ARCHIVE_DIR, help="Archive directory.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive = commands.add_parser("archive", help="Archive old audit logs.")
+    archive.add_argument("--days", type=int, default=AUDIT_RETENTION_DAYS)
+    archive.add_argument("--chunk-rows", type=int, default=AUDIT_ARCHIVE_CHUNK_ROWS)
+    query = commands.add_parser("query", help="Query archived audit logs as NDJSON.")
+    query.add_argument("--user-id", type=int)
+    query.add_argument("--start", help="Inclusive ISO date/time.")
+    query.add_argument("--end", help="Exclusive ISO date/time.")
+    args = parser.parse_args(argv)
+
+    if args.command == "archive":
+        start = time.perf_counter()
+        archived = archive_audit_logs(args.days, args.dir, args.chunk_rows)
+        print(f"Archived {archived} audit log rows in {time.perf_counter() - start:.1f}s.")
+    else:
+        for row in ArchiveReader(args.dir).query(args.user_id, args.start, args.end):
+            print(json.dumps(row))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
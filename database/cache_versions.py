@@ -0,0 +1,245 @@
+"""
+Cache Versions
+
+This module keeps the in-process caches of every worker coherent with the
+database, whoever changes it (this worker, another worker, a migration, an
+import), and only invalidates the caches of the data that changed.
+
+How it works:
+- The `cache_versions` table holds a version per namespace (e.g. "roles",
+  "permissions"), incremented by triggers in the same transaction as the
+  change (see migration 0009).
+- `cache_versions.check()` polls `PRAGMA data_version` on a dedicated
+  read-only connection: it only changes when some connection committed, so
+  the check costs no query while the database does not change. When it
+  changes, the versions are read and the namespaces whose version changed
+  are reported to their listeners.
+- Checks are throttled to one every `CACHE_VERSIONS_CHECK_INTERVAL` seconds
+  (0.5 by default; 0: every cached read checks, so a cache never returns
+  data older than the last commit). Between two checks, reads use the last
+  versions without taking any lock. Writes of this process call `expire()`
+  so the next read checks anyway and sees them.
+- Without the table (database not migrated), versions are None and the
+  caches are bypassed.
+
+Usage:
+
+    _roles = VersionedCache("roles")
+
+    def get_role_by_id(role_id):
+        return _roles.get(role_id, lambda: query_role(role_id))
+
+    cache_versions.register("permissions", lambda version: ...)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Hashable, List, Optional
+
+from app.core.logging import logger
+from app.core.metrics import CACHE_INVALIDATIONS
+from app.core.settings import CACHE_VERSIONS_CHECK_INTERVAL
+from database.db_config import close_db_connection, get_db_path, open_db_read_connection
+
+Listener = Callable[[int], None]
+
+
+class CacheVersions:
+    """
+    Versions of the cache namespaces, as last read from the database.
+
+    Attributes:
+        check_interval (float): Minimum seconds between two checks of the database.
+    """
+
+    def __init__(self, check_interval: float = CACHE_VERSIONS_CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._connection = None
+        self._owner = None  # (pid, database path) the connection belongs to
+        self._data_version: Optional[int] = None
+        self._versions: Dict[str, int] = {}
+        self._listeners: Dict[str, List[Listener]] = {}
+        self._checked_at = float("-inf")
+        self._versions_lock = threading.Lock()
+
+    def register(self, namespace: str, listener: Listener):
+        """
+        Calls a function with the new version every time a namespace changes.
+
+        Listeners run in the thread of the check that noticed the change;
+        they must be quick (e.g. clear a cache or wake a worker).
+
+        Args:
+            namespace (str): Namespace, e.g. "permissions".
+            listener (callable): Called with the new version.
+        """
+        self._listeners.setdefault(namespace, []).append(listener)
+
+    def version(self, namespace: str) -> Optional[int]:
+        """
+        Returns the current version of a namespace, checking the database first
+        if the check interval elapsed.
+
+        Args:
+            namespace (str): Namespace, e.g. "roles".
+
+        Returns:
+            int: The version, or None if the namespace is not versioned.
+        """
+        self.check()
+        return self._versions.get(namespace)
+
+    def check(self) -> Dict[str, int]:
+        """
+        Reads the versions if the database changed since the last check.
+
+        Returns:
+            dict: New version by changed namespace (empty if nothing changed
+                or the last check is too recent).
+        """
+        now = time.monotonic()
+        # Lock-free fast path: the versions were checked recently enough
+        if now - self._checked_at < self.check_interval and self._owner == self._current_owner():
+            return {}
+        with self._versions_lock:
+            if now < self._checked_at and self._owner == self._current_owner():
+                return {}  # Another thread checked while this one waited for the lock
+            self._checked_at = time.monotonic()
+            try:
+                changed = self._poll()
+            except sqlite3.Error:
+                logger.exception("Could not check the cache versions.")
+                self._close()
+                self._versions = {}  # Caches are bypassed until the next successful check
+                return {}
+
+        for namespace, version in changed.items():
+            CACHE_INVALIDATIONS.inc(namespace)
+            for listener in self._listeners.get(namespace, ()):
+                try:
+                    listener(version)
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Cache listener of %s failed.", namespace)
+        return changed
+
+    def expire(self):
+        """
+        Makes the next access check the database, whatever the check interval
+        (call it after committing a change this process reads back).
+        """
+        self._checked_at = float("-inf")
+
+    def reset(self):
+        """
+        Closes the connection and forgets the versions.
+        """
+        with self._versions_lock:
+            self._close()
+            self._versions = {}
+            self._checked_at = float("-inf")
+
+    @staticmethod
+    def _current_owner():
+        return os.getpid(), get_db_path()
+
+    def _poll(self) -> Dict[str, int]:
+        """Reads the versions if `data_version` changed; called with the lock held."""
+        owner = self._current_owner()
+        if self._connection is None or self._owner != owner:
+            # Never share the connection with a forked parent, nor keep another database's
+            self._close()
+            self._connection = open_db_read_connection()
+            self._owner = owner
+
+        data_version = self._connection.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return {}
+        self._data_version = data_version
+
+        try:
+            versions = dict(
+                self._connection.execute("SELECT namespace, version FROM cache_versions")
+            )
+        except sqlite3.OperationalError:  # Not migrated yet
+            versions = {}
+        changed = {
+            namespace: version
+            for namespace, version in versions.items()
+            if self._versions.get(namespace) != version
+        }
+        self._versions = versions
+        return changed
+
+    def _close(self):
+        if self._connection is not None and self._owner[0] == os.getpid():
+            close_db_connection(self._connection)
+        self._connection = None
+        self._owner = None
+        self._data_version = None
+
+
+class VersionedCache:
+    """
+    Values read from the database, dropped when their namespace's version changes.
+
+    Cached values are shared by every caller: cache immutable values (rows,
+    tuples) and build the mutable results from them.
+
+    Attributes:
+        namespace (str): Namespace of the cached data.
+        max_entries (int): Entries kept; the cache is emptied when it is full.
+    """
+
+    def __init__(
+        self, namespace: str, max_entries: int = 1024, versions: Optional[CacheVersions] = None
+    ):
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self._versions = versions or cache_versions
+        self._entries: Dict[Hashable, object] = {}
+        self._version: Optional[int] = None
+        self._cache_lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], object]):
+        """
+        Returns the cached value of a key, loading it on a miss.
+
+        Args:
+            key: Cache key.
+            load (callable): Reads the value from the database.
+
+        Returns:
+            The value.
+        """
+        version = self._versions.version(self.namespace)
+        if version is None:
+            return load()
+        with self._cache_lock:
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            elif key in self._entries:
+                return self._entries[key]
+
+        # Read after the version: the value is at least as new as the version
+        value = load()
+        with self._cache_lock:
+            if self._version == version:
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+                self._entries[key] = value
+        return value
+
+    def clear(self):
+        """
+        Drops every cached value.
+        """
+        with self._cache_lock:
+            self._entries.clear()
+            self._version = None
+
+
+# Process-wide cache versions, shared by every cache
+cache_versions = CacheVersions()
@@ -1,11 +1,87 @@
 """
 Database configuration
+
+Every connection is configured with the PRAGMAs of a storage profile,
+selected with `DB_STORAGE_PROFILE`:
+    - durable: fsync on every commit, no memory-mapped I/O, small cache.
+    - balanced (default): WAL with synchronous=NORMAL (a commit can be lost on
+      power failure, never on an application crash), 256 MiB mmap, 64 MiB cache.
+    - throughput: like balanced with a bigger mmap and cache, and less frequent,
+      larger checkpoints.
+
+Connections:
+    - get_db_read_connection(): pooled read-only connection (`mode=ro` and
+      `query_only`), for the operations that only read.
+    - get_db_write_connection(): the process's dedicated writer connection.
+      Writes are serialized per process, so operations must always release it
+      with `close_db_connection` (in a `finally` block).
+    - get_db_connection(): a standalone read-write connection, for tools,
+      migrations and maintenance.
+    - open_db_read_connection(): a standalone read-only connection, for
+      long-lived readers that must keep their own connection (e.g. to poll
+      `PRAGMA data_version`).
+
+Read-only connections cannot create the WAL index (`-shm` file), so each
+process keeps one idle read-write connection open (the WAL index anchor).
+Opening readers never waits for the writer: reads are unaffected by long
+write transactions.
 """
 
 import os
 import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.core.settings import (
+    DB_NAME,
+    DB_PATH,
+    DB_READ_POOL_SIZE,
+    DB_STORAGE_PROFILE,
+    DB_WRITER_TIMEOUT,
+)
+from database.instrumentation import InstrumentedConnection
+from database.pool import ConnectionPool, PooledConnection, SharedWriter
 
-from app.core.settings import DB_NAME, DB_PATH
+MIB = 1024 * 1024
+
+# PRAGMAs of each storage profile. `cache_size` is in bytes (passed to SQLite as
+# negative KiB), `wal_autocheckpoint` in pages and `page_size` only applies to
+# new databases.
+STORAGE_PROFILES = {
+    "durable": {
+        "page_size": 4096,
+        "synchronous": "FULL",
+        "cache_size": 16 * MIB,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "wal_autocheckpoint": 1000,
+        "journal_size_limit": 64 * MIB,
+    },
+    "balanced": {
+        "page_size": 4096,
+        "synchronous": "NORMAL",
+        "cache_size": 64 * MIB,
+        "mmap_size": 256 * MIB,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 1000,
+        "journal_size_limit": 64 * MIB,
+    },
+    "throughput": {
+        "page_size": 8192,
+        "synchronous": "NORMAL",
+        "cache_size": 256 * MIB,
+        "mmap_size": 1024 * MIB,
+        "temp_store": "MEMORY",
+        "wal_autocheckpoint": 10000,
+        "journal_size_limit": 256 * MIB,
+    },
+}
+
+# Database file overriding DB_PATH/DB_NAME (used by tools and benchmarks)
+_db_path_override = None  # pylint: disable=invalid-name
+# Storage profile overriding DB_STORAGE_PROFILE (used by benchmarks)
+_storage_profile_override = None  # pylint: disable=invalid-name
 
 
 def get_db_path():
@@ -15,24 +91,111 @@ def get_db_path():
     Returns:
         str: The full file path to the database.
     """
+    if _db_path_override:
+        return _db_path_override
     return os.path.join(DB_PATH, DB_NAME)
 
 
+def set_db_path(path):
+    """
+    Overrides the database file used by every new connection.
+
+    Args:
+        path (str): Path of the database file, or None to go back to DB_PATH/DB_NAME.
+    """
+    global _db_path_override  # pylint: disable=global-statement,invalid-name
+    _db_path_override = path
+    reset_db_pools()
+
+
+@contextmanager
+def use_db_path(path):
+    """
+    Uses another database file for every new connection within a `with` block.
+
+    Args:
+        path (str): Path of the database file.
+
+    Yields:
+        str: The path.
+    """
+    previous = _db_path_override
+    set_db_path(path)
+    try:
+        yield path
+    finally:
+        set_db_path(previous)
+
+
+def get_storage_profile():
+    """
+    Returns the name and PRAGMAs of the storage profile in use.
+
+    Returns:
+        tuple: (name, PRAGMA values).
+
+    Raises:
+        ValueError: If the configured profile does not exist.
+    """
+    name = _storage_profile_override or DB_STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        raise ValueError(
+            f"Unknown storage profile {name!r}; use one of {', '.join(STORAGE_PROFILES)}"
+        )
+    return name, STORAGE_PROFILES[name]
+
+
+def set_storage_profile(name):
+    """
+    Overrides the storage profile used by every new connection.
+
+    Args:
+        name (str): Name of the profile, or None to go back to DB_STORAGE_PROFILE.
+
+    Raises:
+        ValueError: If the profile does not exist.
+    """
+    global _storage_profile_override  # pylint: disable=global-statement,invalid-name
+    if name is not None and name not in STORAGE_PROFILES:
+        raise ValueError(
+            f"Unknown storage profile {name!r}; use one of {', '.join(STORAGE_PROFILES)}"
+        )
+    _storage_profile_override = name
+    reset_db_pools()
+
+
 def init_db():
     """
     Initializes the database settings (e.g., enabling WAL mode).
-    This should be run once at the start of the application.
+    This should be run once at the start of the application (see `app/core/lifespan.py`).
     """
     conn = get_db_connection()
-    conn.execute("PRAGMA journal_mode = WAL;")  # Allows concurrent writes
+    conn.close()
+
+
+def apply_storage_profile(conn, read_only=False):
+    """
+    Applies the PRAGMAs of the storage profile to a connection.
+
+    Args:
+        conn (sqlite3.Connection): The connection to configure.
+        read_only (bool): Skip the PRAGMAs that change the database file.
+    """
+    _, profile = get_storage_profile()
+    if not read_only:
+        conn.execute(f"PRAGMA page_size = {profile['page_size']};")  # New databases only
+        conn.execute("PRAGMA journal_mode = WAL;")  # Allows concurrent writes
     conn.execute(
         "PRAGMA busy_timeout = 5000;"
     )  # Waits up to 5 seconds in case of a lock
-    conn.execute("PRAGMA synchronous = NORMAL;")  # Better performance on writes
-    conn.execute("PRAGMA cache_size = 10000;")  # Increases cache to reduce disk access
-    conn.execute("PRAGMA wal_autocheckpoint = 1000;")  # More frequent checkpoints
+    conn.execute(f"PRAGMA synchronous = {profile['synchronous']};")
+    conn.execute(f"PRAGMA cache_size = {-(profile['cache_size'] // 1024)};")  # In KiB
+    conn.execute(f"PRAGMA mmap_size = {profile['mmap_size']};")
+    conn.execute(f"PRAGMA temp_store = {profile['temp_store']};")
+    if not read_only:
+        conn.execute(f"PRAGMA wal_autocheckpoint = {profile['wal_autocheckpoint']};")
+        conn.execute(f"PRAGMA journal_size_limit = {profile['journal_size_limit']};")
     conn.commit()
-    conn.close()
 
 
 def get_db_connection():
@@ -42,18 +205,144 @@ def get_db_connection():
     Returns:
         sqlite3.Connection: A connection object to interact with the SQLite database.
     """
-    conn = sqlite3.connect(get_db_path(), timeout=10)
-    conn.execute("PRAGMA journal_mode = WAL;")  # Allows concurrent writes
-    conn.execute(
-        "PRAGMA busy_timeout = 5000;"
-    )  # Waits up to 5 seconds in case of a lock
-    conn.execute("PRAGMA synchronous = NORMAL;")  # Better performance on writes
-    conn.execute("PRAGMA cache_size = 10000;")  # Increases cache to reduce disk access
-    conn.execute("PRAGMA wal_autocheckpoint = 1000;")  # More frequent checkpoints
-    conn.commit()
+    conn = sqlite3.connect(get_db_path(), timeout=10, factory=InstrumentedConnection)
+    apply_storage_profile(conn)
+    return conn
+
+
+def _connect_writer():
+    conn = sqlite3.connect(
+        get_db_path(), timeout=10, factory=PooledConnection, check_same_thread=False
+    )
+    apply_storage_profile(conn)
     return conn
 
 
+# Idle read-write connection keeping the WAL index of the process's database open
+_wal_anchor = None  # pylint: disable=invalid-name
+_wal_anchor_key = None  # pylint: disable=invalid-name
+_wal_anchor_lock = threading.Lock()
+
+
+def _ensure_wal_index():
+    """
+    Opens the WAL index anchor of this process and database if needed.
+
+    The anchor has its own lock, never held during a write, so opening a
+    reader does not wait for the writer.
+    """
+    global _wal_anchor, _wal_anchor_key  # pylint: disable=global-statement,invalid-name
+    key = (os.getpid(), get_db_path())
+    if _wal_anchor_key == key:
+        return
+    with _wal_anchor_lock:
+        if _wal_anchor_key == key:
+            return
+        if _wal_anchor is not None and _wal_anchor_key[0] == key[0]:
+            _wal_anchor.close()  # Never close a forked parent's connection
+        _wal_anchor = sqlite3.connect(key[1], timeout=10, check_same_thread=False)
+        # A read creates the WAL index; it does not wait for write transactions
+        _wal_anchor.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        _wal_anchor_key = key
+
+
+def _close_wal_index():
+    global _wal_anchor, _wal_anchor_key  # pylint: disable=global-statement,invalid-name
+    with _wal_anchor_lock:
+        if _wal_anchor is not None and _wal_anchor_key[0] == os.getpid():
+            _wal_anchor.close()
+        _wal_anchor, _wal_anchor_key = None, None
+
+
+def _connect_reader(factory=PooledConnection):
+    # A read-only connection cannot create the WAL index: make sure the anchor has
+    _ensure_wal_index()
+    conn = sqlite3.connect(
+        f"{Path(get_db_path()).resolve().as_uri()}?mode=ro",
+        uri=True,
+        timeout=10,
+        factory=factory,
+        check_same_thread=False,
+    )
+    apply_storage_profile(conn, read_only=True)
+    conn.execute("PRAGMA query_only = ON;")
+    return conn
+
+
+_writer = SharedWriter(_connect_writer, DB_WRITER_TIMEOUT)
+_read_pool = ConnectionPool(_connect_reader, DB_READ_POOL_SIZE)
+
+
+def get_db_read_connection():
+    """
+    Returns a read-only connection from the pool.
+
+    Closing it with `close_db_connection` gives it back to the pool.
+
+    Returns:
+        sqlite3.Connection: A read-only connection.
+    """
+    return _read_pool.acquire()
+
+
+def open_db_read_connection():
+    """
+    Opens a read-only connection that does not belong to the pool.
+
+    Its statements are not instrumented (no metrics, no tracing), which keeps
+    frequent polling cheap. Closing it with `close_db_connection` really closes it.
+
+    Returns:
+        sqlite3.Connection: A read-only connection.
+    """
+    return _connect_reader(sqlite3.Connection)
+
+
+def get_db_write_connection():
+    """
+    Waits for and returns the process's writer connection.
+
+    The same thread gets the same connection back if it already holds it.
+    Closing it with `close_db_connection` releases it (rolling back anything
+    left uncommitted by the outermost user).
+
+    Returns:
+        sqlite3.Connection: The writer connection.
+
+    Raises:
+        TimeoutError: If the writer is busy for more than `DB_WRITER_TIMEOUT` seconds.
+    """
+    return _writer.acquire()
+
+
+def prewarm_db_pools(read_connections):
+    """
+    Opens the writer connection and fills the read pool, so the first
+    requests do not pay for opening and configuring connections.
+
+    Args:
+        read_connections (int): Read-only connections to open (at most the pool size).
+
+    Returns:
+        int: Number of read-only connections opened.
+    """
+    _writer.ensure_open()
+    connections = [_read_pool.acquire() for _ in range(min(read_connections, _read_pool.size))]
+    for connection in connections:
+        connection.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()  # Loads the schema
+        connection.close()
+    return len(connections)
+
+
+def reset_db_pools():
+    """
+    Closes the pooled read connections, the writer connection and the WAL index anchor.
+    """
+    _read_pool.reset()
+    _writer.reset()
+    _close_wal_index()
+
+
 def close_db_connection(connection):
     """
     Closes the provided database connection.
@@ -43,3 +43,7 @@ class IntegrityError(DatabaseError):
 
     def __init__(self, message="Integrity error"):
         super().__init__(message)
+
+
+class MigrationError(DatabaseException):
+    """Raised when migrations cannot be applied or reverted."""
@@ -26,3 +26,10 @@ class InvalidRoleNameError(ValidationException):
 
     def __init__(self, message="Role name is invalid."):
         super().__init__(message)
+
+
+class RoleHierarchyCycleError(ValidationException):
+    """Raised when a role would inherit from itself or from one of its descendants."""
+
+    def __init__(self, message="Role inheritance would create a cycle."):
+        super().__init__(message)
@@ -0,0 +1,177 @@
+"""
+Template Database Fixtures
+
+This module builds the migrated schema once, optionally seeded with data,
+and clones it into new database files in milliseconds, for tests and
+benchmarks.
+
+How it works:
+- The template is built on first use: every migration is applied to a new
+  file with the migration runner, then the optional `seeder` fills it.
+- Without `cache_dir`, the template is kept in memory and cloned with the
+  sqlite3 backup API.
+- With `cache_dir`, the template is kept as a file named after the template
+  and a hash of the migration files, so it is reused by later processes and
+  rebuilt when a migration changes. Clones are file copies.
+
+Usage:
+
+    template = TemplateDatabase()
+
+    with template.database() as path:  # A fresh, migrated database in use
+        create_role("admin")
+
+    seeded = TemplateDatabase(
+        "synthetic_10000", seeder=lambda connection: populate(connection, 10000),
+        cache_dir="/tmp/jakanode_templates",
+    )
+    seeded.clone("/tmp/work.sqlite3")
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from database.db_config import use_db_path
+from database.migrate import available_migrations, file_checksum, migrate
+
+# Receives a connection in autocommit mode to the migrated template
+Seeder = Callable[[sqlite3.Connection], object]
+
+
+def schema_hash() -> str:
+    """
+    Returns a hash of every migration file, which identifies the schema.
+
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    for name, path in available_migrations().items():
+        digest.update(f"{name}:{file_checksum(path)}\n".encode())
+    return digest.hexdigest()
+
+
+def _remove_database(path: str):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+class TemplateDatabase:
+    """
+    A migrated (and optionally seeded) database that is built once and cloned.
+
+    Attributes:
+        name (str): Name of the template, part of its cache file name.
+        seeder (Callable): Fills the template after the migrations, or None.
+        cache_dir (str): Directory of the template file, or None to keep it in memory.
+    """
+
+    def __init__(
+        self,
+        name: str = "schema",
+        seeder: Optional[Seeder] = None,
+        cache_dir: Optional[str] = None,
+    ):
+        self.name = name
+        self.seeder = seeder
+        self.cache_dir = cache_dir
+        self._memory: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> Optional[str]:
+        """
+        The template file, if the template is cached on disk.
+        """
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f"template_{self.name}_{schema_hash()[:12]}.sqlite3")
+
+    def _build(self, path: str):
+        """Applies the migrations and the seeder to a new database file."""
+        _remove_database(path)
+        with use_db_path(path):
+            migrate(log=lambda message: None)
+        connection = sqlite3.connect(path, isolation_level=None)
+        try:
+            if self.seeder is not None:
+                self.seeder(connection)
+            # A single self-contained file, safe to copy
+            connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            connection.execute("PRAGMA journal_mode = DELETE")
+        finally:
+            connection.close()
+        for suffix in (".migrate.lock", ".maintenance.lock"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+
+    def _ensure_built(self):
+        with self._lock:
+            if self.cache_dir is not None:
+                path = self.path
+                if not os.path.exists(path):
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    building = f"{path}.{os.getpid()}.building"
+                    self._build(building)
+                    os.replace(building, path)
+            elif self._memory is None:
+                with tempfile.TemporaryDirectory() as directory:
+                    built = os.path.join(directory, "template.sqlite3")
+                    self._build(built)
+                    source = sqlite3.connect(built)
+                    memory = sqlite3.connect(":memory:", check_same_thread=False)
+                    source.backup(memory)
+                    source.close()
+                self._memory = memory
+
+    def clone(self, path: str) -> str:
+        """
+        Creates a database file with the content of the template.
+
+        Args:
+            path (str): File to create; an existing database there is replaced.
+
+        Returns:
+            str: The path.
+        """
+        self._ensure_built()
+        _remove_database(path)
+        if self._memory is not None:
+            target = sqlite3.connect(path)
+            with self._lock:
+                self._memory.backup(target)
+            target.close()
+        else:
+            shutil.copyfile(self.path, path)
+        return path
+
+    @contextmanager
+    def database(self, path: Optional[str] = None):
+        """
+        Clones the template and makes it the current database within a `with` block.
+
+        Args:
+            path (str, optional): File to create; a temporary file by default,
+                removed on exit.
+
+        Yields:
+            str: Path of the database.
+        """
+        directory = None
+        if path is None:
+            directory = tempfile.mkdtemp(prefix="jakanode_db_")
+            path = os.path.join(directory, "db.sqlite3")
+        self.clone(path)
+        try:
+            with use_db_path(path):
+                yield path
+        finally:
+            if directory is not None:
+                shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,349 @@
+"""
+Database Instrumentation
+
+This module provides the `sqlite3.Connection` and `sqlite3.Cursor` subclasses
+used by every connection of the application.
+
+Metrics (always on):
+    Each executed statement is timed and reported to the Prometheus metrics
+    registry (see `app/core/metrics.py`) along with connection stats. The
+    overhead is two `perf_counter()` calls and two counter updates per statement.
+
+Statement tracing (opt-in with `DB_TRACE=True`):
+    Cursors also record, per normalized SQL statement, the number of calls,
+    total and maximum time (execution plus fetching), rows and call sites.
+    Executions slower than `DB_SLOW_QUERY_MS` are written to the slow-query
+    log (`DB_SLOW_QUERY_LOG`), and `top_statements()` returns the statements
+    with the highest total time. Statistics are kept per process.
+"""
+
+import re
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from app.core.metrics import (
+    DB_CONNECTIONS_OPEN,
+    DB_CONNECTIONS_OPENED,
+    DB_QUERIES,
+    DB_QUERY_DURATION,
+)
+from app.core.settings import DB_SLOW_QUERY_MS, DB_TRACE
+
+# Patterns used to normalize SQL: literals become "?" and whitespace is collapsed
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Files skipped when looking for the code that issued a statement
+_INTERNAL_FILES = ("database/instrumentation.py", "database/db_config.py")
+
+
+def statement_operation(sql: str) -> str:
+    """
+    Returns the operation of a SQL statement, used as the metrics label.
+
+    Args:
+        sql (str): The SQL statement.
+
+    Returns:
+        str: The first keyword in upper case (e.g. "SELECT", "PRAGMA").
+    """
+    parts = sql.split(None, 1)
+    return parts[0].upper() if parts else "EMPTY"
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Normalizes a SQL statement so executions with different values are grouped.
+
+    Args:
+        sql (str): The SQL statement.
+
+    Returns:
+        str: The statement with literals replaced by "?", placeholder lists
+             collapsed to "(?...)" and whitespace collapsed.
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip().rstrip(";")
+
+
+def call_site() -> str:
+    """
+    Returns the first caller outside the database connection layer.
+
+    Returns:
+        str: "<file>:<line> <function>" of the code that issued the statement.
+    """
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        filename = frame.f_code.co_filename.replace("\\", "/")
+        if not filename.endswith(_INTERNAL_FILES):
+            return f"{filename}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+@dataclass
+class StatementStats:
+    """
+    Aggregated statistics of a normalized SQL statement.
+
+    Attributes:
+        sql (str): The normalized statement.
+        calls (int): Number of executions.
+        total_time (float): Total execution and fetch time in seconds.
+        max_time (float): Slowest execution in seconds.
+        rows (int): Rows fetched (SELECT) or affected (INSERT/UPDATE/DELETE).
+        call_sites (dict): Number of executions per call site.
+    """
+
+    sql: str
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    rows: int = 0
+    call_sites: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class _Execution:
+    """A single execution being traced, completed as its rows are fetched."""
+
+    stats: StatementStats
+    call_site: str
+    elapsed: float
+    slow_logged: bool = False
+
+
+class StatementTracer:
+    """
+    Collects per-statement statistics and writes the slow-query log.
+
+    Attributes:
+        slow_threshold (float): Executions slower than this (in seconds) are logged.
+    """
+
+    def __init__(self, slow_threshold_ms: float):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self._stats: Dict[str, StatementStats] = {}
+        self._lock = threading.Lock()
+
+    def begin(self, sql: str, elapsed: float, rowcount: int) -> _Execution:
+        """
+        Records the execution of a statement.
+
+        Args:
+            sql (str): The executed SQL.
+            elapsed (float): Execution time in seconds.
+            rowcount (int): `cursor.rowcount` after the execution (-1 for SELECT).
+
+        Returns:
+            _Execution: The execution, to be completed with `fetched()`.
+        """
+        normalized = normalize_sql(sql)
+        site = call_site()
+        with self._lock:
+            stats = self._stats.get(normalized)
+            if stats is None:
+                stats = self._stats[normalized] = StatementStats(normalized)
+            stats.calls += 1
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.rows += max(rowcount, 0)
+            stats.call_sites[site] = stats.call_sites.get(site, 0) + 1
+        execution = _Execution(stats, site, elapsed)
+        self._check_slow(execution)
+        return execution
+
+    def fetched(self, execution: _Execution, elapsed: float, rows: int):
+        """
+        Adds fetch time and fetched rows to an execution.
+
+        Args:
+            execution (_Execution): The traced execution.
+            elapsed (float): Time spent fetching, in seconds.
+            rows (int): Number of rows fetched.
+        """
+        execution.elapsed += elapsed
+        stats = execution.stats
+        with self._lock:
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, execution.elapsed)
+            stats.rows += rows
+        self._check_slow(execution)
+
+    def _check_slow(self, execution: _Execution):
+        if execution.slow_logged or execution.elapsed < self.slow_threshold:
+            return
+        execution.slow_logged = True
+        # pylint: disable=import-outside-toplevel
+        # Imported on first use: the app logging setup opens the log files
+        from app.core.logging import slow_query_logger
+
+        slow_query_logger.warning(
+            "Slow query (%.1f ms) at %s: %s",
+            execution.elapsed * 1000,
+            execution.call_site,
+            execution.stats.sql,
+        )
+
+    def top(self, limit: int = 10, order_by: str = "total_time") -> List[dict]:
+        """
+        Returns the statements with the highest value of a statistic.
+
+        Args:
+            limit (int): Maximum number of statements.
+            order_by (str): "total_time", "calls", "max_time" or "rows".
+
+        Returns:
+            list: Statement statistics as dictionaries, highest first.
+        """
+        with self._lock:
+            stats = sorted(
+                self._stats.values(), key=lambda s: getattr(s, order_by), reverse=True
+            )[:limit]
+            return [
+                {
+                    "sql": s.sql,
+                    "calls": s.calls,
+                    "total_ms": s.total_time * 1000,
+                    "mean_ms": s.total_time / s.calls * 1000 if s.calls else 0.0,
+                    "max_ms": s.max_time * 1000,
+                    "rows": s.rows,
+                    "call_sites": dict(s.call_sites),
+                }
+                for s in stats
+            ]
+
+    def reset(self):
+        """
+        Clears every collected statistic.
+        """
+        with self._lock:
+            self._stats.clear()
+
+
+# Process-wide tracer, only created when tracing is enabled
+TRACER: Optional[StatementTracer] = StatementTracer(DB_SLOW_QUERY_MS) if DB_TRACE else None
+
+
+def top_statements(limit: int = 10, order_by: str = "total_time") -> List[dict]:
+    """
+    Returns the traced statements with the highest total time.
+
+    Args:
+        limit (int): Maximum number of statements.
+        order_by (str): "total_time", "calls", "max_time" or "rows".
+
+    Returns:
+        list: Statement statistics, or an empty list if tracing is disabled.
+    """
+    return TRACER.top(limit, order_by) if TRACER else []
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor that records the execution time of every statement.
+    """
+
+    def execute(self, sql, parameters=(), /):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _record(sql, time.perf_counter() - start)
+
+
+class TracingCursor(InstrumentedCursor):
+    """
+    Cursor that also traces statements, used only when `DB_TRACE` is enabled.
+    """
+
+    _execution: Optional[_Execution] = None
+
+    def execute(self, sql, parameters=(), /):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._execution = TRACER.begin(sql, time.perf_counter() - start, self.rowcount)
+
+    def executemany(self, sql, seq_of_parameters, /):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._execution = TRACER.begin(sql, time.perf_counter() - start, self.rowcount)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def _fetched(self, start: float, rows: int):
+        if self._execution is not None:
+            TRACER.fetched(self._execution, time.perf_counter() - start, rows)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors are instrumented and which tracks open connections.
+
+    Pass it as `factory` to `sqlite3.connect`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._closed = False
+        DB_CONNECTIONS_OPENED.inc()
+        DB_CONNECTIONS_OPEN.inc()
+
+    def cursor(self, factory=None):  # pylint: disable=arguments-differ
+        if factory is None:
+            factory = TracingCursor if TRACER else InstrumentedCursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=(), /):  # pylint: disable=arguments-differ
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters, /):  # pylint: disable=arguments-differ
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            DB_CONNECTIONS_OPEN.dec()
+        super().close()
+
+
+def _record(sql: str, elapsed: float):
+    operation = statement_operation(sql)
+    DB_QUERIES.inc(operation)
+    DB_QUERY_DURATION.observe(elapsed, operation)
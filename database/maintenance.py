@@ -0,0 +1,225 @@
+"""
+Database Maintenance
+
+This module provides the background worker that keeps the SQLite database
+healthy while the application runs. It is started and stopped by the FastAPI
+lifespan (see `app/core/lifespan.py`) and runs every `DB_MAINTENANCE_INTERVAL` seconds.
+
+Tasks:
+- WAL checkpoints: when the database has been idle since the previous run,
+  a `TRUNCATE` checkpoint copies the WAL into the database and resets the
+  WAL file. Idle means for the whole host: no statement executed by this
+  process, and no commit by any connection (`PRAGMA data_version` of a
+  long-lived connection) nor WAL growth seen from the database. When this
+  cannot be told, the database is considered busy. Under load, a `PASSIVE` checkpoint,
+  which never blocks readers or writers, runs once the WAL grows beyond
+  `DB_WAL_CHECKPOINT_BYTES`.
+- `PRAGMA optimize` every `DB_OPTIMIZE_INTERVAL` seconds (and once at start),
+  so the query planner statistics (`ANALYZE`) follow the data.
+- Incremental vacuum when idle (same definition): releases up to `DB_INCREMENTAL_VACUUM_PAGES`
+  free pages per run. Requires `auto_vacuum = INCREMENTAL` (migration 0003).
+
+With several uvicorn workers, only the worker holding the maintenance lock
+file (next to the database) runs the tasks.
+
+Metrics: WAL size (`db_wal_size_bytes`), checkpoint duration
+(`db_checkpoint_duration_seconds`) and tasks run (`db_maintenance_tasks_total`).
+"""
+
+import os
+import sqlite3
+import time
+from typing import Optional
+
+from app.core.background import PeriodicWorker
+from app.core.logging import logger
+from app.core.metrics import (
+    DB_CHECKPOINT_DURATION,
+    DB_MAINTENANCE_TASKS,
+    DB_QUERIES,
+    DB_WAL_SIZE,
+)
+from app.core.settings import (
+    DB_INCREMENTAL_VACUUM_PAGES,
+    DB_MAINTENANCE_INTERVAL,
+    DB_OPTIMIZE_INTERVAL,
+    DB_WAL_CHECKPOINT_BYTES,
+)
+from database.db_config import (
+    close_db_connection,
+    get_db_connection,
+    get_db_path,
+    open_db_read_connection,
+)
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: every process runs maintenance
+    fcntl = None  # pylint: disable=invalid-name
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def wal_size() -> int:
+    """
+    Returns the size of the database's WAL file.
+
+    Returns:
+        int: Size in bytes, 0 if there is no WAL file.
+    """
+    try:
+        return os.path.getsize(f"{get_db_path()}-wal")
+    except OSError:
+        return 0
+
+
+def checkpoint(connection, mode: str = "PASSIVE") -> tuple:
+    """
+    Runs a WAL checkpoint and records its duration.
+
+    Args:
+        connection (sqlite3.Connection): Connection to checkpoint from.
+        mode (str): "PASSIVE", "FULL", "RESTART" or "TRUNCATE".
+
+    Returns:
+        tuple: (busy, WAL frames, checkpointed frames), as returned by SQLite.
+    """
+    start = time.perf_counter()
+    result = connection.execute(f"PRAGMA wal_checkpoint({mode})").fetchone()
+    DB_CHECKPOINT_DURATION.observe(time.perf_counter() - start, mode.lower())
+    DB_MAINTENANCE_TASKS.inc(f"checkpoint_{mode.lower()}")
+    return result
+
+
+def _queries_executed() -> float:
+    return sum(DB_QUERIES.collect().values())
+
+
+class DatabaseMaintenance(PeriodicWorker):
+    """
+    Periodically checkpoints the WAL, refreshes planner statistics and vacuums.
+
+    Attributes:
+        wal_checkpoint_bytes (int): WAL size that triggers a checkpoint under load.
+        optimize_interval (float): Seconds between two `PRAGMA optimize`.
+        vacuum_pages (int): Maximum pages released per incremental vacuum.
+    """
+
+    def __init__(
+        self,
+        interval: float = DB_MAINTENANCE_INTERVAL,
+        wal_checkpoint_bytes: int = DB_WAL_CHECKPOINT_BYTES,
+        optimize_interval: float = DB_OPTIMIZE_INTERVAL,
+        vacuum_pages: int = DB_INCREMENTAL_VACUUM_PAGES,
+    ):
+        super().__init__("db-maintenance", interval)
+        self.wal_checkpoint_bytes = wal_checkpoint_bytes
+        self.optimize_interval = optimize_interval
+        self.vacuum_pages = vacuum_pages
+        self._last_optimize = 0.0
+        self._last_queries: Optional[float] = None
+        self._last_state: Optional[tuple] = None
+        self._monitor = None  # Long-lived connection: data_version only compares on one connection
+        self._lock_file = None
+
+    def stop(self, timeout: Optional[float] = None):
+        super().stop(timeout)
+        if self._lock_file is not None:
+            self._lock_file.close()  # Releases the maintenance lock
+            self._lock_file = None
+        self._close_monitor()
+
+    def _close_monitor(self):
+        if self._monitor is not None:
+            close_db_connection(self._monitor)
+            self._monitor = None
+        self._last_state = None
+
+    def _database_state(self) -> Optional[tuple]:
+        """
+        Returns what changes when any process writes: (data_version, WAL size).
+
+        Returns:
+            tuple: The state, or None if it cannot be read.
+        """
+        try:
+            if self._monitor is None:
+                self._monitor = open_db_read_connection()
+            data_version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            logger.exception("Could not read the database state.")
+            self._close_monitor()
+            return None
+        return data_version, wal_size()
+
+    def _is_leader(self) -> bool:
+        """Takes the maintenance lock, so a single worker process runs maintenance."""
+        if fcntl is None:
+            return True
+        if self._lock_file is None:
+            self._lock_file = open(  # pylint: disable=consider-using-with
+                f"{get_db_path()}.maintenance.lock", "a", encoding="utf-8"
+            )
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def run_once(self):
+        """
+        Runs the maintenance tasks that are due.
+        """
+        if self._stopping.is_set() or not self._is_leader():
+            return
+
+        queries = _queries_executed()
+        state = self._database_state()
+        # Idle for the whole host: nothing ran here, and no other process committed or wrote
+        idle = (
+            self._last_queries is not None
+            and queries == self._last_queries
+            and state is not None
+            and state == self._last_state
+        )
+        size = wal_size()
+        DB_WAL_SIZE.set(size)
+
+        connection = get_db_connection()
+        try:
+            if idle and size > 0:
+                busy, _, _ = checkpoint(connection, "TRUNCATE")
+                if busy:
+                    logger.debug("WAL truncate checkpoint could not complete (busy).")
+            elif size > self.wal_checkpoint_bytes:
+                checkpoint(connection, "PASSIVE")
+
+            if idle:
+                self._incremental_vacuum(connection)
+
+            now = time.monotonic()
+            if now - self._last_optimize >= self.optimize_interval or not self._last_optimize:
+                connection.execute("PRAGMA optimize")
+                DB_MAINTENANCE_TASKS.inc("optimize")
+                self._last_optimize = now
+        finally:
+            close_db_connection(connection)
+
+        DB_WAL_SIZE.set(wal_size())
+        # Our own statements, commits and checkpoints do not count as load
+        self._last_queries = _queries_executed()
+        self._last_state = self._database_state()
+
+    def _incremental_vacuum(self, connection):
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+            return
+        free_pages = connection.execute("PRAGMA freelist_count").fetchone()[0]
+        if free_pages:
+            # executescript() steps the pragma to completion; execute() frees a single page
+            connection.executescript(f"PRAGMA incremental_vacuum({int(self.vacuum_pages)})")
+            DB_MAINTENANCE_TASKS.inc("incremental_vacuum")
+            logger.debug("Incremental vacuum: %s free pages before.", free_pages)
+
+
+# Process-wide maintenance worker, started by the application lifespan
+db_maintenance = DatabaseMaintenance()
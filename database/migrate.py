@@ -1,116 +1,531 @@
 """
 Database Migration Runner
 
-This script executes pending database migrations by dynamically loading and
-running the `upgrade()` function from migration files located in `database/migrations/`.
+This script applies the migrations in `database/migrations/` (files named
+`NNNN_description.py`), each one atomically on its own connection.
 
 How it works:
-- It checks the `migrations` table to determine which migrations have already been applied.
-- It scans the `database/migrations/` folder for new migration files.
-- It applies only the migrations that have not been executed yet.
-- After a successful migration, it records the migration filename in the database.
+- The `migrations` table records every applied migration with the SHA-256
+  checksum of its file. A run refuses to continue if an applied migration
+  file was modified afterwards.
+- A lock file next to the database prevents concurrent runs.
+- Each pending migration runs inside a `BEGIN IMMEDIATE` transaction: its
+  `upgrade(connection)` and the `migrations` record are committed together or
+  not at all (SQLite DDL is transactional). Migrations that cannot run in a
+  transaction (e.g. `VACUUM`) set `TRANSACTIONAL = False`.
+- A migration can declare `BACKFILLS`: data updates applied after its schema
+  change, in small key-range chunks, each in its own short transaction, with
+  the progress stored in `migration_backfills`. Backfills can run against a
+  live database (the write lock is held for one chunk at a time) and resume
+  where they stopped if interrupted.
 
 Usage:
-Run this script after deploying new code to ensure the database is up to date:
 
-    python -m database.migrate
+    python -m database.migrate                # Apply pending migrations and backfills
+    python -m database.migrate plan           # Show what would be applied
+    python -m database.migrate plan --sql     # Also print the SQL (run and rolled back)
+    python -m database.migrate backfill       # Resume unfinished backfills only
+    python -m database.migrate down           # Revert the last applied migration
 
-The script will automatically execute only the necessary migrations.
+Writing a migration:
+
+    def upgrade(connection=None):
+        ...  # Use the given connection; do not commit it
+
+    def downgrade(connection=None):
+        ...
+
+    BACKFILLS = [
+        Backfill(
+            name="users_language",
+            table="users",
+            sql="UPDATE users SET language = 'en' WHERE id > :start AND id <= :end",
+        ),
+    ]
 """
 
+import argparse
+import hashlib
 import importlib
 import os
 import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from database.db_config import get_db_connection, get_db_path
+from database.exceptions.database_exceptions import MigrationError
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: concurrent runs are not prevented
+    fcntl = None  # pylint: disable=invalid-name
+
+# Root module and directory of the migrations
+MIGRATIONS_PACKAGE = "database.migrations"
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+
+@dataclass
+class Backfill:
+    """
+    A chunked, resumable data update declared by a migration.
+
+    `sql` is executed once per chunk with the `:start` (exclusive) and `:end`
+    (inclusive) bounds of the key range, and must only touch rows in that range.
+
+    Attributes:
+        name (str): Unique name, used to store the progress.
+        table (str): Table whose key ranges are iterated.
+        sql (str): Statement run for each chunk.
+        key (str): Integer key column of `table`.
+        batch_size (int): Size of each key range.
+        pause (float): Seconds to sleep between chunks, leaving room for other writers.
+    """
+
+    name: str
+    table: str
+    sql: str
+    key: str = "id"
+    batch_size: int = 1000
+    pause: float = 0.0
+
+
+def file_checksum(path: str) -> str:
+    """
+    Returns the SHA-256 checksum of a migration file.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        str: Hex digest.
+    """
+    with open(path, "rb") as migration_file:
+        return hashlib.sha256(migration_file.read()).hexdigest()
+
+
+def available_migrations() -> Dict[str, str]:
+    """
+    Lists the migration files.
+
+    Returns:
+        dict: File path by migration name, in application order.
+    """
+    return {
+        name[:-3]: os.path.join(MIGRATIONS_DIR, name)
+        for name in sorted(os.listdir(MIGRATIONS_DIR))
+        if name.endswith(".py") and name[:4].isdigit()
+    }
+
+
+def load_migration(name: str):
+    """
+    Imports a migration module.
+
+    Args:
+        name (str): Migration name (file name without extension).
+
+    Returns:
+        module: The migration module.
+    """
+    return importlib.import_module(f"{MIGRATIONS_PACKAGE}.{name}")
+
+
+def connect():
+    """
+    Opens a connection whose transactions are managed explicitly.
 
-from database.db_config import (
-    close_db_connection,
-    commit_db_connection,
-    get_db_connection,
-    rollback_db_connection,
-)
+    Returns:
+        sqlite3.Connection: The connection, in autocommit mode.
+    """
+    connection = get_db_connection()
+    connection.isolation_level = None
+    return connection
 
-# Root module for migrations
-MIGRATIONS_DIR = "database.migrations"
 
-# Connect to the database
-connection = get_db_connection()
-cursor = connection.cursor()
+def ensure_tables(connection):
+    """
+    Creates or upgrades the bookkeeping tables of the migration runner.
 
-# Create the migrations table if it does not exist
-cursor.execute(
+    Args:
+        connection (sqlite3.Connection): Connection in autocommit mode.
     """
-    CREATE TABLE IF NOT EXISTS migrations (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        filename TEXT UNIQUE,
-        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS migrations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            filename TEXT UNIQUE,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
     )
-"""
-)
-commit_db_connection(connection)
-
-# Get the list of already applied migrations
-cursor.execute("SELECT filename FROM migrations")
-applied_migrations = {row[0] for row in cursor.fetchall()}
-
-# Get the list of available migration scripts
-migration_files = sorted(
-    f[:-3]
-    for f in os.listdir("database/migrations")
-    if f.endswith(".py") and f.startswith("00")
-)
-
-# Track successfully applied migrations in this run
-applied_this_run = []
-
-# Execute only the pending migrations
-for migration in migration_files:
-    if migration not in applied_migrations:
-        print(f"Applying migration: {migration}")
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(migrations)")}
+    if "checksum" not in columns:
+        connection.execute("ALTER TABLE migrations ADD COLUMN checksum TEXT")
+    connection.execute(
+        """
+        CREATE TABLE IF NOT EXISTS migration_backfills (
+            name TEXT PRIMARY KEY,
+            migration TEXT NOT NULL,
+            last_key INTEGER,
+            done INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+def applied_migrations(connection) -> Dict[str, Optional[str]]:
+    """
+    Returns the applied migrations.
+
+    Args:
+        connection (sqlite3.Connection): Connection to the database.
+
+    Returns:
+        dict: Stored checksum by migration name, in application order.
+    """
+    rows = connection.execute("SELECT filename, checksum FROM migrations ORDER BY id").fetchall()
+    return dict(rows)
+
+
+def verify_checksums(connection) -> List[str]:
+    """
+    Compares the applied migrations with their files.
+
+    Migrations recorded before checksums were stored get their checksum now.
+
+    Args:
+        connection (sqlite3.Connection): Connection in autocommit mode.
+
+    Returns:
+        list: Descriptions of the mismatches (modified or missing files).
+    """
+    files = available_migrations()
+    problems = []
+    for name, checksum in applied_migrations(connection).items():
+        if name not in files:
+            problems.append(f"{name}: applied but its file is missing")
+        elif checksum is None:
+            connection.execute(
+                "UPDATE migrations SET checksum = ? WHERE filename = ?",
+                (file_checksum(files[name]), name),
+            )
+        elif checksum != file_checksum(files[name]):
+            problems.append(f"{name}: file modified after it was applied")
+    return problems
+
+
+class MigrationLock:
+    """
+    Exclusive lock file that prevents concurrent migration runs.
+    """
+
+    def __init__(self):
+        self.path = f"{get_db_path()}.migrate.lock"
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError as error:
+                self._file.close()
+                raise MigrationError(
+                    f"Another migration run holds {self.path}; try again later."
+                ) from error
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+
+def apply_migration(connection, name: str, path: str):
+    """
+    Applies a migration and records it, atomically unless it is not transactional.
+
+    Args:
+        connection (sqlite3.Connection): Connection in autocommit mode.
+        name (str): Migration name.
+        path (str): Migration file.
+
+    Raises:
+        Exception: Whatever the migration raised; the transaction is rolled back.
+    """
+    module = load_migration(name)
+    record = "INSERT INTO migrations (filename, checksum) VALUES (?, ?)"
+    if not getattr(module, "TRANSACTIONAL", True):
+        module.upgrade(connection)
+        connection.execute(record, (name, file_checksum(path)))
+        return
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        module.upgrade(connection)
+        connection.execute(record, (name, file_checksum(path)))
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def revert_migration(connection, name: str):
+    """
+    Reverts a migration and removes its records, atomically unless it is not transactional.
+
+    Args:
+        connection (sqlite3.Connection): Connection in autocommit mode.
+        name (str): Migration name.
+    """
+    module = load_migration(name)
+    transactional = getattr(module, "TRANSACTIONAL", True)
+    if transactional:
+        connection.execute("BEGIN IMMEDIATE")
+    try:
+        module.downgrade(connection)
+        connection.execute("DELETE FROM migrations WHERE filename = ?", (name,))
+        connection.execute("DELETE FROM migration_backfills WHERE migration = ?", (name,))
+        if transactional:
+            connection.execute("COMMIT")
+    except BaseException:
+        if transactional:
+            connection.execute("ROLLBACK")
+        raise
+
+
+def run_backfill(connection, migration: str, backfill: Backfill, log=print) -> int:
+    """
+    Runs a backfill chunk by chunk, resuming from its stored progress.
+
+    Args:
+        connection (sqlite3.Connection): Connection in autocommit mode.
+        migration (str): Name of the migration declaring the backfill.
+        backfill (Backfill): The backfill.
+        log (Callable): Receives progress messages.
+
+    Returns:
+        int: Number of rows changed by this run.
+    """
+    connection.execute(
+        "INSERT OR IGNORE INTO migration_backfills (name, migration) VALUES (?, ?)",
+        (backfill.name, migration),
+    )
+    last_key, done = connection.execute(
+        "SELECT last_key, done FROM migration_backfills WHERE name = ?", (backfill.name,)
+    ).fetchone()
+    if done:
+        return 0
+
+    # Rows inserted after this point are written by code that already fills them
+    max_key = connection.execute(
+        f"SELECT MAX({backfill.key}) FROM {backfill.table}"
+    ).fetchone()[0] or 0
+    start = last_key if last_key is not None else 0
+    changed = 0
+    while start < max_key:
+        end = min(start + backfill.batch_size, max_key)
+        connection.execute("BEGIN IMMEDIATE")
         try:
-            # Begin transaction
-            cursor.execute("BEGIN TRANSACTION")
+            cursor = connection.execute(backfill.sql, {"start": start, "end": end})
+            connection.execute(
+                "UPDATE migration_backfills SET last_key = ?, updated_at = CURRENT_TIMESTAMP "
+                "WHERE name = ?",
+                (end, backfill.name),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        changed += max(cursor.rowcount, 0)
+        log(f"  {backfill.name}: {end}/{max_key} ({changed} rows)")
+        start = end
+        if backfill.pause:
+            time.sleep(backfill.pause)
+
+    connection.execute(
+        "UPDATE migration_backfills SET done = 1, updated_at = CURRENT_TIMESTAMP WHERE name = ?",
+        (backfill.name,),
+    )
+    return changed
+
 
-            # Dynamically import the migration module
-            module = importlib.import_module(f"{MIGRATIONS_DIR}.{migration}")
+def run_backfills(connection, log=print):
+    """
+    Runs the unfinished backfills of every applied migration, in order.
+
+    Args:
+        connection (sqlite3.Connection): Connection in autocommit mode.
+        log (Callable): Receives progress messages.
+    """
+    for name in applied_migrations(connection):
+        for backfill in getattr(load_migration(name), "BACKFILLS", []):
+            log(f"Backfill {backfill.name} ({name})")
+            run_backfill(connection, name, backfill, log)
 
-            # Run the upgrade() function
-            module.upgrade()
 
-            # Record the migration as applied
-            cursor.execute("INSERT INTO migrations (filename) VALUES (?)", (migration,))
-            commit_db_connection(connection)
-            applied_this_run.append(migration)  # Track applied migrations
-            print(f"Migration {migration} applied successfully.")
+def migrate(log=print) -> List[str]:
+    """
+    Applies the pending migrations, then the unfinished backfills.
 
-        except Exception as e:  # pylint: disable=broad-exception-caught
-            # Rollback transaction in case of error
-            rollback_db_connection(connection)
-            print(f"Error applying {migration}: {e}")
+    Args:
+        log (Callable): Receives progress messages.
 
-            # Rollback all migrations applied in this run
-            print("Rolling back applied migrations...")
-            for rollback_migration in reversed(applied_this_run):
+    Returns:
+        list: Names of the migrations applied by this run.
+
+    Raises:
+        MigrationError: If another run is in progress, an applied migration was
+            modified, or a migration failed (it is rolled back; the migrations
+            applied before it stay applied).
+    """
+    with MigrationLock():
+        connection = connect()
+        try:
+            ensure_tables(connection)
+            problems = verify_checksums(connection)
+            if problems:
+                raise MigrationError("Applied migrations changed:\n  " + "\n  ".join(problems))
+
+            applied = applied_migrations(connection)
+            done = []
+            for name, path in available_migrations().items():
+                if name in applied:
+                    continue
+                log(f"Applying migration: {name}")
+                try:
+                    apply_migration(connection, name, path)
+                except Exception as error:
+                    raise MigrationError(f"Error applying {name}: {error}") from error
+                done.append(name)
+                log(f"Migration {name} applied successfully.")
+
+            run_backfills(connection, log)
+            return done
+        finally:
+            connection.close()
+
+
+def rollback_last(log=print) -> Optional[str]:
+    """
+    Reverts the last applied migration.
+
+    Args:
+        log (Callable): Receives progress messages.
+
+    Returns:
+        str: Name of the reverted migration, or None if none is applied.
+    """
+    with MigrationLock():
+        connection = connect()
+        try:
+            ensure_tables(connection)
+            applied = list(applied_migrations(connection))
+            if not applied:
+                return None
+            name = applied[-1]
+            log(f"Reverting {name}...")
+            revert_migration(connection, name)
+            log(f"Migration {name} reverted successfully.")
+            return name
+        finally:
+            connection.close()
+
+
+def plan(show_sql: bool = False) -> List[str]:
+    """
+    Describes what `migrate()` would do, without changing the database.
+
+    With `show_sql`, the pending transactional migrations are run in a single
+    transaction that is rolled back, and the executed SQL is included.
+
+    Returns:
+        list: Lines of the plan.
+    """
+    connection = connect()
+    lines = []
+    try:
+        tables = {
+            row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        }
+        applied = applied_migrations(connection) if "migrations" in tables else {}
+        files = available_migrations()
+
+        for name, checksum in applied.items():
+            if name not in files:
+                lines.append(f"  MISSING   {name}")
+            elif checksum is not None and checksum != file_checksum(files[name]):
+                lines.append(f"  MODIFIED  {name}")
+        pending = [name for name in files if name not in applied]
+        for name in pending:
+            module = load_migration(name)
+            notes = [] if getattr(module, "TRANSACTIONAL", True) else ["not transactional"]
+            notes += [f"backfill {b.name}" for b in getattr(module, "BACKFILLS", [])]
+            lines.append(f"  PENDING   {name}" + (f" ({', '.join(notes)})" if notes else ""))
+        if not pending:
+            lines.append("  No pending migrations.")
+
+        if show_sql and pending:
+            statements: List[str] = []
+            connection.set_trace_callback(statements.append)
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                for name in pending:
+                    module = load_migration(name)
+                    if not getattr(module, "TRANSACTIONAL", True):
+                        statements.append(f"-- {name}: not transactional, not run")
+                        continue
+                    statements.append(f"-- {name}")
+                    module.upgrade(connection)
+            finally:
+                connection.set_trace_callback(None)
+                connection.execute("ROLLBACK")
+            lines += ["", *(s for s in statements if s != "BEGIN IMMEDIATE")]
+    finally:
+        connection.close()
+    return lines
+
+
+def main(argv=None) -> int:
+    """
+    Runs the migration commands from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Database migrations.")
+    parser.add_argument(
+        "command", nargs="?", default="up", choices=("up", "plan", "backfill", "down")
+    )
+    parser.add_argument("--sql", action="store_true", help="With plan: print the SQL.")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "plan":
+            print("\n".join(plan(args.sql)))
+        elif args.command == "backfill":
+            with MigrationLock():
+                connection = connect()
                 try:
-                    print(f"Reverting {rollback_migration}...")
-                    module = importlib.import_module(
-                        f"{MIGRATIONS_DIR}.{rollback_migration}"
-                    )
-                    module.downgrade()
-
-                    # Remove from migrations table
-                    cursor.execute(
-                        "DELETE FROM migrations WHERE filename = ?",
-                        (rollback_migration,),
-                    )
-                    commit_db_connection(connection)
-                    print(f"Migration {rollback_migration} reverted successfully.")
-                except (
-                    Exception  # pylint: disable=broad-exception-caught
-                ) as rollback_error:
-                    print(f"Error rolling back {rollback_migration}: {rollback_error}")
-
-            sys.exit(1)  # Stop execution to prevent further issues
-
-# Close the database connection
-close_db_connection(connection)
-print("Migrations completed successfully.")
+                    ensure_tables(connection)
+                    run_backfills(connection)
+                finally:
+                    connection.close()
+        elif args.command == "down":
+            if rollback_last() is None:
+                print("No applied migrations.")
+        else:
+            migrate()
+            print("Migrations completed successfully.")
+    except MigrationError as error:
+        print(error)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
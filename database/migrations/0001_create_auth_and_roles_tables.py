@@ -18,14 +18,21 @@ from database.db_config import (
 )
 
 
-def upgrade():
+def upgrade(connection=None):
     """
     Create authentication, roles, and permissions tables.
 
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
     Raises:
         sqlite3.DatabaseError: If there is an error executing the SQL query.
     """
-    connection = get_db_connection()
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
     cursor = connection.cursor()
 
     # Crear tabla de usuarios
@@ -184,19 +191,27 @@ def upgrade():
         "CREATE INDEX IF NOT EXISTS idx_auth_google_google_id ON auth_google(google_id);"
     )
 
-    commit_db_connection(connection)
-    close_db_connection(connection)
-    print("Migration applied successfully!")
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
 
 
-def downgrade():
+def downgrade(connection=None):
     """
     Drop all authentication, roles, and permissions tables.
 
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
     Raises:
         sqlite3.DatabaseError: If there is an error executing the SQL query.
     """
-    connection = get_db_connection()
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
     cursor = connection.cursor()
 
     cursor.execute("DROP TABLE IF EXISTS audit_logs;")
@@ -209,9 +224,10 @@ def downgrade():
     cursor.execute("DROP TABLE IF EXISTS auth_providers;")
     cursor.execute("DROP TABLE IF EXISTS users;")
 
-    commit_db_connection(connection)
-    close_db_connection(connection)
-    print("Migration rolled back successfully!")
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,81 @@
+# pylint: disable=invalid-name
+"""
+migrations/0003_enable_incremental_vacuum.py
+
+Switches the database to incremental auto-vacuum, so the maintenance worker
+can release the pages freed by deletes (e.g. archived audit logs) little by
+little with `PRAGMA incremental_vacuum`. The change needs a full `VACUUM`,
+which rewrites the database file once.
+
+The migration runner applies it outside of a transaction (`TRANSACTIONAL = False`).
+
+Run:
+python -m database.migrations.0003_enable_incremental_vacuum upgrade
+
+Run rollback:
+python -m database.migrations.0003_enable_incremental_vacuum downgrade
+"""
+
+import sys
+
+from database.db_config import close_db_connection, get_db_connection
+
+
+# VACUUM cannot run inside a transaction
+TRANSACTIONAL = False
+
+
+def _set_auto_vacuum(connection, mode: str):
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+        connection.isolation_level = None
+    connection.execute(f"PRAGMA auto_vacuum = {mode}")
+    connection.execute("VACUUM")
+    if own_connection:
+        close_db_connection(connection)
+
+
+def upgrade(connection=None):
+    """
+    Enable incremental auto-vacuum.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            in autocommit mode. Without it, the migration uses its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    _set_auto_vacuum(connection, "INCREMENTAL")
+    if connection is None:
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Disable auto-vacuum.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            in autocommit mode. Without it, the migration uses its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    _set_auto_vacuum(connection, "NONE")
+    if connection is None:
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
@@ -0,0 +1,116 @@
+# pylint: disable=invalid-name
+"""
+migrations/0004_add_role_cascade_triggers.py
+
+Deletes the assignments of a role or a permission together with it, so that
+`delete_role` and `delete_permission` are a single `DELETE` statement.
+Foreign keys are not enforced on our connections, so the `ON DELETE CASCADE`
+clauses of the schema do nothing; these triggers do the same work. The indexes
+let the triggers find the assignments without scanning the tables.
+
+Run:
+python -m database.migrations.0004_add_role_cascade_triggers upgrade
+
+Run rollback:
+python -m database.migrations.0004_add_role_cascade_triggers downgrade
+"""
+
+import sys
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+
+
+def upgrade(connection=None):
+    """
+    Create the cascade triggers of roles and permissions.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_user_roles_role_id ON user_roles(role_id);"
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_role_permissions_permission_id "
+        "ON role_permissions(permission_id);"
+    )
+
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_roles_delete_cascade
+        AFTER DELETE ON roles
+        BEGIN
+            DELETE FROM user_roles WHERE role_id = OLD.id;
+            DELETE FROM role_permissions WHERE role_id = OLD.id;
+        END;
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_permissions_delete_cascade
+        AFTER DELETE ON permissions
+        BEGIN
+            DELETE FROM role_permissions WHERE permission_id = OLD.id;
+        END;
+    """
+    )
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Drop the cascade triggers of roles and permissions.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute("DROP TRIGGER IF EXISTS trg_permissions_delete_cascade;")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_roles_delete_cascade;")
+    cursor.execute("DROP INDEX IF EXISTS idx_role_permissions_permission_id;")
+    cursor.execute("DROP INDEX IF EXISTS idx_user_roles_role_id;")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
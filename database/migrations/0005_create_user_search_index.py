@@ -0,0 +1,195 @@
+# pylint: disable=invalid-name
+"""
+migrations/0005_create_user_search_index.py
+
+Creates `user_search`, an FTS5 index of the searchable fields of every user
+(users.full_name/email, auth_telegram.username/first_name/last_name and
+auth_google.full_name/email), with one row per user (`rowid` = user ID).
+
+How it works:
+- Triggers on the three source tables rebuild the row of the affected user,
+  so the index is always in sync. They only fire when a searchable column
+  changes (e.g. not on `failed_attempts` or `last_login` updates).
+- Prefix indexes of 2, 3 and 4 characters make prefix queries (`"jua"*`)
+  cheap, and the default `rank` is a BM25 with column weights, so names and
+  usernames rank above emails.
+- Existing users are indexed by the `user_search_index` backfill.
+
+Run:
+python -m database.migrations.0005_create_user_search_index upgrade
+
+Run rollback:
+python -m database.migrations.0005_create_user_search_index downgrade
+"""
+
+import sys
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+from database.migrate import Backfill
+
+# Indexed columns and their BM25 weight
+COLUMNS = {
+    "full_name": 10.0,
+    "email": 4.0,
+    "telegram_username": 8.0,
+    "telegram_first_name": 6.0,
+    "telegram_last_name": 6.0,
+    "google_full_name": 8.0,
+    "google_email": 4.0,
+}
+
+# Values of the indexed columns of the users matched by a WHERE clause on `u`
+SELECT_ROWS = """
+    SELECT u.id, u.full_name, u.email, t.username, t.first_name, t.last_name,
+           g.full_name, g.email
+    FROM users u
+    LEFT JOIN auth_telegram t ON t.user_id = u.id
+    LEFT JOIN auth_google g ON g.user_id = u.id
+"""
+
+INSERT_ROWS = f"INSERT INTO user_search (rowid, {', '.join(COLUMNS)}) {SELECT_ROWS}"
+
+
+def _refresh(user_id: str) -> str:
+    """SQL of a trigger step that rebuilds the index row of a user."""
+    return (
+        f"DELETE FROM user_search WHERE rowid = {user_id};\n"
+        f"{INSERT_ROWS} WHERE u.id = {user_id};"
+    )
+
+
+# Trigger name -> (event, statements)
+TRIGGERS = {
+    "trg_users_search_insert": ("AFTER INSERT ON users", _refresh("NEW.id")),
+    "trg_users_search_update": (
+        "AFTER UPDATE OF full_name, email ON users",
+        _refresh("NEW.id"),
+    ),
+    "trg_users_search_delete": (
+        "AFTER DELETE ON users",
+        "DELETE FROM user_search WHERE rowid = OLD.id;",
+    ),
+    "trg_auth_telegram_search_insert": (
+        "AFTER INSERT ON auth_telegram",
+        _refresh("NEW.user_id"),
+    ),
+    "trg_auth_telegram_search_update": (
+        "AFTER UPDATE OF user_id, username, first_name, last_name ON auth_telegram",
+        _refresh("OLD.user_id") + "\n" + _refresh("NEW.user_id"),
+    ),
+    "trg_auth_telegram_search_delete": (
+        "AFTER DELETE ON auth_telegram",
+        _refresh("OLD.user_id"),
+    ),
+    "trg_auth_google_search_insert": (
+        "AFTER INSERT ON auth_google",
+        _refresh("NEW.user_id"),
+    ),
+    "trg_auth_google_search_update": (
+        "AFTER UPDATE OF user_id, full_name, email ON auth_google",
+        _refresh("OLD.user_id") + "\n" + _refresh("NEW.user_id"),
+    ),
+    "trg_auth_google_search_delete": (
+        "AFTER DELETE ON auth_google",
+        _refresh("OLD.user_id"),
+    ),
+}
+
+BACKFILLS = [
+    Backfill(
+        name="user_search_index",
+        table="users",
+        sql=(
+            f"INSERT OR REPLACE INTO user_search (rowid, {', '.join(COLUMNS)}) "
+            f"{SELECT_ROWS} WHERE u.id > :start AND u.id <= :end"
+        ),
+        batch_size=5000,
+    ),
+]
+
+
+def upgrade(connection=None):
+    """
+    Create the user search index and the triggers that keep it in sync.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS user_search USING fts5(
+            {', '.join(COLUMNS)},
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3 4'
+        );
+    """
+    )
+    weights = ", ".join(str(weight) for weight in COLUMNS.values())
+    cursor.execute(
+        "INSERT INTO user_search (user_search, rank) VALUES ('rank', ?)",
+        (f"bm25({weights})",),
+    )
+
+    for name, (event, statements) in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN\n{statements}\nEND;")
+
+    if own_connection:
+        # Without the migration runner, index the existing users at once
+        cursor.execute(INSERT_ROWS)
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Drop the user search index and its triggers.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name};")
+    cursor.execute("DROP TABLE IF EXISTS user_search;")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
@@ -0,0 +1,214 @@
+# pylint: disable=invalid-name
+"""
+migrations/0006_create_role_hierarchy.py
+
+Lets roles inherit the permissions of parent roles.
+
+How it works:
+- `role_inheritance` holds the edges: `role_id` inherits from `parent_role_id`.
+  A role can have several parents (the hierarchy is a DAG).
+- `role_closure` holds every (ancestor, descendant) pair of the hierarchy,
+  including (role, role), with the number of distinct paths between them.
+  It is maintained incrementally by triggers: inserting or deleting an edge
+  adds or subtracts the paths that go through it, and a pair is deleted
+  when no path is left. Resolving the permissions of a role is then a
+  single indexed join: closure -> role_permissions.
+- A trigger rejects edges that would create a cycle (a role inheriting from
+  itself or from one of its descendants) with a constraint error, using one
+  lookup in the closure.
+- Edges cannot be updated; delete and insert them instead. Deleting a role
+  deletes its edges and closure pairs.
+
+Run:
+python -m database.migrations.0006_create_role_hierarchy upgrade
+
+Run rollback:
+python -m database.migrations.0006_create_role_hierarchy downgrade
+"""
+
+import sys
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+
+# Message of the constraint error raised for a cycle
+CYCLE_ERROR = "role inheritance cycle"
+
+# Paths through an edge: (ancestor of the parent) x (descendant of the role)
+PATHS_THROUGH_EDGE = """
+    SELECT a.ancestor_id, d.descendant_id, a.paths * d.paths AS paths
+    FROM role_closure a, role_closure d
+    WHERE a.descendant_id = {edge}.parent_role_id AND d.ancestor_id = {edge}.role_id
+"""
+
+TRIGGERS = {
+    "trg_roles_closure_insert": """
+        AFTER INSERT ON roles
+        BEGIN
+            INSERT INTO role_closure (ancestor_id, descendant_id, paths)
+            VALUES (NEW.id, NEW.id, 1);
+        END;
+    """,
+    "trg_roles_closure_delete": """
+        AFTER DELETE ON roles
+        BEGIN
+            DELETE FROM role_inheritance
+            WHERE role_id = OLD.id OR parent_role_id = OLD.id;
+            DELETE FROM role_closure WHERE ancestor_id = OLD.id OR descendant_id = OLD.id;
+        END;
+    """,
+    "trg_role_inheritance_cycle": f"""
+        BEFORE INSERT ON role_inheritance
+        WHEN NEW.role_id = NEW.parent_role_id OR EXISTS (
+            SELECT 1 FROM role_closure
+            WHERE ancestor_id = NEW.role_id AND descendant_id = NEW.parent_role_id
+        )
+        BEGIN
+            SELECT RAISE(ABORT, '{CYCLE_ERROR}');
+        END;
+    """,
+    "trg_role_inheritance_insert": f"""
+        AFTER INSERT ON role_inheritance
+        BEGIN
+            INSERT INTO role_closure (ancestor_id, descendant_id, paths)
+            {PATHS_THROUGH_EDGE.format(edge="NEW")}
+            ON CONFLICT (ancestor_id, descendant_id) DO UPDATE
+            SET paths = paths + excluded.paths;
+        END;
+    """,
+    # Without cycles, the pairs read by the subquery are never the ones updated
+    "trg_role_inheritance_delete": """
+        AFTER DELETE ON role_inheritance
+        BEGIN
+            UPDATE role_closure
+            SET paths = paths - (
+                SELECT a.paths * d.paths
+                FROM role_closure a, role_closure d
+                WHERE a.ancestor_id = role_closure.ancestor_id
+                  AND a.descendant_id = OLD.parent_role_id
+                  AND d.ancestor_id = OLD.role_id
+                  AND d.descendant_id = role_closure.descendant_id
+            )
+            WHERE ancestor_id IN (
+                SELECT ancestor_id FROM role_closure WHERE descendant_id = OLD.parent_role_id
+            )
+            AND descendant_id IN (
+                SELECT descendant_id FROM role_closure WHERE ancestor_id = OLD.role_id
+            );
+            DELETE FROM role_closure WHERE paths <= 0;
+        END;
+    """,
+    "trg_role_inheritance_update": """
+        BEFORE UPDATE ON role_inheritance
+        BEGIN
+            SELECT RAISE(ABORT, 'role inheritance edges cannot be updated');
+        END;
+    """,
+}
+
+
+def upgrade(connection=None):
+    """
+    Create the role hierarchy tables and triggers.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS role_inheritance (
+            role_id INTEGER NOT NULL,
+            parent_role_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (role_id, parent_role_id),
+            FOREIGN KEY (role_id) REFERENCES roles(id) ON DELETE CASCADE,
+            FOREIGN KEY (parent_role_id) REFERENCES roles(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+    """
+    )
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS role_closure (
+            ancestor_id INTEGER NOT NULL,
+            descendant_id INTEGER NOT NULL,
+            paths INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID;
+    """
+    )
+    cursor.execute(
+        "CREATE INDEX IF NOT EXISTS idx_role_inheritance_parent "
+        "ON role_inheritance(parent_role_id);"
+    )
+    cursor.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_role_closure_descendant "
+        "ON role_closure(descendant_id, ancestor_id);"
+    )
+
+    for name, body in TRIGGERS.items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    # Every existing role is its own ancestor
+    cursor.execute(
+        "INSERT OR IGNORE INTO role_closure (ancestor_id, descendant_id, paths) "
+        "SELECT id, id, 1 FROM roles"
+    )
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Drop the role hierarchy tables and triggers.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    for name in TRIGGERS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name};")
+    cursor.execute("DROP TABLE IF EXISTS role_closure;")
+    cursor.execute("DROP TABLE IF EXISTS role_inheritance;")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
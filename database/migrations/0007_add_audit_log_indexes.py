@@ -0,0 +1,94 @@
+# pylint: disable=invalid-name
+"""
+migrations/0007_add_audit_log_indexes.py
+
+Adds the indexes used to read audit logs in (created_at, id) order, on their
+own or filtered by user or action: the audit log export pages through them
+with keyset pagination, and archiving selects old rows by created_at. SQLite
+indexes end with the rowid, so each one is also ordered by id.
+
+Run:
+python -m database.migrations.0007_add_audit_log_indexes upgrade
+
+Run rollback:
+python -m database.migrations.0007_add_audit_log_indexes downgrade
+"""
+
+import sys
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+
+INDEXES = {
+    "idx_audit_logs_created_at": "audit_logs(created_at)",
+    "idx_audit_logs_user_id_created_at": "audit_logs(user_id, created_at)",
+    "idx_audit_logs_action_created_at": "audit_logs(action, created_at)",
+}
+
+
+def upgrade(connection=None):
+    """
+    Create the audit log indexes.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    for name, columns in INDEXES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {columns};")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Drop the audit log indexes.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    for name in INDEXES:
+        cursor.execute(f"DROP INDEX IF EXISTS {name};")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
@@ -0,0 +1,91 @@
+# pylint: disable=invalid-name
+"""
+migrations/0008_add_failed_login_index.py
+
+Adds a partial index on `users.last_failed_attempt`, limited to the users
+with failed login attempts. The login throttle loads them at startup (see
+`app/auth/login_throttle.py`); the index only holds those few rows, so it
+costs nothing to the other user writes.
+
+Run:
+python -m database.migrations.0008_add_failed_login_index upgrade
+
+Run rollback:
+python -m database.migrations.0008_add_failed_login_index downgrade
+"""
+
+import sys
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+
+INDEX = "idx_users_failed_attempts"
+
+
+def upgrade(connection=None):
+    """
+    Create the failed login index.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        f"CREATE INDEX IF NOT EXISTS {INDEX} "
+        "ON users(last_failed_attempt) WHERE failed_attempts > 0;"
+    )
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Drop the failed login index.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(f"DROP INDEX IF EXISTS {INDEX};")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
@@ -0,0 +1,141 @@
+# pylint: disable=invalid-name
+"""
+migrations/0009_create_cache_versions.py
+
+Adds a version counter per cache namespace, so that in-process caches of
+every worker can tell when the data they hold changed, whoever wrote it
+(another worker, a migration, an import).
+
+How it works:
+- `cache_versions` has one row per namespace. Triggers increment the
+  version of a namespace in the transaction that changes one of its tables:
+    - roles: `roles`.
+    - permissions: `permissions`, `role_permissions`, `user_roles`,
+      `role_inheritance`, `roles` (deletes) and the Telegram accounts
+      (`auth_telegram`), which permission checks go through.
+- Readers poll `PRAGMA data_version` and only read this table when some
+  connection committed (see `database/cache_versions.py`).
+
+Run:
+python -m database.migrations.0009_create_cache_versions upgrade
+
+Run rollback:
+python -m database.migrations.0009_create_cache_versions downgrade
+"""
+
+import sys
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+
+# Tables (and the changes) that bump each namespace
+NAMESPACE_TABLES = {
+    "roles": {"roles": ("INSERT", "UPDATE", "DELETE")},
+    "permissions": {
+        "permissions": ("INSERT", "UPDATE", "DELETE"),
+        "role_permissions": ("INSERT", "UPDATE", "DELETE"),
+        "user_roles": ("INSERT", "UPDATE", "DELETE"),
+        "role_inheritance": ("INSERT", "DELETE"),
+        "roles": ("DELETE",),
+        "auth_telegram": ("INSERT", "UPDATE OF user_id, telegram_id", "DELETE"),
+    },
+}
+
+
+def _triggers():
+    """Returns the trigger definitions by name."""
+    triggers = {}
+    for namespace, tables in NAMESPACE_TABLES.items():
+        for table, events in tables.items():
+            for event in events:
+                name = f"trg_cache_{namespace}_{table}_{event.split()[0].lower()}"
+                triggers[name] = f"""
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE cache_versions SET version = version + 1
+                        WHERE namespace = '{namespace}';
+                    END;
+                """
+    return triggers
+
+
+def upgrade(connection=None):
+    """
+    Create the cache version table and its triggers.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS cache_versions (
+            namespace TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID;
+    """
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO cache_versions (namespace) VALUES (?)",
+        [(namespace,) for namespace in NAMESPACE_TABLES],
+    )
+
+    for name, body in _triggers().items():
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Drop the cache version table and its triggers.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    for name in _triggers():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name};")
+    cursor.execute("DROP TABLE IF EXISTS cache_versions;")
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
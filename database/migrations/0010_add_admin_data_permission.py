@@ -0,0 +1,96 @@
+# pylint: disable=invalid-name
+"""
+migrations/0010_add_admin_data_permission.py
+
+Adds the permission that gives access to the admin endpoints exposing
+application data (e.g. the audit log export).
+
+Run:
+python -m database.migrations.0010_add_admin_data_permission upgrade
+
+Run rollback:
+python -m database.migrations.0010_add_admin_data_permission downgrade
+"""
+
+import sys
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_connection,
+)
+
+PERMISSION_NAME = "admin_data"
+
+
+def upgrade(connection=None):
+    """
+    Insert the `admin_data` permission.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        "INSERT OR IGNORE INTO permissions (name, description) VALUES (?, ?)",
+        (PERMISSION_NAME, "Access the admin data endpoints"),
+    )
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration applied successfully!")
+
+
+def downgrade(connection=None):
+    """
+    Delete the `admin_data` permission and its role assignments.
+
+    Args:
+        connection (sqlite3.Connection, optional): Connection of the migration runner,
+            which manages the transaction. Without it, the migration uses and commits
+            its own connection.
+
+    Raises:
+        sqlite3.DatabaseError: If there is an error executing the SQL query.
+    """
+    own_connection = connection is None
+    if own_connection:
+        connection = get_db_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        DELETE FROM role_permissions
+        WHERE permission_id IN (SELECT id FROM permissions WHERE name = ?)
+        """,
+        (PERMISSION_NAME,),
+    )
+    cursor.execute("DELETE FROM permissions WHERE name = ?", (PERMISSION_NAME,))
+
+    if own_connection:
+        commit_db_connection(connection)
+        close_db_connection(connection)
+        print("Migration rolled back successfully!")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        command = sys.argv[1].lower()
+        if command == "upgrade":
+            upgrade()
+        elif command == "downgrade":
+            downgrade()
+        else:
+            print("Invalid command. Use 'upgrade' or 'downgrade'.")
+    else:
+        print("Please specify 'upgrade' or 'downgrade'.")
@@ -0,0 +1,27 @@
+"""
+User Search Model
+"""
+
+
+def format_user_search_data(search_data):
+    """
+    Formats a user search result.
+
+    Args:
+        search_data (tuple): Tuple with the indexed fields of a user from the search index.
+
+    Returns:
+        dict: Formatted search result or None if no data is provided.
+    """
+    if search_data:
+        return {
+            "id": search_data[0],
+            "full_name": search_data[1],
+            "email": search_data[2],
+            "telegram_username": search_data[3],
+            "telegram_first_name": search_data[4],
+            "telegram_last_name": search_data[5],
+            "google_full_name": search_data[6],
+            "google_email": search_data[7],
+        }
+    return None
@@ -0,0 +1,121 @@
+# pylint: disable=R0801
+"""
+Audit Log Operations
+"""
+
+from datetime import datetime, timezone
+
+from database.audit_archive import normalize_timestamp
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
+)
+from database.models.audit_logs import format_audit_log_data
+
+# Rows read per query by `iter_audit_logs`
+AUDIT_EXPORT_CHUNK_ROWS = 1000
+
+
+def create_audit_logs(entries):
+    """
+    Inserts a batch of audit log entries in a single transaction.
+
+    When an entry has no user ID but has a Telegram ID, the user is resolved
+    from `auth_telegram` by the insert itself.
+
+    Args:
+        entries (list of tuples): (user_id, telegram_id, action, details, created_at) tuples.
+
+    Returns:
+        int: The number of inserted rows.
+    """
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.executemany(
+            """
+            INSERT INTO audit_logs (user_id, action, details, created_at)
+            VALUES (
+                COALESCE(?, (SELECT user_id FROM auth_telegram WHERE telegram_id = ?)),
+                ?, ?, ?
+            )
+            """,
+            entries,
+        )
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+
+    return cursor.rowcount
+
+
+def _created_at(value):
+    """Converts a datetime or ISO string to the UTC created_at format."""
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return normalize_timestamp(value)
+
+
+def iter_audit_logs(
+    user_id=None, action=None, start=None, end=None, chunk_rows=AUDIT_EXPORT_CHUNK_ROWS
+):
+    """
+    Yields the audit logs matching the filters in (created_at, id) order, a chunk at a time.
+
+    Each chunk is read with keyset pagination from the position after the
+    previous one, on a read connection that is released before the chunk is
+    yielded, so neither memory nor the read snapshot grow with the export.
+
+    Args:
+        user_id (int, optional): Only the logs of this user.
+        action (str, optional): Only the logs of this action.
+        start (datetime or str, optional): Inclusive lower bound of created_at (UTC if naive).
+        end (datetime or str, optional): Exclusive upper bound of created_at (UTC if naive).
+        chunk_rows (int): Maximum rows per chunk.
+
+    Yields:
+        list: Formatted audit logs.
+    """
+    filters, params = [], []
+    if user_id is not None:
+        filters.append("user_id = ?")
+        params.append(user_id)
+    if action is not None:
+        filters.append("action = ?")
+        params.append(action)
+    if start is not None:
+        filters.append("created_at >= ?")
+        params.append(_created_at(start))
+    if end is not None:
+        filters.append("created_at < ?")
+        params.append(_created_at(end))
+
+    position = None
+    while True:
+        where = list(filters)
+        page_params = list(params)
+        if position is not None:
+            where.append("(created_at, id) > (?, ?)")
+            page_params.extend(position)
+        sql = "SELECT id, user_id, action, details, created_at FROM audit_logs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at, id LIMIT ?"
+        page_params.append(chunk_rows)
+
+        connection = get_db_read_connection()
+        try:
+            rows = connection.execute(sql, page_params).fetchall()
+        finally:
+            close_db_connection(connection)
+
+        if not rows:
+            return
+        yield [format_audit_log_data(row) for row in rows]
+        if len(rows) < chunk_rows:
+            return
+        position = (rows[-1][4], rows[-1][0])
@@ -6,7 +6,8 @@ Google Authentication Operations
 from database.db_config import (
     close_db_connection,
     commit_db_connection,
-    get_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
 )
 
 
@@ -24,19 +25,21 @@ def create_auth_google(user_id, google_id, email, full_name, profile_picture=Non
     Returns:
         bool: True if creation was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute(
-        """
-        INSERT INTO auth_google (user_id, google_id, email, full_name, profile_picture)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        (user_id, google_id, email, full_name, profile_picture),
-    )
-
-    commit_db_connection(connection)
-    close_db_connection(connection)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            """
+            INSERT INTO auth_google (user_id, google_id, email, full_name, profile_picture)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (user_id, google_id, email, full_name, profile_picture),
+        )
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
 
     return cursor.rowcount > 0
 
@@ -51,7 +54,7 @@ def get_auth_google_by_user(user_id):
     Returns:
         tuple: Google authentication data or None.
     """
-    connection = get_db_connection()
+    connection = get_db_read_connection()
     cursor = connection.cursor()
 
     cursor.execute("SELECT * FROM auth_google WHERE user_id = ?", (user_id,))
@@ -71,11 +74,13 @@ def delete_auth_google_by_user(user_id):
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute("DELETE FROM auth_google WHERE user_id = ?", (user_id,))
-    commit_db_connection(connection)
-    close_db_connection(connection)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("DELETE FROM auth_google WHERE user_id = ?", (user_id,))
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
 
     return cursor.rowcount > 0
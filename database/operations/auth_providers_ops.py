@@ -6,7 +6,7 @@ Auth Providers Operations
 from database.db_config import (
     close_db_connection,
     commit_db_connection,
-    get_db_connection,
+    get_db_write_connection,
 )
 
 
@@ -22,19 +22,21 @@ def create_auth_provider(user_id, provider_name, provider_id):
     Returns:
         bool: True if creation was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
 
-    cursor.execute(
-        """
-        INSERT INTO auth_providers (user_id, provider_name, provider_id)
-        VALUES (?, ?, ?)
-        """,
-        (user_id, provider_name, provider_id),
-    )
+        cursor.execute(
+            """
+            INSERT INTO auth_providers (user_id, provider_name, provider_id)
+            VALUES (?, ?, ?)
+            """,
+            (user_id, provider_name, provider_id),
+        )
 
-    commit_db_connection(connection)
-    close_db_connection(connection)
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
 
     return cursor.rowcount > 0
 
@@ -49,11 +51,47 @@ def delete_auth_providers_by_user(user_id):
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
 
-    cursor.execute("DELETE FROM auth_providers WHERE user_id = ?", (user_id,))
-    commit_db_connection(connection)
-    close_db_connection(connection)
+        cursor.execute("DELETE FROM auth_providers WHERE user_id = ?", (user_id,))
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
 
     return cursor.rowcount > 0
+
+
+def update_last_logins(entries):
+    """
+    Updates the last login time of several provider accounts in a single transaction.
+
+    A stored time more recent than the new one is kept.
+
+    Args:
+        entries (list of tuples): (last_login, provider, provider_id) tuples;
+            `last_login` is a UTC timestamp ("YYYY-MM-DD HH:MM:SS").
+
+    Returns:
+        int: The number of updated rows.
+    """
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.executemany(
+            """
+            UPDATE auth_providers
+            SET last_login = ?1
+            WHERE provider_id = ?3 AND provider = ?2
+              AND (last_login IS NULL OR last_login < ?1)
+            """,
+            entries,
+        )
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+
+    return cursor.rowcount
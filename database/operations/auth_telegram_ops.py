@@ -6,8 +6,10 @@ Telegram Authentication Operations
 from database.db_config import (
     close_db_connection,
     commit_db_connection,
-    get_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
 )
+from database.permission_snapshot import invalidate_permission_snapshot
 
 
 def create_auth_telegram(
@@ -27,19 +29,22 @@ def create_auth_telegram(
     Returns:
         bool: True if creation was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute(
-        """
-        INSERT INTO auth_telegram (user_id, telegram_id, first_name, last_name, username, photo_url)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (user_id, telegram_id, first_name, last_name, username, photo_url),
-    )
-
-    commit_db_connection(connection)
-    close_db_connection(connection)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            """
+            INSERT INTO auth_telegram (user_id, telegram_id, first_name, last_name, username, photo_url)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (user_id, telegram_id, first_name, last_name, username, photo_url),
+        )
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
 
     return cursor.rowcount > 0
 
@@ -54,7 +59,7 @@ def get_auth_telegram_by_user(user_id):
     Returns:
         tuple: Telegram authentication data or None.
     """
-    connection = get_db_connection()
+    connection = get_db_read_connection()
     cursor = connection.cursor()
 
     cursor.execute("SELECT * FROM auth_telegram WHERE user_id = ?", (user_id,))
@@ -74,11 +79,14 @@ def delete_auth_telegram_by_user(user_id):
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute("DELETE FROM auth_telegram WHERE user_id = ?", (user_id,))
-    commit_db_connection(connection)
-    close_db_connection(connection)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("DELETE FROM auth_telegram WHERE user_id = ?", (user_id,))
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
 
     return cursor.rowcount > 0
@@ -0,0 +1,107 @@
+# pylint: disable=R0801
+"""
+Login Attempts Operations
+
+Failed login attempts are counted in memory by the login throttle (see
+`app/auth/login_throttle.py`), which writes the counters of
+`users.failed_attempts` / `users.last_failed_attempt` here in batches.
+"""
+
+import json
+
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
+)
+
+
+def get_user_ids_by_telegram_ids(telegram_ids):
+    """
+    Retrieves the users linked to several Telegram accounts with one query.
+
+    The IDs are passed as a single JSON array parameter (`json_each`), so the
+    statement text is the same for any number of accounts.
+
+    Args:
+        telegram_ids (iterable of int): Telegram IDs.
+
+    Returns:
+        dict: User ID by Telegram ID, for the accounts linked to a user.
+    """
+    ids = json.dumps(sorted({int(telegram_id) for telegram_id in telegram_ids}))
+    if ids == "[]":
+        return {}
+
+    connection = get_db_read_connection()
+    try:
+        rows = connection.execute(
+            "SELECT telegram_id, user_id FROM auth_telegram "
+            "WHERE telegram_id IN (SELECT value FROM json_each(?))",
+            (ids,),
+        ).fetchall()
+    finally:
+        close_db_connection(connection)
+    return dict(rows)
+
+
+def save_failed_login_attempts(updates):
+    """
+    Writes the failed login counters of several users in a single transaction.
+
+    Args:
+        updates (list of tuples): (failed_attempts, last_failed_attempt, user_id) tuples.
+            A None `last_failed_attempt` keeps the stored one (e.g. when a
+            successful login resets the counter).
+
+    Returns:
+        int: The number of updated users.
+    """
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.executemany(
+            """
+            UPDATE users
+            SET failed_attempts = ?, last_failed_attempt = COALESCE(?, last_failed_attempt)
+            WHERE id = ?
+            """,
+            updates,
+        )
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+
+    return cursor.rowcount
+
+
+def get_recent_failed_logins(since):
+    """
+    Retrieves the users with failed login attempts since a given time.
+
+    Args:
+        since (str): UTC timestamp ("YYYY-MM-DD HH:MM:SS").
+
+    Returns:
+        list: (user_id, failed_attempts, last_failed_attempt, telegram_id) tuples;
+            `telegram_id` is None for users without a Telegram account.
+    """
+    connection = get_db_read_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        SELECT u.id, u.failed_attempts, u.last_failed_attempt, t.telegram_id
+        FROM users u
+        LEFT JOIN auth_telegram t ON t.user_id = u.id
+        WHERE u.failed_attempts > 0 AND u.last_failed_attempt >= ?
+        """,
+        (since,),
+    )
+    rows = cursor.fetchall()
+
+    close_db_connection(connection)
+    return rows
@@ -3,13 +3,17 @@
 Permission Operations
 """
 
+from app.core.audit import record_audit_event
 from database.db_config import (
     close_db_connection,
     commit_db_connection,
-    get_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
+)
+from database.permission_snapshot import (
+    invalidate_permission_snapshot,
+    permission_snapshots,
 )
-
-from .role_permissions_ops import delete_role_permissions_by_permission
 
 
 def create_permission(name, description=None):
@@ -23,17 +27,24 @@ def create_permission(name, description=None):
     Returns:
         int: The ID of the newly created permission.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute(
-        "INSERT INTO permissions (name, description) VALUES (?, ?)", (name, description)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            "INSERT INTO permissions (name, description) VALUES (?, ?)", (name, description)
+        )
+
+        permission_id = cursor.lastrowid
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+
+    record_audit_event(
+        "role_change",
+        details={"operation": "create_permission", "permission_id": permission_id, "name": name},
     )
 
-    permission_id = cursor.lastrowid
-    commit_db_connection(connection)
-    close_db_connection(connection)
-
     return permission_id
 
 
@@ -41,19 +52,73 @@ def delete_permission(permission_id):
     """
     Deletes a permission and its related records.
 
+    The role assignments of the permission are deleted by the
+    `trg_permissions_delete_cascade` trigger within the same statement.
+
     Args:
         permission_id (int): Permission ID.
 
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM permissions WHERE id = ?", (permission_id,))
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
+
+    record_audit_event(
+        "role_change",
+        details={"operation": "delete_permission", "permission_id": permission_id},
+    )
+
+    return cursor.rowcount > 0
 
-    delete_role_permissions_by_permission(permission_id)
 
-    cursor = connection.cursor()
-    cursor.execute("DELETE FROM permissions WHERE id = ?", (permission_id,))
-    commit_db_connection(connection)
-    close_db_connection(connection)
+def telegram_user_has_permission(telegram_id, permission_name):
+    """
+    Checks whether the user linked to a Telegram account has a permission
+    through any of its roles, including the permissions the roles inherit.
 
-    return cursor.rowcount > 0
+    Args:
+        telegram_id (int or str): Telegram ID of the user (e.g. the `sub` of a JWT).
+        permission_name (str): Permission name.
+
+    Returns:
+        bool: True if the user has the permission, False otherwise (including
+            when `telegram_id` is not numeric).
+    """
+    try:
+        telegram_id = int(telegram_id)
+    except (TypeError, ValueError):
+        return False
+
+    # Answered from the shared permission snapshot when it is up to date
+    snapshot = permission_snapshots.current()
+    if snapshot is not None:
+        return snapshot.row_has(snapshot.telegram_row(telegram_id), permission_name)
+
+    connection = get_db_read_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            """
+            SELECT 1
+            FROM auth_telegram t
+            JOIN user_roles ur ON ur.user_id = t.user_id
+            JOIN role_closure c ON c.descendant_id = ur.role_id
+            JOIN role_permissions rp ON rp.role_id = c.ancestor_id
+            JOIN permissions p ON p.id = rp.permission_id
+            WHERE t.telegram_id = ? AND p.name = ?
+            LIMIT 1
+            """,
+            (telegram_id, permission_name),
+        )
+        has_permission = cursor.fetchone() is not None
+    finally:
+        close_db_connection(connection)
+    return has_permission
@@ -0,0 +1,248 @@
+# pylint: disable=R0801
+"""
+Role Hierarchy Operations
+
+A role inherits the permissions of its parent roles, and of their parents.
+The `role_closure` table (see migration `0006`) is kept up to date by
+triggers, so these operations only write `role_inheritance`, and every read
+is a plain indexed join on the closure.
+"""
+
+import sqlite3
+
+from app.core.audit import record_audit_event
+from database.db_config import (
+    close_db_connection,
+    commit_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
+)
+from database.exceptions.validation_exceptions import (
+    RoleHierarchyCycleError,
+    RoleNotFoundError,
+)
+from database.models.permissions import format_permission_data
+from database.models.roles import format_role_data
+from database.permission_snapshot import invalidate_permission_snapshot
+
+
+def add_parent_role(role_id, parent_role_id):
+    """
+    Makes a role inherit from a parent role.
+
+    Args:
+        role_id (int): ID of the inheriting role.
+        parent_role_id (int): ID of the parent role.
+
+    Returns:
+        bool: True if the edge was added, False if it already existed.
+
+    Raises:
+        RoleNotFoundError: If either role does not exist.
+        RoleHierarchyCycleError: If the parent is the role itself or one of its descendants.
+    """
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        try:
+            cursor.execute(
+                """
+                INSERT OR IGNORE INTO role_inheritance (role_id, parent_role_id)
+                SELECT ?, ?
+                WHERE EXISTS (SELECT 1 FROM roles WHERE id = ?)
+                  AND EXISTS (SELECT 1 FROM roles WHERE id = ?)
+                """,
+                (role_id, parent_role_id, role_id, parent_role_id),
+            )
+        except sqlite3.IntegrityError as error:
+            raise RoleHierarchyCycleError() from error
+        added = cursor.rowcount > 0
+        if not added and not _edge_exists(cursor, role_id, parent_role_id):
+            raise RoleNotFoundError(message="Role not found.")
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
+
+    if added:
+        record_audit_event(
+            "role_change",
+            details={
+                "operation": "add_parent_role",
+                "role_id": role_id,
+                "parent_role_id": parent_role_id,
+            },
+        )
+    return added
+
+
+def remove_parent_role(role_id, parent_role_id):
+    """
+    Stops a role from inheriting from a parent role.
+
+    Args:
+        role_id (int): ID of the inheriting role.
+        parent_role_id (int): ID of the parent role.
+
+    Returns:
+        bool: True if the edge was removed, False if it did not exist.
+    """
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            "DELETE FROM role_inheritance WHERE role_id = ? AND parent_role_id = ?",
+            (role_id, parent_role_id),
+        )
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
+
+    removed = cursor.rowcount > 0
+    if removed:
+        record_audit_event(
+            "role_change",
+            details={
+                "operation": "remove_parent_role",
+                "role_id": role_id,
+                "parent_role_id": parent_role_id,
+            },
+        )
+    return removed
+
+
+def get_parent_roles(role_id):
+    """
+    Retrieves the direct parent roles of a role.
+
+    Args:
+        role_id (int): Role ID.
+
+    Returns:
+        list: A list of dictionaries, each containing a role's data.
+    """
+    connection = get_db_read_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        SELECT r.*
+        FROM role_inheritance i
+        JOIN roles r ON r.id = i.parent_role_id
+        WHERE i.role_id = ?
+        ORDER BY r.id
+        """,
+        (role_id,),
+    )
+    roles = [format_role_data(role) for role in cursor.fetchall()]
+
+    close_db_connection(connection)
+    return roles
+
+
+def get_ancestor_roles(role_id):
+    """
+    Retrieves every role a role inherits from, directly or not.
+
+    Args:
+        role_id (int): Role ID.
+
+    Returns:
+        list: A list of dictionaries, each containing a role's data.
+    """
+    connection = get_db_read_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        SELECT r.*
+        FROM role_closure c
+        JOIN roles r ON r.id = c.ancestor_id
+        WHERE c.descendant_id = ? AND c.ancestor_id != c.descendant_id
+        ORDER BY r.id
+        """,
+        (role_id,),
+    )
+    roles = [format_role_data(role) for role in cursor.fetchall()]
+
+    close_db_connection(connection)
+    return roles
+
+
+def get_effective_permissions(role_id):
+    """
+    Retrieves the permissions of a role, including the inherited ones.
+
+    Args:
+        role_id (int): Role ID.
+
+    Returns:
+        list: A list of dictionaries, each containing a permission's data.
+    """
+    connection = get_db_read_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        SELECT p.*
+        FROM permissions p
+        WHERE p.id IN (
+            SELECT rp.permission_id
+            FROM role_closure c
+            JOIN role_permissions rp ON rp.role_id = c.ancestor_id
+            WHERE c.descendant_id = ?
+        )
+        ORDER BY p.id
+        """,
+        (role_id,),
+    )
+    permissions = [format_permission_data(permission) for permission in cursor.fetchall()]
+
+    close_db_connection(connection)
+    return permissions
+
+
+def get_user_effective_permissions(user_id):
+    """
+    Retrieves the permissions of a user through all its roles and their ancestors.
+
+    Args:
+        user_id (int): User ID.
+
+    Returns:
+        list: A list of dictionaries, each containing a permission's data.
+    """
+    connection = get_db_read_connection()
+    cursor = connection.cursor()
+
+    cursor.execute(
+        """
+        SELECT p.*
+        FROM permissions p
+        WHERE p.id IN (
+            SELECT rp.permission_id
+            FROM user_roles ur
+            JOIN role_closure c ON c.descendant_id = ur.role_id
+            JOIN role_permissions rp ON rp.role_id = c.ancestor_id
+            WHERE ur.user_id = ?
+        )
+        ORDER BY p.id
+        """,
+        (user_id,),
+    )
+    permissions = [format_permission_data(permission) for permission in cursor.fetchall()]
+
+    close_db_connection(connection)
+    return permissions
+
+
+def _edge_exists(cursor, role_id, parent_role_id):
+    cursor.execute(
+        "SELECT 1 FROM role_inheritance WHERE role_id = ? AND parent_role_id = ?",
+        (role_id, parent_role_id),
+    )
+    return cursor.fetchone() is not None
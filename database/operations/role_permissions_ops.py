@@ -3,11 +3,13 @@
 Role Permission Operations
 """
 
+from app.core.audit import record_audit_event
 from database.db_config import (
     close_db_connection,
     commit_db_connection,
-    get_db_connection,
+    get_db_write_connection,
 )
+from database.permission_snapshot import invalidate_permission_snapshot
 
 
 def assign_permission_to_role(role_id, permission_id):
@@ -21,17 +23,29 @@ def assign_permission_to_role(role_id, permission_id):
     Returns:
         bool: True if assignment was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute(
-        "INSERT INTO role_permissions (role_id, permission_id) VALUES (?, ?)",
-        (role_id, permission_id),
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            "INSERT INTO role_permissions (role_id, permission_id) VALUES (?, ?)",
+            (role_id, permission_id),
+        )
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
+
+    record_audit_event(
+        "role_change",
+        details={
+            "operation": "assign_permission",
+            "role_id": role_id,
+            "permission_id": permission_id,
+        },
     )
 
-    commit_db_connection(connection)
-    close_db_connection(connection)
-
     return cursor.rowcount > 0
 
 
@@ -45,12 +59,15 @@ def delete_role_permissions_by_role(role_id):
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
 
-    cursor.execute("DELETE FROM role_permissions WHERE role_id = ?", (role_id,))
-    commit_db_connection(connection)
-    close_db_connection(connection)
+        cursor.execute("DELETE FROM role_permissions WHERE role_id = ?", (role_id,))
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
 
     return cursor.rowcount > 0
 
@@ -65,13 +82,16 @@ def delete_role_permissions_by_permission(permission_id):
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute(
-        "DELETE FROM role_permissions WHERE permission_id = ?", (permission_id,)
-    )
-    commit_db_connection(connection)
-    close_db_connection(connection)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            "DELETE FROM role_permissions WHERE permission_id = ?", (permission_id,)
+        )
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
 
     return cursor.rowcount > 0
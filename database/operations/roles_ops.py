@@ -1,21 +1,28 @@
 # pylint: disable=R0801
 """
 Role Operations
+
+Role reads are cached per process (`VersionedCache`) and dropped whenever a
+commit changes the `roles` table, in this process or another one (see
+`database/cache_versions.py`).
 """
 
+from app.core.audit import record_audit_event
+from database.cache_versions import VersionedCache, cache_versions
 from database.db_config import (
     close_db_connection,
     commit_db_connection,
-    get_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
 )
+from database.exceptions.validation_exceptions import RoleNotFoundError
 from database.models.roles import format_role_data
-from database.validations.role_validations import (
-    validate_role_existence,
-    validate_role_name,
-)
+from database.permission_snapshot import invalidate_permission_snapshot
+from database.validations.role_validations import validate_role_name
 
-from .role_permissions_ops import delete_role_permissions_by_role
-from .user_roles_ops import delete_user_roles_by_role
+# Role rows (tuples) by ID, and the tuple of every row under ALL_ROLES
+_role_rows = VersionedCache("roles")
+ALL_ROLES = "*"
 
 
 def create_role(name, description=None):
@@ -32,17 +39,23 @@ def create_role(name, description=None):
     # Validate the role name before creating it
     validate_role_name(name)
 
-    connection = get_db_connection()
-    cursor = connection.cursor()
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
 
-    cursor.execute(
-        "INSERT INTO roles (name, description) VALUES (?, ?)", (name, description)
-    )
+        cursor.execute(
+            "INSERT INTO roles (name, description) VALUES (?, ?)", (name, description)
+        )
 
-    role_id = cursor.lastrowid
-    commit_db_connection(connection)
-    close_db_connection(connection)
+        role_id = cursor.lastrowid
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    cache_versions.expire()
 
+    record_audit_event(
+        "role_change", details={"operation": "create_role", "role_id": role_id, "name": name}
+    )
     return role_id
 
 
@@ -50,62 +63,103 @@ def update_role(role_id, name=None, description=None):
     """
     Updates an existing role with new name and/or description.
 
+    The changed columns are written with a single UPDATE; a role that does not
+    exist is detected from the number of updated rows.
+
     Args:
         role_id (int): The ID of the role to update.
         name (str, optional): New role name.
         description (str, optional): New role description.
 
     Returns:
-        bool: True if the update was successful, False otherwise.
-    """
-    # Validate that the role exists before updating it
-    validate_role_existence(role_id)
+        bool: True if the update was successful.
 
+    Raises:
+        RoleNotFoundError: If the role does not exist.
+    """
     # Validate the new role name if provided
     if name:
         validate_role_name(name)
 
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    # Update the role name and/or description
+    assignments = ["updated_at = CURRENT_TIMESTAMP"]
+    params = []
     if name:
-        cursor.execute("UPDATE roles SET name = ? WHERE id = ?", (name, role_id))
+        assignments.append("name = ?")
+        params.append(name)
     if description:
+        assignments.append("description = ?")
+        params.append(description)
+
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
         cursor.execute(
-            "UPDATE roles SET description = ? WHERE id = ?", (description, role_id)
+            f"UPDATE roles SET {', '.join(assignments)} WHERE id = ?", (*params, role_id)
         )
+        if cursor.rowcount == 0:
+            raise RoleNotFoundError(message="Role not found.")
 
-    commit_db_connection(connection)
-    close_db_connection(connection)
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    cache_versions.expire()
 
-    return cursor.rowcount > 0
+    record_audit_event(
+        "role_change", details={"operation": "update_role", "role_id": role_id, "name": name}
+    )
+    return True
 
 
 def delete_role(role_id):
     """
     Deletes a role and its related records.
 
+    The user and permission assignments of the role are deleted by the
+    `trg_roles_delete_cascade` trigger within the same statement.
+
     Args:
         role_id (int): Role ID.
 
     Returns:
-        bool: True if deletion was successful, False otherwise.
+        bool: True if deletion was successful.
+
+    Raises:
+        RoleNotFoundError: If the role does not exist.
     """
-    # Validate that the role exists before attempting deletion
-    validate_role_existence(role_id)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("DELETE FROM roles WHERE id = ?", (role_id,))
+        if cursor.rowcount == 0:
+            raise RoleNotFoundError(message="Role not found.")
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    cache_versions.expire()
+    invalidate_permission_snapshot()
 
-    connection = get_db_connection()
+    record_audit_event("role_change", details={"operation": "delete_role", "role_id": role_id})
+    return True
 
-    delete_user_roles_by_role(role_id)
-    delete_role_permissions_by_role(role_id)
 
+def _query_roles(role_id=None):
+    """Reads one role row (or None), or every role row if `role_id` is None."""
+    connection = get_db_read_connection()
     cursor = connection.cursor()
-    cursor.execute("DELETE FROM roles WHERE id = ?", (role_id,))
-    commit_db_connection(connection)
+
+    if role_id is None:
+        cursor.execute("SELECT * FROM roles")
+        result = tuple(cursor.fetchall())
+    else:
+        cursor.execute("SELECT * FROM roles WHERE id = ?", (role_id,))
+        result = cursor.fetchone()
+
     close_db_connection(connection)
 
-    return cursor.rowcount > 0
+    return result
 
 
 def get_role_by_id(role_id):
@@ -118,17 +172,8 @@ def get_role_by_id(role_id):
     Returns:
         dict: A dictionary containing the role's data, or None if not found.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute("SELECT * FROM roles WHERE id = ?", (role_id,))
-    role_data = cursor.fetchone()
-
-    role = format_role_data(role_data)
-
-    close_db_connection(connection)
-
-    return role
+    role_data = _role_rows.get(role_id, lambda: _query_roles(role_id))
+    return format_role_data(role_data)
 
 
 def get_all_roles():
@@ -138,14 +183,5 @@ def get_all_roles():
     Returns:
         list: A list of dictionaries, each containing a role's data.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute("SELECT * FROM roles")
-    roles_data = cursor.fetchall()
-
-    roles = [format_role_data(role) for role in roles_data]
-
-    close_db_connection(connection)
-
-    return roles
+    roles_data = _role_rows.get(ALL_ROLES, _query_roles)
+    return [format_role_data(role) for role in roles_data]
@@ -0,0 +1,82 @@
+# pylint: disable=R0801
+"""
+User Profile Operations
+
+Loads complete user profiles (the user, its Telegram and Google data and its
+authentication providers) for any number of users with four queries: one per
+table, each receiving all the IDs as a single JSON array parameter
+(`json_each`), so the statement text is the same for any number of users and
+stays in the statement cache. The queries run in one read transaction and
+see the same snapshot.
+"""
+
+import json
+
+from database.db_config import close_db_connection, get_db_read_connection
+from database.models.user_with_auths import format_user_with_auths
+
+# IDs of the batch, as a table
+_IDS = "SELECT value FROM json_each(?)"
+
+
+def get_user_profiles(user_ids):
+    """
+    Retrieves the complete profiles of several users.
+
+    Args:
+        user_ids (iterable of int): User IDs; duplicates are loaded once.
+
+    Returns:
+        dict: User ID -> profile formatted by `format_user_with_auths`, for the
+            users that exist.
+    """
+    ids = json.dumps(sorted({int(user_id) for user_id in user_ids}))
+    if ids == "[]":
+        return {}
+
+    connection = get_db_read_connection()
+    try:
+        connection.execute("BEGIN")
+        users = connection.execute(
+            f"SELECT * FROM users WHERE id IN ({_IDS})", (ids,)
+        ).fetchall()
+        telegram = {
+            row[1]: row
+            for row in connection.execute(
+                f"SELECT * FROM auth_telegram WHERE user_id IN ({_IDS})", (ids,)
+            )
+        }
+        google = {
+            row[1]: row
+            for row in connection.execute(
+                f"SELECT * FROM auth_google WHERE user_id IN ({_IDS})", (ids,)
+            )
+        }
+        providers = {}
+        for row in connection.execute(
+            f"SELECT * FROM auth_providers WHERE user_id IN ({_IDS}) ORDER BY id", (ids,)
+        ):
+            providers.setdefault(row[1], []).append(row)
+    finally:
+        # Releasing the connection ends the read transaction
+        close_db_connection(connection)
+
+    return {
+        user[0]: format_user_with_auths(
+            user, telegram.get(user[0]), google.get(user[0]), providers.get(user[0])
+        )
+        for user in users
+    }
+
+
+def get_user_profile(user_id):
+    """
+    Retrieves the complete profile of a user.
+
+    Args:
+        user_id (int): User ID.
+
+    Returns:
+        dict: Profile formatted by `format_user_with_auths`, or None if not found.
+    """
+    return get_user_profiles([user_id]).get(user_id)
@@ -3,11 +3,13 @@
 User Role Operations
 """
 
+from app.core.audit import record_audit_event
 from database.db_config import (
     close_db_connection,
     commit_db_connection,
-    get_db_connection,
+    get_db_write_connection,
 )
+from database.permission_snapshot import invalidate_permission_snapshot
 
 
 def assign_role_to_user(user_id, role_id):
@@ -21,16 +23,25 @@ def assign_role_to_user(user_id, role_id):
     Returns:
         bool: True if assignment was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute(
-        "INSERT INTO user_roles (user_id, role_id) VALUES (?, ?)", (user_id, role_id)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute(
+            "INSERT INTO user_roles (user_id, role_id) VALUES (?, ?)", (user_id, role_id)
+        )
+
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
+
+    record_audit_event(
+        "role_change",
+        user_id=user_id,
+        details={"operation": "assign_role", "role_id": role_id},
     )
 
-    commit_db_connection(connection)
-    close_db_connection(connection)
-
     return cursor.rowcount > 0
 
 
@@ -44,12 +55,19 @@ def delete_user_roles_by_user(user_id):
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute("DELETE FROM user_roles WHERE user_id = ?", (user_id,))
-    commit_db_connection(connection)
-    close_db_connection(connection)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("DELETE FROM user_roles WHERE user_id = ?", (user_id,))
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
+
+    record_audit_event(
+        "role_change", user_id=user_id, details={"operation": "remove_user_roles"}
+    )
 
     return cursor.rowcount > 0
 
@@ -64,11 +82,14 @@ def delete_user_roles_by_role(role_id):
     Returns:
         bool: True if deletion was successful, False otherwise.
     """
-    connection = get_db_connection()
-    cursor = connection.cursor()
-
-    cursor.execute("DELETE FROM user_roles WHERE role_id = ?", (role_id,))
-    commit_db_connection(connection)
-    close_db_connection(connection)
+    connection = get_db_write_connection()
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("DELETE FROM user_roles WHERE role_id = ?", (role_id,))
+        commit_db_connection(connection)
+    finally:
+        close_db_connection(connection)
+    invalidate_permission_snapshot()
 
     return cursor.rowcount > 0
@@ -0,0 +1,127 @@
+# pylint: disable=R0801
+"""
+User Search Operations
+
+Full-text search over the `user_search` FTS5 index (see migration `0005`).
+Each word of the query matches as a prefix (whole words rank higher) and all
+of them must match. Results are ordered by relevance (BM25) and paginated with an opaque cursor
+holding the rank and ID of the last result, so deep pages do not re-read the
+results of the previous ones.
+"""
+
+import base64
+import re
+
+from database.db_config import close_db_connection, get_db_read_connection
+from database.models.user_search import format_user_search_data
+
+# Words beyond this number are ignored
+MAX_QUERY_TERMS = 8
+
+
+def build_match_query(query):
+    """
+    Builds an FTS5 MATCH expression from a free-text query.
+
+    Only the words of the query are kept (FTS5 syntax is never interpreted).
+    Each word matches as itself or as a prefix; a whole-word match counts
+    twice, so it ranks above words that only start with it. Single
+    characters are not used as prefixes, since they match too many rows.
+
+    Args:
+        query (str): Text typed by the user.
+
+    Returns:
+        str: The MATCH expression, or None if the query has no words.
+    """
+    terms = re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+    if not terms:
+        return None
+    return " AND ".join(
+        f'("{term}" OR "{term}"*)' if len(term) > 1 else f'"{term}"' for term in terms
+    )
+
+
+def encode_search_cursor(rank, user_id):
+    """
+    Encodes the position after a search result.
+
+    Args:
+        rank (float): Rank of the result.
+        user_id (int): User ID of the result.
+
+    Returns:
+        str: URL-safe cursor.
+    """
+    return base64.urlsafe_b64encode(f"{rank!r}:{user_id}".encode()).decode()
+
+
+def decode_search_cursor(cursor):
+    """
+    Decodes a cursor returned by `search_users`.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        tuple: (rank, user_id).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        rank, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return float(rank), int(user_id)
+    except (ValueError, UnicodeDecodeError) as error:
+        raise ValueError("Invalid search cursor.") from error
+
+
+def search_users(query, limit=20, cursor=None):
+    """
+    Searches users by name, email, Telegram username and names, and Google name and email.
+
+    Args:
+        query (str): Free-text query; every word matches as a prefix.
+        limit (int): Maximum number of results.
+        cursor (str, optional): `next_cursor` of the previous page.
+
+    Returns:
+        dict: `results` (list of formatted search results, best first) and
+            `next_cursor` (str, or None on the last page).
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return {"results": [], "next_cursor": None}
+
+    sql = """
+        SELECT rowid, full_name, email, telegram_username, telegram_first_name,
+               telegram_last_name, google_full_name, google_email, rank
+        FROM user_search
+        WHERE user_search MATCH ?
+    """
+    params = [match]
+    if cursor:
+        rank, user_id = decode_search_cursor(cursor)
+        sql += " AND (rank > ? OR (rank = ? AND rowid > ?))"
+        params += [rank, rank, user_id]
+    sql += " ORDER BY rank, rowid LIMIT ?"
+    # One extra row tells whether there is a next page
+    params.append(limit + 1)
+
+    connection = get_db_read_connection()
+    try:
+        rows = connection.execute(sql, params).fetchall()
+    finally:
+        close_db_connection(connection)
+
+    page = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_search_cursor(page[-1][8], page[-1][0])
+    return {
+        "results": [format_user_search_data(row[:8]) for row in page],
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,594 @@
+"""
+Permission Snapshot
+
+This module publishes the effective permissions of every user (roles,
+inherited roles, role permissions) as a binary snapshot file next to the
+database, which every worker process of the host memory-maps. The matrix is
+stored once per host, lookups read it in place (no copy, no query), and an
+update is a new file atomically replacing the old one.
+
+How it works:
+- `build_permission_snapshot()` reads the tables in one read transaction,
+  computes one permission bitset per user with roles, and writes the file
+  next to the old one before `os.replace`-ing it. Builds take a lock file,
+  so a build always reads a newer database state than the file it replaces,
+  and a build is skipped when the current file was read from the database
+  after the change that requested it.
+- The header carries a version, incremented by every build. Readers compare
+  the file's inode and version at most every `PERMISSION_SNAPSHOT_CHECK_INTERVAL`
+  seconds, and swap to the new mapping when they change. The old mapping is
+  released once no lookup uses it anymore.
+- Operations that change roles, permissions or their assignments call
+  `invalidate_permission_snapshot()`: the process stops using the snapshot
+  (lookups fall back to SQL) and its `PermissionSnapshotStore` worker
+  rebuilds it. The other processes pick up the new file on their next check.
+- The header also records the version of the "permissions" cache namespace
+  the data was read at (see `database/cache_versions.py`). On their check,
+  the stores also check the cache versions: a change committed by any
+  process (or tool) that the published file does not include invalidates
+  the snapshot, and the first store to rebuild publishes it for all.
+
+File layout (little-endian):
+    header    magic, format, version, build time, source version, permission count,
+              words per row, user count, Telegram account count, names length
+    names     JSON list of the permission names (bit i = names[i]), padded to 8 bytes
+    users     user IDs, sorted (int64)
+    telegram  Telegram IDs, sorted (int64), then their user rows (uint32)
+    matrix    one row of `words per row` uint64 bitsets per user
+
+Usage:
+
+    python -m database.permission_snapshot build
+    python -m database.permission_snapshot show
+"""
+
+import argparse
+import bisect
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, FrozenSet, List, Optional
+
+from app.core.background import PeriodicWorker
+from app.core.logging import logger
+from app.core.settings import (
+    PERMISSION_SNAPSHOT,
+    PERMISSION_SNAPSHOT_CHECK_INTERVAL,
+    PERMISSION_SNAPSHOT_PATH,
+)
+from database.cache_versions import cache_versions
+from database.db_config import close_db_connection, get_db_path, get_db_read_connection
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows: builds are not serialized between processes
+    fcntl = None  # pylint: disable=invalid-name
+
+MAGIC = b"JKPS"
+FORMAT = 2
+HEADER = struct.Struct("<4sIQdQIIIII")
+
+
+def snapshot_path() -> str:
+    """
+    Returns the path of the snapshot file: `PERMISSION_SNAPSHOT_PATH`, or next to the database.
+
+    Returns:
+        str: Path of the snapshot file.
+    """
+    return PERMISSION_SNAPSHOT_PATH or f"{get_db_path()}.permissions"
+
+
+class PermissionSnapshot:
+    """
+    Read-only view of a snapshot file, memory-mapped.
+
+    Attributes:
+        path (str): Path of the file.
+        version (int): Version written in the header.
+        built_at (float): UNIX time at which the data was read from the database.
+        source_version (int): Version of the "permissions" namespace the data was read at.
+        inode (tuple): (device, inode) of the mapped file.
+        permissions (list): Permission names, by bit.
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as snapshot_file:
+            stat = os.fstat(snapshot_file.fileno())
+            self._mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.inode = (stat.st_dev, stat.st_ino)
+
+        view = memoryview(self._mmap)
+        (
+            magic,
+            fmt,
+            version,
+            built_at,
+            source_version,
+            permissions,
+            words,
+            users,
+            accounts,
+            names_length,
+        ) = HEADER.unpack_from(view)
+        if magic != MAGIC or fmt != FORMAT:
+            raise ValueError(f"{path} is not a permission snapshot (format {FORMAT})")
+        self.version = version
+        self.built_at = built_at
+        self.source_version = source_version
+        self.words = words
+
+        offset = HEADER.size
+        self.permissions: List[str] = json.loads(bytes(view[offset : offset + names_length]))
+        self._bits: Dict[str, int] = {name: bit for bit, name in enumerate(self.permissions)}
+        offset += _padded(names_length)
+        self._users = view[offset : offset + 8 * users].cast("q")
+        offset += 8 * users
+        self._accounts = view[offset : offset + 8 * accounts].cast("q")
+        offset += 8 * accounts
+        self._account_rows = view[offset : offset + 4 * accounts].cast("I")
+        offset += _padded(4 * accounts)
+        self._matrix = view[offset : offset + 8 * words * users].cast("Q")
+        if len(self.permissions) != permissions or len(self._matrix) != words * users:
+            raise ValueError(f"{path} is truncated or corrupted")
+
+    @property
+    def user_count(self) -> int:
+        """Number of users with at least one role."""
+        return len(self._users)
+
+    def user_row(self, user_id: int) -> Optional[int]:
+        """
+        Returns the matrix row of a user.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            int: Row index, or None if the user has no role.
+        """
+        return _find(self._users, user_id)
+
+    def telegram_row(self, telegram_id: int) -> Optional[int]:
+        """
+        Returns the matrix row of the user of a Telegram account.
+
+        Args:
+            telegram_id (int): Telegram ID.
+
+        Returns:
+            int: Row index, or None if the account's user has no role.
+        """
+        index = _find(self._accounts, telegram_id)
+        return None if index is None else self._account_rows[index]
+
+    def row_has(self, row: Optional[int], permission_name: str) -> bool:
+        """
+        Checks a permission in a matrix row.
+
+        Args:
+            row (int, optional): Row index (None: no permission at all).
+            permission_name (str): Permission name.
+
+        Returns:
+            bool: True if the row has the permission.
+        """
+        bit = self._bits.get(permission_name)
+        if row is None or bit is None:
+            return False
+        word = self._matrix[row * self.words + bit // 64]
+        return bool(word >> (bit % 64) & 1)
+
+    def user_permissions(self, user_id: int) -> FrozenSet[str]:
+        """
+        Returns the names of a user's effective permissions.
+
+        Args:
+            user_id (int): User ID.
+
+        Returns:
+            frozenset: Permission names.
+        """
+        row = self.user_row(user_id)
+        if row is None:
+            return frozenset()
+        return frozenset(name for name in self.permissions if self.row_has(row, name))
+
+
+def _padded(length: int) -> int:
+    return (length + 7) // 8 * 8
+
+
+def _find(keys, key: int) -> Optional[int]:
+    index = bisect.bisect_left(keys, key)
+    if index < len(keys) and keys[index] == key:
+        return index
+    return None
+
+
+def _read_tables(connection):
+    """Reads what the snapshot is made of, in one read transaction."""
+    connection.execute("BEGIN")
+    try:
+        built_at = time.time()
+        try:
+            row = connection.execute(
+                "SELECT version FROM cache_versions WHERE namespace = 'permissions'"
+            ).fetchone()
+        except sqlite3.OperationalError:  # Not migrated yet
+            row = None
+        source_version = row[0] if row else 0
+        permissions = connection.execute(
+            "SELECT id, name FROM permissions ORDER BY name"
+        ).fetchall()
+        names = [name for _, name in permissions]
+        bits = {permission_id: bit for bit, (permission_id, _) in enumerate(permissions)}
+        role_masks: Dict[int, int] = {}
+        for role_id, permission_id in connection.execute(
+            """
+            SELECT c.descendant_id, rp.permission_id
+            FROM role_closure c
+            JOIN role_permissions rp ON rp.role_id = c.ancestor_id
+            """
+        ):
+            if permission_id in bits:
+                role_masks[role_id] = role_masks.get(role_id, 0) | 1 << bits[permission_id]
+        user_masks: Dict[int, int] = {}
+        for user_id, role_id in connection.execute(
+            "SELECT user_id, role_id FROM user_roles ORDER BY user_id"
+        ):
+            user_masks[user_id] = user_masks.get(user_id, 0) | role_masks.get(role_id, 0)
+        accounts = connection.execute(
+            """
+            SELECT t.telegram_id, t.user_id
+            FROM auth_telegram t
+            WHERE t.user_id IN (SELECT user_id FROM user_roles)
+            ORDER BY t.telegram_id
+            """
+        ).fetchall()
+    finally:
+        connection.rollback()
+    return built_at, source_version, names, user_masks, accounts
+
+
+def encode_snapshot(
+    version: int,
+    built_at: float,
+    names: List[str],
+    user_masks: Dict[int, int],
+    accounts,
+    source_version: int = 0,
+) -> bytes:
+    """
+    Encodes a snapshot.
+
+    Args:
+        version (int): Version of the snapshot.
+        built_at (float): UNIX time at which the data was read.
+        names (list): Permission names, by bit.
+        user_masks (dict): Permission bitset by user ID.
+        accounts (list): (telegram_id, user_id) pairs, sorted by Telegram ID.
+        source_version (int): Version of the "permissions" namespace the data was read at.
+
+    Returns:
+        bytes: The snapshot file content.
+    """
+    words = max(1, (len(names) + 63) // 64)
+    users = sorted(user_masks)
+    rows = {user_id: row for row, user_id in enumerate(users)}
+    accounts = [(telegram_id, user_id) for telegram_id, user_id in accounts if user_id in rows]
+
+    names_blob = json.dumps(names, separators=(",", ":")).encode()
+    matrix = array("Q")
+    word_mask = (1 << 64) - 1
+    for user_id in users:
+        mask = user_masks[user_id]
+        matrix.extend((mask >> (64 * word)) & word_mask for word in range(words))
+    account_rows = array("I", [rows[user_id] for _, user_id in accounts]).tobytes()
+
+    return b"".join(
+        (
+            HEADER.pack(
+                MAGIC,
+                FORMAT,
+                version,
+                built_at,
+                source_version,
+                len(names),
+                words,
+                len(users),
+                len(accounts),
+                len(names_blob),
+            ),
+            names_blob.ljust(_padded(len(names_blob)), b"\0"),
+            array("q", users).tobytes(),
+            array("q", [telegram_id for telegram_id, _ in accounts]).tobytes(),
+            account_rows.ljust(_padded(len(account_rows)), b"\0"),
+            matrix.tobytes(),
+        )
+    )
+
+
+def read_header(path: str) -> tuple:
+    """
+    Returns the version, build time and source version of a snapshot file.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        tuple: (version, built_at, source_version), (0, 0.0, 0) if there is no valid snapshot.
+    """
+    try:
+        with open(path, "rb") as snapshot_file:
+            magic, fmt, version, built_at, source_version, *_ = HEADER.unpack(
+                snapshot_file.read(HEADER.size)
+            )
+    except (OSError, struct.error):
+        return 0, 0.0, 0
+    if magic != MAGIC or fmt != FORMAT:
+        return 0, 0.0, 0
+    return version, built_at, source_version
+
+
+def build_permission_snapshot(
+    path: Optional[str] = None,
+    requested_at: Optional[float] = None,
+    min_version: Optional[int] = None,
+):
+    """
+    Builds the snapshot from the database and atomically replaces the file.
+
+    With neither `requested_at` nor `min_version`, the snapshot is always built.
+
+    Args:
+        path (str, optional): Snapshot file (default: `snapshot_path()`).
+        requested_at (float, optional): UNIX time at which the data was known to
+            change. Nothing is built if the current file was read from the
+            database after it (and includes `min_version`).
+        min_version (int, optional): Version of the "permissions" namespace the
+            snapshot must include. Nothing is built if the current file
+            includes it (and was read after `requested_at`).
+
+    Returns:
+        int: Version of the published snapshot, or None if the build was skipped.
+    """
+    path = path or snapshot_path()
+    with open(f"{path}.lock", "a", encoding="utf-8") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # Released when the file is closed
+        current_version, current_built_at, current_source = read_header(path)
+        if (
+            (requested_at is not None or min_version is not None)
+            and (requested_at is None or current_built_at > requested_at)
+            and (min_version is None or current_source >= min_version)
+            and current_version
+        ):
+            return None  # Another build read the database after the change
+
+        start = time.perf_counter()
+        connection = get_db_read_connection()
+        try:
+            built_at, source_version, names, user_masks, accounts = _read_tables(connection)
+        finally:
+            close_db_connection(connection)
+        version = current_version + 1
+        content = encode_snapshot(
+            version, built_at, names, user_masks, accounts, source_version=source_version
+        )
+
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as snapshot_file:
+            snapshot_file.write(content)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        os.replace(temporary, path)
+
+    logger.info(
+        "Permission snapshot %s published: %d users, %d permissions, %d bytes in %.3fs.",
+        version,
+        len(user_masks),
+        len(names),
+        len(content),
+        time.perf_counter() - start,
+    )
+    return version
+
+
+class PermissionSnapshotStore(PeriodicWorker):
+    """
+    The snapshot used by this process: reloaded when a new file is published,
+    rebuilt by the worker thread after `invalidate()`.
+
+    The store is only used after `load()` (called by the application
+    lifespan), so tools running without it always query the database.
+
+    Attributes:
+        check_interval (float): Seconds between two checks for a new file.
+        enabled (bool): Whether the snapshot can be used at all.
+        active (bool): Whether lookups use the snapshot (set by `load()`).
+    """
+
+    def __init__(
+        self,
+        check_interval: float = PERMISSION_SNAPSHOT_CHECK_INTERVAL,
+        enabled: bool = PERMISSION_SNAPSHOT,
+    ):
+        super().__init__("permission-snapshot", 60.0)
+        self.check_interval = check_interval
+        self.enabled = enabled
+        self.active = False
+        self._snapshot: Optional[PermissionSnapshot] = None
+        self._checked_at = 0.0
+        self._invalidated_at: Optional[float] = None
+        self._min_version: Optional[int] = None
+        self._store_lock = threading.Lock()
+
+    def current(self) -> Optional[PermissionSnapshot]:
+        """
+        Returns the snapshot to use, checking for a new file and for database
+        changes if the last check is old enough.
+
+        Returns:
+            PermissionSnapshot: The snapshot, or None if there is none or it is being rebuilt.
+        """
+        if not self.active:
+            return None
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is None or now - self._checked_at >= self.check_interval:
+            self._checked_at = now
+            cache_versions.check()  # May invalidate the snapshot (see `on_version`)
+            snapshot = self._reload(snapshot)
+        if self._invalidated_at is not None or self._min_version is not None:
+            return None
+        return snapshot
+
+    def load(self) -> Optional[PermissionSnapshot]:
+        """
+        Builds the snapshot (unless another process just did) and starts using it.
+
+        The database may have been changed while no process was running
+        (migrations, imports), so a file from a previous run is not trusted.
+
+        Returns:
+            PermissionSnapshot: The loaded snapshot, None if disabled.
+        """
+        if not self.enabled:
+            return None
+        build_permission_snapshot(requested_at=time.time())
+        with self._store_lock:
+            self._invalidated_at = None
+            self._min_version = None
+        self.active = True
+        self._checked_at = time.monotonic()
+        return self._reload(None)
+
+    def invalidate(self):
+        """
+        Stops using the snapshot until it is rebuilt, and wakes the worker to rebuild it.
+        """
+        if not self.active:
+            return
+        with self._store_lock:
+            self._invalidated_at = time.time()  # The latest change the rebuild must include
+        if not self.running:
+            self.start()
+        self.wake()
+
+    def on_version(self, version: int):
+        """
+        Invalidates the snapshot if the "permissions" namespace changed since
+        the published file was read (registered with `cache_versions`).
+
+        Args:
+            version (int): New version of the namespace.
+        """
+        if not self.active:
+            return
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.source_version >= version:
+            return
+        if read_header(snapshot_path())[2] >= version:
+            self._checked_at = float("-inf")  # Already published: reload on the next lookup
+            return
+        with self._store_lock:
+            self._min_version = max(self._min_version or 0, version)
+        if not self.running:
+            self.start()
+        self.wake()
+
+    def stop(self, timeout: Optional[float] = None):
+        super().stop(timeout)
+        self.active = False  # Until the next load()
+
+    def run_once(self):
+        """
+        Rebuilds and reloads the snapshot if it was invalidated.
+        """
+        with self._store_lock:
+            requested_at, min_version = self._invalidated_at, self._min_version
+        if requested_at is None and min_version is None:
+            return
+        build_permission_snapshot(requested_at=requested_at, min_version=min_version)
+        with self._store_lock:
+            # Unless invalidated again meanwhile
+            if self._invalidated_at == requested_at:
+                self._invalidated_at = None
+            if self._min_version == min_version:
+                self._min_version = None
+        self._reload(None)
+
+    def _reload(self, snapshot: Optional[PermissionSnapshot]) -> Optional[PermissionSnapshot]:
+        path = snapshot_path()
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._snapshot = None
+            return None
+        inode = (stat.st_dev, stat.st_ino)
+        if snapshot is not None and snapshot.path == path and snapshot.inode == inode:
+            return snapshot
+        try:
+            snapshot = PermissionSnapshot(path)
+        except (OSError, ValueError):
+            logger.exception("Could not load the permission snapshot %s.", path)
+            return self._snapshot
+        # Lookups holding the previous snapshot keep using it; it is unmapped once unused
+        self._snapshot = snapshot
+        logger.debug("Permission snapshot %s loaded.", snapshot.version)
+        return snapshot
+
+
+# Process-wide snapshot store, loaded and started by the application lifespan
+permission_snapshots = PermissionSnapshotStore()
+cache_versions.register("permissions", permission_snapshots.on_version)
+
+
+def invalidate_permission_snapshot():
+    """
+    Marks the permission snapshot as outdated; call it after committing a change
+    to roles, permissions, their assignments or the users' Telegram accounts.
+    """
+    permission_snapshots.invalidate()
+
+
+def main(argv=None) -> int:
+    """
+    Builds or shows the permission snapshot from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Permission snapshot.")
+    parser.add_argument("command", choices=["build", "show"])
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        print(f"Published version {build_permission_snapshot()} at {snapshot_path()}")
+        return 0
+    try:
+        snapshot = PermissionSnapshot(snapshot_path())
+    except (OSError, ValueError) as error:
+        print(error)
+        return 1
+    print(
+        f"{snapshot_path()}: version {snapshot.version} "
+        f"(permissions version {snapshot.source_version}), {snapshot.user_count} users, "
+        f"{len(snapshot.permissions)} permissions, {os.path.getsize(snapshot_path())} bytes"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
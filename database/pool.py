@@ -0,0 +1,191 @@
+"""
+Connection Pooling
+
+This module provides the two kinds of shared connections behind
+`get_db_read_connection()` and `get_db_write_connection()` (see `db_config.py`).
+
+ConnectionPool:
+    Keeps idle read-only connections for reuse. Under WAL, readers never
+    block each other nor wait for the writer, so reads run concurrently in
+    the threadpool. Acquiring never blocks: when no idle connection is left a
+    new one is opened, and it is closed on release if the pool is full.
+
+SharedWriter:
+    A single long-lived read-write connection per process, used by one thread
+    at a time. Writers wait on a lock instead of polling SQLite's busy handler.
+    The writer is reentrant: an operation that calls other write operations
+    (e.g. `delete_role`) gets the same connection back. When the outermost
+    user releases it, an uncommitted transaction is rolled back.
+
+Both hand out `PooledConnection`s, whose `close()` returns the connection to
+its owner instead of closing it, so operations keep using `close_db_connection`.
+"""
+
+import os
+import threading
+from collections import deque
+from typing import Callable, Deque, Optional
+
+from database.instrumentation import InstrumentedConnection
+
+
+class PooledConnection(InstrumentedConnection):
+    """
+    Connection that goes back to its pool or writer when closed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._owner = None
+        self._generation = 0
+
+    def close(self):
+        if self._owner is not None:
+            self._owner.release(self)
+        else:
+            super().close()
+
+    def discard(self):
+        """
+        Really closes the connection.
+        """
+        self._owner = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Pool of reusable connections.
+
+    Attributes:
+        size (int): Maximum number of idle connections kept.
+    """
+
+    def __init__(self, connect: Callable[[], PooledConnection], size: int):
+        self.size = size
+        self._connect = connect
+        self._idle: Deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._pid = os.getpid()
+
+    def acquire(self) -> PooledConnection:
+        """
+        Returns an idle connection, or a new one if none is idle.
+
+        Returns:
+            PooledConnection: The connection; `close()` gives it back.
+        """
+        if self._pid != os.getpid():
+            self.reset()  # Never share connections with a forked parent
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+            generation = self._generation
+        if connection is None:
+            connection = self._connect()
+            connection._generation = generation  # pylint: disable=protected-access
+        connection._owner = self  # pylint: disable=protected-access
+        return connection
+
+    def release(self, connection: PooledConnection):
+        """
+        Gives a connection back to the pool.
+
+        Args:
+            connection (PooledConnection): A connection returned by `acquire()`.
+        """
+        if connection.in_transaction:
+            connection.rollback()
+        with self._lock:
+            keep = (
+                connection._generation == self._generation  # pylint: disable=protected-access
+                and len(self._idle) < self.size
+            )
+            if keep:
+                self._idle.append(connection)
+        if not keep:
+            connection.discard()
+
+    def reset(self):
+        """
+        Closes the idle connections; connections in use are closed when released.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+            self._generation += 1
+            same_process = self._pid == os.getpid()
+            self._pid = os.getpid()
+        for connection in idle:
+            if same_process:
+                connection.discard()
+
+
+class SharedWriter:
+    """
+    A single read-write connection shared by the threads of the process.
+
+    Attributes:
+        timeout (float): Seconds to wait for the writer before giving up.
+    """
+
+    def __init__(self, connect: Callable[[], PooledConnection], timeout: float):
+        self.timeout = timeout
+        self._connect = connect
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._connection: Optional[PooledConnection] = None
+        self._pid = os.getpid()
+
+    def acquire(self) -> PooledConnection:
+        """
+        Waits for the writer and returns its connection.
+
+        Returns:
+            PooledConnection: The writer connection; `close()` releases it.
+
+        Raises:
+            TimeoutError: If another thread holds the writer for longer than `timeout`.
+        """
+        if not self._lock.acquire(timeout=self.timeout):
+            raise TimeoutError(f"Timed out after {self.timeout}s waiting for the database writer")
+        try:
+            if self._pid != os.getpid():
+                self._connection, self._depth, self._pid = None, 0, os.getpid()
+            if self._connection is None:
+                self._connection = self._connect()
+                self._connection._owner = self  # pylint: disable=protected-access
+        except BaseException:
+            self._lock.release()
+            raise
+        self._depth += 1
+        return self._connection
+
+    def release(self, connection: PooledConnection):
+        """
+        Releases the writer, rolling back what the outermost user left uncommitted.
+
+        Args:
+            connection (PooledConnection): The connection returned by `acquire()`.
+        """
+        self._depth -= 1
+        if self._depth == 0 and connection.in_transaction:
+            connection.rollback()
+        self._lock.release()
+
+    def ensure_open(self):
+        """
+        Opens the writer connection if needed, without holding it.
+        """
+        self.acquire().close()
+
+    def reset(self):
+        """
+        Closes the writer connection; the next `acquire()` opens a new one.
+
+        Waits until no other thread uses the writer. Must not be called by a
+        thread holding it.
+        """
+        with self._lock:
+            connection, self._connection = self._connection, None
+            if connection is not None:
+                connection.discard()
@@ -0,0 +1,553 @@
+"""
+User Import and Export
+
+This module moves a user base in and out of the database as a stream of
+records, each one a user with its Telegram and Google identities, its
+authentication providers and the names of its roles.
+
+Formats:
+- NDJSON: one JSON object per line, with nested `telegram` and `google`
+  objects and `providers` and `roles` lists (see `export_users`).
+- CSV: one row per user with the columns in `CSV_COLUMNS`; roles are joined
+  with `|`, and providers are derived from the Telegram and Google columns.
+
+Importing:
+- Records are read as a stream and written in chunks, each in a single
+  transaction with one `executemany` per table. Users get consecutive IDs
+  after the current maximum, so no per-row round trip is needed.
+- Records whose email, Telegram ID or Google ID/email already exists (in the
+  database or earlier in the file) are skipped; invalid records are counted
+  and skipped. Unknown role names are created.
+- The import connection runs with `synchronous = OFF` and a larger cache.
+  A crash of the process loses nothing, but a power loss can lose or corrupt
+  the last commits; pass `--durable` to keep the storage profile's setting.
+  A final checkpoint writes everything to the database file.
+- The number of records consumed is stored in `user_imports` (migration
+  0011) in the same transaction as each chunk, so an interrupted import
+  resumes after the last committed chunk when it is run again with the same
+  file.
+
+Exporting:
+- Users are read in chunks with keyset pagination on `id`, and the related
+  rows of each chunk with one query per table, so memory use does not grow
+  with the number of users.
+
+Usage:
+
+    python -m database.user_transfer import users.ndjson
+    python -m database.user_transfer import users.csv --chunk-size 5000
+    python -m database.user_transfer export users.ndjson
+    python -m database.user_transfer export - --format csv > users.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from database.db_config import (
+    close_db_connection,
+    get_db_connection,
+    get_db_read_connection,
+    get_storage_profile,
+)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+USER_FIELDS = (
+    "email",
+    "full_name",
+    "language",
+    "status",
+    "password_hash",
+    "password_salt",
+    "created_at",
+)
+TELEGRAM_FIELDS = ("telegram_id", "username", "first_name", "last_name", "photo_url")
+GOOGLE_FIELDS = ("google_id", "full_name", "email", "picture")
+
+
+def _csv_column(prefix: str, field: str) -> str:
+    """Name of the CSV column of an identity field, e.g. telegram_username."""
+    return field if field.startswith(f"{prefix}_") else f"{prefix}_{field}"
+
+
+CSV_COLUMNS = (
+    ("id",)
+    + USER_FIELDS
+    + tuple(_csv_column("telegram", field) for field in TELEGRAM_FIELDS)
+    + tuple(_csv_column("google", field) for field in GOOGLE_FIELDS)
+    + ("roles",)
+)
+
+# IDs or values of a batch, as a table
+_VALUES = "SELECT value FROM json_each(?)"
+
+
+def detect_format(path: str, fmt: Optional[str] = None) -> str:
+    """
+    Returns the format of a file: the given one, or the one of its extension.
+
+    Args:
+        path (str): File path.
+        fmt (str, optional): "csv" or "ndjson".
+
+    Returns:
+        str: "csv" or "ndjson".
+    """
+    if fmt:
+        return fmt
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _from_csv_row(row: Dict[str, str]) -> dict:
+    """Converts a CSV row to a nested record."""
+    record = {field: _clean(row.get(field)) for field in USER_FIELDS}
+    telegram = {
+        field: _clean(row.get(_csv_column("telegram", field))) for field in TELEGRAM_FIELDS
+    }
+    google = {field: _clean(row.get(_csv_column("google", field))) for field in GOOGLE_FIELDS}
+    record["telegram"] = telegram if any(telegram.values()) else None
+    record["google"] = google if any(google.values()) else None
+    record["roles"] = [role for role in (_clean(row.get("roles")) or "").split("|") if role]
+    return record
+
+
+def read_records(stream: TextIO, fmt: str) -> Iterator[dict]:
+    """
+    Reads the records of a stream one by one.
+
+    Args:
+        stream (TextIO): Input stream.
+        fmt (str): "csv" or "ndjson".
+
+    Yields:
+        dict: Nested records; a line that is not valid JSON yields None.
+    """
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            yield _from_csv_row(row)
+        return
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _validate(record) -> Optional[dict]:
+    """Returns the record normalized, or None if it cannot be imported."""
+    if not isinstance(record, dict):
+        return None
+    user = {field: _clean(record.get(field)) for field in USER_FIELDS}
+    telegram = record.get("telegram") or None
+    google = record.get("google") or None
+    try:
+        if telegram is not None:
+            telegram = {field: _clean(telegram.get(field)) for field in TELEGRAM_FIELDS}
+            telegram["telegram_id"] = int(telegram["telegram_id"])
+        if google is not None:
+            google = {field: _clean(google.get(field)) for field in GOOGLE_FIELDS}
+            if not google["google_id"] or not google["email"]:
+                return None
+            google["google_id"] = str(google["google_id"])
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if not (user["email"] or telegram or google):
+        return None
+    providers = record.get("providers")
+    if providers is None:
+        providers = []
+        if telegram:
+            providers.append({"provider": "telegram", "provider_id": telegram["telegram_id"]})
+        if google:
+            providers.append({"provider": "google", "provider_id": google["google_id"]})
+    user["telegram"] = telegram
+    user["google"] = google
+    user["providers"] = [
+        provider
+        for provider in providers
+        if isinstance(provider, dict) and provider.get("provider") and provider.get("provider_id")
+    ]
+    user["roles"] = [str(role) for role in record.get("roles") or [] if role]
+    return user
+
+
+def _existing(connection, sql: str, values: Iterable) -> set:
+    values = [value for value in values if value is not None]
+    if not values:
+        return set()
+    return {row[0] for row in connection.execute(sql, (json.dumps(values),))}
+
+
+def _role_ids(connection, names: set) -> Dict[str, int]:
+    """Returns the IDs of the roles, creating the missing ones."""
+    if not names:
+        return {}
+    connection.executemany(
+        "INSERT OR IGNORE INTO roles (name) VALUES (?)", [(name,) for name in sorted(names)]
+    )
+    return dict(
+        connection.execute(
+            f"SELECT name, id FROM roles WHERE name IN ({_VALUES})", (json.dumps(sorted(names)),)
+        )
+    )
+
+
+def _import_chunk(connection, records: List[dict]) -> int:
+    """
+    Writes a chunk of valid records, skipping the ones that already exist.
+
+    Args:
+        connection (sqlite3.Connection): Connection inside a write transaction.
+        records (list): Records normalized by `_validate`.
+
+    Returns:
+        int: Number of users imported.
+    """
+    emails = _existing(
+        connection,
+        f"SELECT email FROM users WHERE email IN ({_VALUES})",
+        (record["email"] for record in records),
+    )
+    telegram_ids = _existing(
+        connection,
+        f"SELECT telegram_id FROM auth_telegram WHERE telegram_id IN ({_VALUES})",
+        (record["telegram"]["telegram_id"] for record in records if record["telegram"]),
+    )
+    google_ids = _existing(
+        connection,
+        f"SELECT google_id FROM auth_google WHERE google_id IN ({_VALUES})",
+        (record["google"]["google_id"] for record in records if record["google"]),
+    )
+    google_emails = _existing(
+        connection,
+        f"SELECT email FROM auth_google WHERE email IN ({_VALUES})",
+        (record["google"]["email"] for record in records if record["google"]),
+    )
+
+    user_id = connection.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+    users, telegram, google, providers, memberships = [], [], [], [], []
+    for record in records:
+        tg, gg = record["telegram"], record["google"]
+        if (
+            (record["email"] and record["email"] in emails)
+            or (tg and tg["telegram_id"] in telegram_ids)
+            or (gg and (gg["google_id"] in google_ids or gg["email"] in google_emails))
+        ):
+            continue
+        # Later duplicates in the same input are skipped too
+        if record["email"]:
+            emails.add(record["email"])
+        if tg:
+            telegram_ids.add(tg["telegram_id"])
+        if gg:
+            google_ids.add(gg["google_id"])
+            google_emails.add(gg["email"])
+
+        user_id += 1
+        users.append((user_id,) + tuple(record[field] for field in USER_FIELDS))
+        if tg:
+            telegram.append((user_id,) + tuple(tg[field] for field in TELEGRAM_FIELDS))
+        if gg:
+            google.append((user_id,) + tuple(gg[field] for field in GOOGLE_FIELDS))
+        seen_providers = set()
+        for provider in record["providers"]:
+            if provider["provider"] not in seen_providers:
+                seen_providers.add(provider["provider"])
+                providers.append(
+                    (
+                        user_id,
+                        provider["provider"],
+                        str(provider["provider_id"]),
+                        provider.get("last_login"),
+                    )
+                )
+        memberships.extend((user_id, role) for role in dict.fromkeys(record["roles"]))
+
+    # Identities first: the search index row of each user is then built once,
+    # by the trigger of its users row, instead of once per table
+    connection.executemany(
+        "INSERT INTO auth_telegram (user_id, telegram_id, username, first_name, last_name, "
+        "photo_url) VALUES (?, ?, ?, ?, ?, ?)",
+        telegram,
+    )
+    connection.executemany(
+        "INSERT INTO auth_google (user_id, google_id, full_name, email, picture) "
+        "VALUES (?, ?, ?, ?, ?)",
+        google,
+    )
+    connection.executemany(
+        """
+        INSERT INTO users (id, email, full_name, language, status, password_hash,
+                           password_salt, created_at)
+        VALUES (?, ?, ?, COALESCE(?, 'en'), COALESCE(?, 'active'), ?, ?,
+                COALESCE(?, CURRENT_TIMESTAMP))
+        """,
+        users,
+    )
+    connection.executemany(
+        "INSERT INTO auth_providers (user_id, provider, provider_id, last_login) "
+        "VALUES (?, ?, ?, ?)",
+        providers,
+    )
+    role_ids = _role_ids(connection, {role for _, role in memberships})
+    connection.executemany(
+        "INSERT OR IGNORE INTO user_roles (user_id, role_id) VALUES (?, ?)",
+        [(member, role_ids[role]) for member, role in memberships],
+    )
+    return len(users)
+
+
+def import_users(
+    path: str,
+    fmt: Optional[str] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    durable: bool = False,
+    restart: bool = False,
+    log=print,
+) -> Dict[str, int]:
+    """
+    Imports users from a CSV or NDJSON file, resuming an interrupted import.
+
+    Args:
+        path (str): Input file.
+        fmt (str, optional): "csv" or "ndjson"; detected from the extension by default.
+        chunk_size (int): Records per transaction.
+        durable (bool): Keep the storage profile's `synchronous` setting.
+        restart (bool): Ignore the stored progress of this file.
+        log (Callable): Receives progress messages.
+
+    Returns:
+        dict: Totals for the file: `records`, `imported`, `skipped` and `invalid`.
+    """
+    fmt = detect_format(path, fmt)
+    source = f"{os.path.abspath(path)}:{os.path.getsize(path)}"
+
+    connection = get_db_connection()
+    connection.isolation_level = None
+    try:
+        if not durable:
+            connection.execute("PRAGMA synchronous = OFF")
+            connection.execute("PRAGMA cache_size = -65536")
+        if restart:
+            connection.execute("DELETE FROM user_imports WHERE source = ?", (source,))
+        connection.execute("INSERT OR IGNORE INTO user_imports (source) VALUES (?)", (source,))
+        records, imported, skipped, invalid, done = connection.execute(
+            "SELECT records, imported, skipped, invalid, done FROM user_imports WHERE source = ?",
+            (source,),
+        ).fetchone()
+        totals = {"records": records, "imported": imported, "skipped": skipped, "invalid": invalid}
+        if done:
+            log(f"{path} was already imported.")
+            return totals
+        if records:
+            log(f"Resuming after {records} records.")
+
+        with open(path, newline="", encoding="utf-8") as stream:
+            reader = read_records(stream, fmt)
+            for _ in zip(range(records), reader):
+                pass
+            while True:
+                chunk = [record for _, record in zip(range(chunk_size), reader)]
+                if not chunk:
+                    break
+                valid = [record for record in map(_validate, chunk) if record is not None]
+                connection.execute("BEGIN IMMEDIATE")
+                try:
+                    written = _import_chunk(connection, valid)
+                    totals["records"] += len(chunk)
+                    totals["imported"] += written
+                    totals["skipped"] += len(valid) - written
+                    totals["invalid"] += len(chunk) - len(valid)
+                    connection.execute(
+                        "UPDATE user_imports SET records = ?, imported = ?, skipped = ?, "
+                        "invalid = ?, updated_at = CURRENT_TIMESTAMP WHERE source = ?",
+                        (
+                            totals["records"],
+                            totals["imported"],
+                            totals["skipped"],
+                            totals["invalid"],
+                            source,
+                        ),
+                    )
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+                log(f"  {totals['records']} records ({totals['imported']} imported)")
+
+        connection.execute(
+            "UPDATE user_imports SET done = 1, updated_at = CURRENT_TIMESTAMP WHERE source = ?",
+            (source,),
+        )
+        # Back to the profile's durability, then write the WAL into the database file
+        connection.execute(f"PRAGMA synchronous = {get_storage_profile()[1]['synchronous']}")
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return totals
+    finally:
+        close_db_connection(connection)
+
+
+def _export_chunks(connection, chunk_size: int) -> Iterator[List[dict]]:
+    """Yields the users as nested records, a chunk at a time."""
+    last_id = 0
+    while True:
+        users = connection.execute(
+            f"SELECT id, {', '.join(USER_FIELDS)} FROM users WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size),
+        ).fetchall()
+        if not users:
+            return
+        last_id = users[-1][0]
+        ids = json.dumps([user[0] for user in users])
+        telegram = {
+            row[0]: dict(zip(TELEGRAM_FIELDS, row[1:]))
+            for row in connection.execute(
+                f"SELECT user_id, {', '.join(TELEGRAM_FIELDS)} FROM auth_telegram "
+                f"WHERE user_id IN ({_VALUES})",
+                (ids,),
+            )
+        }
+        google = {
+            row[0]: dict(zip(GOOGLE_FIELDS, row[1:]))
+            for row in connection.execute(
+                f"SELECT user_id, {', '.join(GOOGLE_FIELDS)} FROM auth_google "
+                f"WHERE user_id IN ({_VALUES})",
+                (ids,),
+            )
+        }
+        providers: Dict[int, list] = {}
+        for user_id, provider, provider_id, last_login in connection.execute(
+            "SELECT user_id, provider, provider_id, last_login FROM auth_providers "
+            f"WHERE user_id IN ({_VALUES}) ORDER BY id",
+            (ids,),
+        ):
+            providers.setdefault(user_id, []).append(
+                {"provider": provider, "provider_id": provider_id, "last_login": last_login}
+            )
+        roles: Dict[int, list] = {}
+        for user_id, name in connection.execute(
+            "SELECT ur.user_id, r.name FROM user_roles ur JOIN roles r ON r.id = ur.role_id "
+            f"WHERE ur.user_id IN ({_VALUES}) ORDER BY r.name",
+            (ids,),
+        ):
+            roles.setdefault(user_id, []).append(name)
+
+        yield [
+            {
+                "id": user[0],
+                **dict(zip(USER_FIELDS, user[1:])),
+                "telegram": telegram.get(user[0]),
+                "google": google.get(user[0]),
+                "providers": providers.get(user[0], []),
+                "roles": roles.get(user[0], []),
+            }
+            for user in users
+        ]
+
+
+def _to_csv_row(record: dict) -> dict:
+    row = {field: record[field] for field in ("id",) + USER_FIELDS}
+    for prefix, fields in (("telegram", TELEGRAM_FIELDS), ("google", GOOGLE_FIELDS)):
+        data = record[prefix] or {}
+        for field in fields:
+            row[_csv_column(prefix, field)] = data.get(field)
+    row["roles"] = "|".join(record["roles"])
+    return row
+
+
+def export_users(stream: TextIO, fmt: str = "ndjson", chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Writes every user as a record to a stream.
+
+    Args:
+        stream (TextIO): Output stream.
+        fmt (str): "csv" or "ndjson".
+        chunk_size (int): Users read per query.
+
+    Returns:
+        int: Number of users written.
+    """
+    writer = None
+    if fmt == "csv":
+        writer = csv.DictWriter(stream, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+
+    count = 0
+    connection = get_db_read_connection()
+    try:
+        for chunk in _export_chunks(connection, chunk_size):
+            if writer is not None:
+                writer.writerows(_to_csv_row(record) for record in chunk)
+            else:
+                stream.writelines(
+                    json.dumps(record, ensure_ascii=False) + "\n" for record in chunk
+                )
+            count += len(chunk)
+    finally:
+        close_db_connection(connection)
+    return count
+
+
+def main(argv=None) -> int:
+    """
+    Imports or exports users from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="User import and export.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="Import users from a file.")
+    importer.add_argument("path", help="CSV or NDJSON file.")
+    importer.add_argument("--durable", action="store_true", help="Keep synchronous writes.")
+    importer.add_argument("--restart", action="store_true", help="Ignore the stored progress.")
+    exporter = commands.add_parser("export", help="Export users to a file.")
+    exporter.add_argument("path", help="Output file, or - for stdout.")
+    for command in (importer, exporter):
+        command.add_argument("--format", choices=("csv", "ndjson"))
+        command.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "import":
+        totals = import_users(
+            args.path, args.format, args.chunk_size, args.durable, args.restart
+        )
+        print(
+            f"Imported {totals['imported']} users ({totals['skipped']} already existing, "
+            f"{totals['invalid']} invalid) in {time.perf_counter() - start:.1f}s."
+        )
+        return 0
+
+    fmt = detect_format(args.path, args.format)
+    if args.path == "-":
+        count = export_users(sys.stdout, fmt, args.chunk_size)
+    else:
+        with open(args.path, "w", newline="", encoding="utf-8") as stream:
+            count = export_users(stream, fmt, args.chunk_size)
+    print(
+        f"Exported {count} users in {time.perf_counter() - start:.1f}s.",
+        file=sys.stderr if args.path == "-" else sys.stdout,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
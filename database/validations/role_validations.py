@@ -1,13 +1,10 @@
 # app/validations/role_validations.py
 
 # This file contains functional validation functions for role-related operations.
-# These functions check the business rules, such as role name validity, and role existence.
+# These functions check the business rules, such as role name validity.
+# Role existence is checked by the operations themselves, from the rows they write.
 
-from database.exceptions.validation_exceptions import (
-    InvalidRoleNameError,
-    RoleNotFoundError,
-)
-from database.operations.roles_ops import get_role_by_id
+from database.exceptions.validation_exceptions import InvalidRoleNameError
 
 
 def validate_role_name(name: str):
@@ -31,23 +28,3 @@ def validate_role_name(name: str):
         )
     return True
 
-
-def validate_role_existence(role_id: int):
-    """
-    Validate if a role exists in the database.
-
-    Args:
-        role_id (int): The ID of the role to check.
-
-    Raises:
-        RoleNotFoundError: If the role does not exist.
-
-    Returns:
-        bool: True if the role exists.
-    """
-    # Call the operation to retrieve the role by ID
-    role = get_role_by_id(role_id)
-
-    if not role:
-        raise RoleNotFoundError(message="Role not found.")
-    return True
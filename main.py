@@ -6,14 +6,25 @@ security and CORS settings, and mounts the various API routers (health,
 public, and private endpoints) under the /api/v1 prefix.
 
 Endpoints:
-    - /api/v1/health: Health check endpoint.
+    - /api/v1/health: Health check endpoints (liveness and readiness).
     - /api/v1/ (and subpaths): Public endpoints.
     - /api/v1/ (and subpaths): Private endpoints (require authentication).
+    - /metrics: Prometheus metrics.
 
 Security:
     - Adds security headers to each response via SecurityHeadersMiddleware.
     - Configures Cross-Origin Resource Sharing (CORS) using a helper function.
 
+Observability:
+    - Records request counts, latencies and in-flight requests via MetricsMiddleware.
+    - Profiles single requests on demand (X-Profile header) via ProfilingMiddleware.
+
+Lifespan (see app/core/lifespan.py):
+    - Initializes the database, fills the read pool, runs the warmups and
+      starts the background workers before the worker accepts traffic.
+    - On shutdown, stops the workers (flushing what they buffered) and
+      checkpoints the WAL.
+
 Documentation:
     - OpenAPI schema is available at /api/v1/openapi.json.
     - Swagger UI is available at /api/v1/docs.
@@ -26,11 +37,15 @@ from slowapi.errors import RateLimitExceeded
 from app.api.routes import routers
 from app.auth.telegram import router as telegram_auth_router
 from app.core.cors import add_cors
+from app.core.lifespan import lifespan
 from app.core.logging import logger
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
 from app.core.rate_limit_exceptions import rate_limit_exceeded_handler
 from app.core.rate_limiting import limiter
 from app.core.security import SecurityHeadersMiddleware
 
+
 app = FastAPI(
     title="Jakanode API",
     description="API providing public and private endpoints.",
@@ -38,6 +53,7 @@ app = FastAPI(
     openapi_url="/api/v1/openapi.json",
     docs_url="/api/v1/docs",
     redoc_url="/api/v1/redoc",
+    lifespan=lifespan,
 )
 
 logger.debug(
@@ -48,6 +64,13 @@ app.add_middleware(SecurityHeadersMiddleware)
 logger.debug("Adds CORS middleware to the FastAPI application.")
 add_cors(app)
 
+logger.debug("Add Profiling Middleware (only active for requests with the profiling header).")
+app.add_middleware(ProfilingMiddleware)
+
+# Added last, so it is the outermost layer and times the whole stack (profiling included)
+logger.debug("Add Metrics Middleware (outermost, so it times the whole stack).")
+app.add_middleware(MetricsMiddleware)
+
 logger.debug("Set up the rate limiting.")
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 app.state.limiter = limiter  # Associate the limiter with the app
@@ -70,5 +93,6 @@ for router_entry in routers:
 if __name__ == "__main__":
     import uvicorn
 
+    # Development server; use server.py in production
     logger.debug("Run uvicorn...")
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
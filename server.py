@@ -0,0 +1,372 @@
+"""
+Production server launcher for the Jakanode API.
+
+This module runs the application with a pre-fork master process and
+`SERVER_WORKERS` uvicorn worker processes (one per CPU core by default).
+`main.py` remains the development entry point (auto-reload, single process).
+
+Master:
+- Binds the listening socket once, with `SERVER_BACKLOG`, and forks the
+  workers, which accept connections on it. With `SERVER_REUSE_PORT`, each
+  worker binds its own `SO_REUSEPORT` socket instead and the kernel balances
+  the connections between them.
+- Removes the metrics snapshots left in `METRICS_DIR` on start, so the merged
+  metrics only cover this run. With several workers and no `METRICS_DIR`, uses
+  `DEFAULT_METRICS_DIR` (with a warning), so `/metrics` covers every worker.
+- Replaces workers that exit: crashed ones, and the ones that reached their
+  request limit (`SERVER_MAX_REQUESTS` plus a random jitter, so they do not
+  all restart at once). Stops if workers keep failing right after starting.
+- SIGTERM / SIGINT: drains the workers (they stop accepting connections and
+  finish the running requests, up to `SERVER_GRACEFUL_TIMEOUT` seconds) and
+  exits. SIGHUP: replaces every worker, one at a time.
+
+Workers:
+- Import the application after the fork, so no database connection or
+  thread is shared between processes.
+- Use uvloop and httptools when they are installed.
+
+Usage:
+
+    python server.py
+    python server.py --workers 4 --port 8080
+"""
+
+import argparse
+import importlib.util
+import os
+import random
+import signal
+import socket
+import sys
+import time
+from typing import Dict, Optional
+
+from app.core import settings
+from app.core.logging import logger
+from app.core.settings import (
+    METRICS_DIR,
+    SERVER_BACKLOG,
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_KEEPALIVE,
+    SERVER_MAX_REQUESTS,
+    SERVER_MAX_REQUESTS_JITTER,
+    SERVER_PORT,
+    SERVER_REUSE_PORT,
+    SERVER_WORKERS,
+)
+
+APP = "main:app"
+
+# A worker exiting sooner than this after its start counts as a failed start
+MIN_WORKER_UPTIME = 2.0
+
+# Metrics directory of a multi-worker server when METRICS_DIR is not set
+DEFAULT_METRICS_DIR = "logs/metrics"
+
+
+def event_loop() -> str:
+    """Returns the uvicorn event loop implementation: uvloop if installed."""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    """Returns the uvicorn HTTP implementation: httptools if installed."""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def create_socket(host: str, port: int, backlog: int, reuse_port: bool = False) -> socket.socket:
+    """
+    Creates a listening TCP socket.
+
+    Args:
+        host (str): Address to bind.
+        port (int): Port to bind.
+        backlog (int): Maximum number of pending connections.
+        reuse_port (bool): Set SO_REUSEPORT, so several sockets can bind the same port.
+
+    Returns:
+        socket.socket: The listening socket.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def clear_metrics_dir(directory: str):
+    """
+    Removes the metrics snapshots of a previous run.
+
+    Only the files written by the metrics registry (`metrics_*.json` and their
+    temporary and lock files) are removed, whatever else the directory holds.
+
+    Args:
+        directory (str): `METRICS_DIR`; nothing is done if empty.
+    """
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for filename in os.listdir(directory):
+        if filename.startswith("metrics_") and filename.endswith((".json", ".tmp", ".lock")):
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+
+
+def use_metrics_dir(directory: str):
+    """
+    Makes the workers forked from now on write their metrics to a directory.
+
+    Workers import the application after the fork, so they read the setting
+    of the master process.
+
+    Args:
+        directory (str): The metrics directory.
+    """
+    os.environ["METRICS_DIR"] = directory
+    settings.METRICS_DIR = directory
+
+
+class Master:
+    """
+    Pre-fork master process supervising the uvicorn workers.
+
+    Attributes:
+        host (str): Address to bind.
+        port (int): Port to bind.
+        workers (int): Number of worker processes.
+        backlog (int): Maximum number of pending connections.
+        keepalive (int): Keep-alive timeout of idle connections, in seconds.
+        max_requests (int): Requests after which a worker is replaced (0: never).
+        max_requests_jitter (int): Random extra requests added to each worker's limit.
+        graceful_timeout (int): Seconds a stopping worker has to finish its requests.
+        reuse_port (bool): Give each worker its own SO_REUSEPORT socket.
+        metrics_dir (str): `METRICS_DIR` (default: `DEFAULT_METRICS_DIR` with several workers).
+    """
+
+    def __init__(
+        self,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        workers: int = SERVER_WORKERS,
+        backlog: int = SERVER_BACKLOG,
+        keepalive: int = SERVER_KEEPALIVE,
+        max_requests: int = SERVER_MAX_REQUESTS,
+        max_requests_jitter: int = SERVER_MAX_REQUESTS_JITTER,
+        graceful_timeout: int = SERVER_GRACEFUL_TIMEOUT,
+        reuse_port: bool = SERVER_REUSE_PORT,
+        metrics_dir: str = METRICS_DIR,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.backlog = backlog
+        self.keepalive = keepalive
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.reuse_port = reuse_port
+        self.metrics_dir = metrics_dir
+        self._socket: Optional[socket.socket] = None
+        self._children: Dict[int, float] = {}  # PID -> start time
+        self._stopping = False
+        self._reload = False
+        self._failed_starts = 0
+
+    def run(self) -> int:
+        """
+        Starts the workers and supervises them until the master is stopped.
+
+        Returns:
+            int: Exit status.
+        """
+        if not self.metrics_dir and self.workers > 1:
+            # Without it, /metrics would only report the worker that answers the scrape
+            logger.warning(
+                "METRICS_DIR is not set; the %d workers write their metrics to %s.",
+                self.workers,
+                DEFAULT_METRICS_DIR,
+            )
+            self.metrics_dir = DEFAULT_METRICS_DIR
+        if self.metrics_dir != settings.METRICS_DIR:
+            use_metrics_dir(self.metrics_dir)
+        clear_metrics_dir(self.metrics_dir)
+        if not self.reuse_port:
+            self._socket = create_socket(self.host, self.port, self.backlog)
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_reload)
+        logger.info(
+            "Starting %d workers on %s:%d (loop: %s, http: %s, %s).",
+            self.workers,
+            self.host,
+            self.port,
+            event_loop(),
+            http_protocol(),
+            "SO_REUSEPORT" if self.reuse_port else "shared socket",
+        )
+
+        status = 0
+        while not self._stopping:
+            while len(self._children) < self.workers and not self._stopping:
+                self._spawn()
+            if self._reload:
+                self._reload = False
+                self._replace_all()
+            if self._reap() and self._failed_starts >= 3 * self.workers:
+                logger.error("Workers keep failing on start; stopping.")
+                status = 1
+                break
+            time.sleep(0.2)
+
+        self._drain()
+        if self._socket is not None:
+            self._socket.close()
+        logger.info("Server stopped.")
+        return status
+
+    def _handle_stop(self, *_):
+        self._stopping = True
+
+    def _handle_reload(self, *_):
+        self._reload = True
+
+    def _spawn(self) -> int:
+        """Forks a worker."""
+        limit = None
+        if self.max_requests > 0:
+            limit = self.max_requests + random.randint(0, max(0, self.max_requests_jitter))
+        pid = os.fork()
+        if pid == 0:
+            status = 1
+            try:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGHUP, signal.SIG_DFL)
+                self._serve(limit)
+                status = 0
+            except BaseException:  # pylint: disable=broad-exception-caught
+                logger.exception("Worker %d failed.", os.getpid())
+            finally:
+                os._exit(status)  # pylint: disable=protected-access
+        self._children[pid] = time.monotonic()
+        logger.debug("Worker %d started (request limit: %s).", pid, limit)
+        return pid
+
+    def _serve(self, limit_max_requests: Optional[int]):
+        """Runs uvicorn in a worker process."""
+        # Imported in the worker: the master never loads the application
+        import uvicorn  # pylint: disable=import-outside-toplevel
+
+        sock = self._socket or create_socket(self.host, self.port, self.backlog, reuse_port=True)
+        config = uvicorn.Config(
+            APP,
+            loop=event_loop(),
+            http=http_protocol(),
+            lifespan="on",
+            backlog=self.backlog,
+            timeout_keep_alive=self.keepalive,
+            limit_max_requests=limit_max_requests,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            access_log=False,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+
+    def _reap(self) -> bool:
+        """Collects the exited workers; returns True if one failed on start."""
+        failed = False
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                break
+            if pid == 0:
+                break
+            started = self._children.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code != 0 and time.monotonic() - started < MIN_WORKER_UPTIME:
+                self._failed_starts += 1
+                failed = True
+            else:
+                self._failed_starts = 0
+            if not self._stopping:
+                logger.info("Worker %d exited with status %d; replacing it.", pid, code)
+        return failed
+
+    def _stop_worker(self, pid: int):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    def _replace_all(self):
+        """Replaces the workers one at a time, starting each new one before stopping an old one."""
+        logger.info("Replacing the workers.")
+        for pid in list(self._children):
+            self._spawn()
+            self._stop_worker(pid)
+            deadline = time.monotonic() + self.graceful_timeout + 5
+            while pid in self._children and time.monotonic() < deadline and not self._stopping:
+                self._reap()
+                time.sleep(0.1)
+
+    def _drain(self):
+        """Stops the workers gracefully, killing the ones still running after the timeout."""
+        for pid in list(self._children):
+            self._stop_worker(pid)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self._children):
+            logger.warning("Worker %d did not stop in time; killing it.", pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self._children.clear()
+
+
+def main(argv=None) -> int:
+    """
+    Runs the production server from the command line.
+
+    Args:
+        argv (list, optional): Arguments to parse instead of `sys.argv`.
+
+    Returns:
+        int: Exit status.
+    """
+    parser = argparse.ArgumentParser(description="Jakanode API production server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--reuse-port", action="store_true", default=SERVER_REUSE_PORT)
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        # Without fork (Windows), fall back to a single uvicorn process
+        import uvicorn  # pylint: disable=import-outside-toplevel
+
+        uvicorn.run(APP, host=args.host, port=args.port, backlog=SERVER_BACKLOG)
+        return 0
+
+    master = Master(
+        host=args.host, port=args.port, workers=args.workers, reuse_port=args.reuse_port
+    )
+    return master.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Tests of the access control of the admin data endpoints (app/api/routes/private.py).
+"""
+
+import sqlite3
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.auth.token import create_access_token
+from database.fixtures import TemplateDatabase
+
+TEMPLATE = TemplateDatabase()
+ADMIN_TELEGRAM_ID = 2001
+USER_TELEGRAM_ID = 2002
+
+
+def _bearer(telegram_id) -> dict:
+    token = create_access_token({"sub": str(telegram_id)}, timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(name="client")
+def fixture_client():
+    """The application on a database with an admin (`admin_data`) and a user without roles."""
+    with TEMPLATE.database() as path:
+        connection = sqlite3.connect(path)
+        for telegram_id in (ADMIN_TELEGRAM_ID, USER_TELEGRAM_ID):
+            user_id = connection.execute(
+                "INSERT INTO users (email, full_name) VALUES (?, 'Some One')",
+                (f"{telegram_id}@example.com",),
+            ).lastrowid
+            connection.execute(
+                "INSERT INTO auth_telegram (user_id, telegram_id) VALUES (?, ?)",
+                (user_id, telegram_id),
+            )
+        role_id = connection.execute("INSERT INTO roles (name) VALUES ('admins')").lastrowid
+        connection.execute(
+            "INSERT INTO role_permissions (role_id, permission_id) "
+            "SELECT ?, id FROM permissions WHERE name = 'admin_data'",
+            (role_id,),
+        )
+        connection.execute(
+            "INSERT INTO user_roles (user_id, role_id) "
+            "SELECT user_id, ? FROM auth_telegram WHERE telegram_id = ?",
+            (role_id, ADMIN_TELEGRAM_ID),
+        )
+        connection.commit()
+        connection.close()
+
+        import main  # pylint: disable=import-outside-toplevel
+
+        with TestClient(main.app) as test_client:
+            yield test_client
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/v1/admin/audit-logs/export",
+        "/api/v1/admin/db/statements",
+        "/api/v1/users/search?q=example",
+    ],
+)
+def test_admin_endpoints_require_the_permission(client, path):
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers={"Authorization": "Bearer secret_token"}).status_code == 403
+    assert client.get(path, headers=_bearer(USER_TELEGRAM_ID)).status_code == 403
+    assert client.get(path, headers=_bearer(ADMIN_TELEGRAM_ID)).status_code == 200
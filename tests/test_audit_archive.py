@@ -0,0 +1,31 @@
+"""
+Tests of the audit log archive (database/audit_archive.py).
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from database import audit_archive
+from database.audit_archive import archive_audit_logs, normalize_timestamp
+from database.fixtures import TemplateDatabase
+
+TEMPLATE = TemplateDatabase()
+
+
+def test_normalize_timestamp_converts_to_utc():
+    utc_plus_2 = timezone(timedelta(hours=2))
+    assert normalize_timestamp(datetime(2024, 5, 1, 12, 0, tzinfo=utc_plus_2)) == "2024-05-01 10:00:00"
+    assert normalize_timestamp("2024-05-01T12:00:00+02:00") == "2024-05-01 10:00:00"
+    assert normalize_timestamp("2024-05-01T12:00:00") == "2024-05-01 12:00:00"
+    assert normalize_timestamp(None) is None
+
+
+def test_failed_segment_creation_keeps_its_error(tmp_path, monkeypatch):
+    def failing_open(*_args, **_kwargs):
+        raise PermissionError("read-only archive")
+
+    with TEMPLATE.database():
+        monkeypatch.setattr(audit_archive, "open", failing_open, raising=False)
+        with pytest.raises(PermissionError):
+            archive_audit_logs(retention_days=0, directory=str(tmp_path))
@@ -0,0 +1,32 @@
+"""
+Tests of the cross-process cache versions (database/cache_versions.py).
+"""
+
+import sqlite3
+
+from database.cache_versions import CacheVersions
+from database.fixtures import TemplateDatabase
+
+TEMPLATE = TemplateDatabase()
+
+
+def test_versions_are_checked_once_per_interval():
+    with TEMPLATE.database() as path:
+        versions = CacheVersions(check_interval=3600)
+        try:
+            before = versions.version("roles")
+            assert before is not None
+
+            connection = sqlite3.connect(path)
+            connection.execute("INSERT INTO roles (name) VALUES ('cache-test')")
+            connection.commit()
+            connection.close()
+
+            # Within the interval, the cached version is read without the lock
+            with versions._versions_lock:
+                assert versions.version("roles") == before
+
+            versions.expire()
+            assert versions.version("roles") == before + 1
+        finally:
+            versions.reset()
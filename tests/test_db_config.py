@@ -0,0 +1,45 @@
+"""
+Tests of the connection handling (database/db_config.py).
+"""
+
+import threading
+import time
+
+from database.db_config import (
+    close_db_connection,
+    get_db_read_connection,
+    get_db_write_connection,
+    open_db_read_connection,
+)
+from database.fixtures import TemplateDatabase
+
+TEMPLATE = TemplateDatabase()
+
+
+def test_new_readers_do_not_wait_for_a_write_transaction():
+    with TEMPLATE.database():
+        started, release = threading.Event(), threading.Event()
+
+        def hold_writer():
+            connection = get_db_write_connection()
+            try:
+                connection.execute("BEGIN IMMEDIATE")
+                started.set()
+                release.wait(5)
+            finally:
+                close_db_connection(connection)
+
+        writer = threading.Thread(target=hold_writer)
+        writer.start()
+        try:
+            assert started.wait(5)
+            start = time.perf_counter()
+            # More readers than idle ones: the pool opens new connections
+            readers = [get_db_read_connection() for _ in range(3)] + [open_db_read_connection()]
+            for reader in readers:
+                assert reader.execute("SELECT count(*) FROM roles").fetchone() is not None
+                close_db_connection(reader)
+            assert time.perf_counter() - start < 1.0
+        finally:
+            release.set()
+            writer.join()
@@ -0,0 +1,13 @@
+"""
+Import-time budget of the application (benchmarks/import_time.py).
+"""
+
+import statistics
+
+from benchmarks.import_time import budget_ms, measure, total_ms
+
+
+def test_import_main_within_budget():
+    totals = [total_ms(measure()) for _ in range(3)]
+    median = statistics.median(totals)
+    assert median <= budget_ms(), f"import main takes {median:.0f} ms (budget {budget_ms():.0f} ms)"
@@ -0,0 +1,66 @@
+"""
+Tests of the failed login throttle (app/auth/login_throttle.py).
+"""
+
+import pytest
+
+from app.auth import login_throttle as throttle_module
+from app.auth.login_throttle import LoginThrottle
+
+
+class Clock:
+    """Manual clock."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(name="lookups")
+def fixture_lookups(monkeypatch):
+    lookups = []
+
+    def resolve(telegram_ids):
+        lookups.append(sorted(telegram_ids))
+        return {telegram_id: telegram_id * 10 for telegram_id in telegram_ids if telegram_id < 100}
+
+    monkeypatch.setattr(throttle_module, "USER_RESOLVERS", {"telegram": resolve})
+    monkeypatch.setattr(throttle_module, "save_failed_login_attempts", lambda updates: None)
+    return lookups
+
+
+def test_users_are_resolved_by_the_flush(lookups):
+    throttle = LoginThrottle(threshold=3, base_delay=60, max_delay=600, window=900, clock=Clock())
+    assert throttle.record_failure("telegram", 1) == 0
+    assert throttle.record_failure("telegram", 2) == 0
+    assert throttle.record_failure("telegram", 2) == 0
+    assert not lookups  # Nothing looked up in the request path
+
+    throttle.run_once()
+    assert lookups == [[1, 2]]
+    # The failures counted before the lookup are charged to the users
+    assert throttle._counters[("user", 20)].count == 2
+
+    throttle.record_failure("telegram", 2)
+    throttle.run_once()
+    assert lookups == [[1, 2]]  # Looked up once
+    assert throttle.retry_after("telegram", 2) == 60
+
+
+def test_flooding_new_identities_keeps_locked_counters(lookups):
+    clock = Clock()
+    throttle = LoginThrottle(
+        threshold=2, base_delay=60, max_delay=600, window=900, max_entries=10, clock=clock
+    )
+    throttle.record_failure("telegram", 500)
+    assert throttle.record_failure("telegram", 500) == 60
+    clock.now += 1
+    for telegram_id in range(1000, 1100):
+        throttle.record_failure("telegram", telegram_id)
+
+    assert len(throttle._counters) <= 10
+    assert throttle.retry_after("telegram", 500) == 59
+    assert len(throttle._unresolved) <= 10
+    assert not lookups
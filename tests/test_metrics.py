@@ -0,0 +1,43 @@
+"""
+Tests of the multi-process metrics aggregation (app/core/metrics.py).
+"""
+
+import json
+import os
+
+from app.core import metrics
+from app.core.metrics import ARCHIVE_FILE, DB_CONNECTIONS_OPEN, HTTP_REQUESTS, REGISTRY
+
+LABELS = ["GET", "/test/dead-worker", "200"]
+
+
+def _requests(merged):
+    return merged[HTTP_REQUESTS.name].get(tuple(LABELS), 0)
+
+
+def _write_snapshot(directory, key, requests):
+    snapshot = {
+        HTTP_REQUESTS.name: [[LABELS, requests]],
+        DB_CONNECTIONS_OPEN.name: [[[], 1000]],
+    }
+    with open(os.path.join(directory, f"metrics_{key}.json"), "w", encoding="utf-8") as file:
+        json.dump(snapshot, file)
+
+
+def test_dead_workers_are_archived_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    own_gauge = DB_CONNECTIONS_OPEN.collect().get((), 0)
+    # A PID that does not exist, and this PID with another start time (a reused PID)
+    _write_snapshot(tmp_path, "4194304_1", 3)
+    _write_snapshot(tmp_path, f"{os.getpid()}_1", 4)
+
+    merged = REGISTRY.aggregate()
+    assert _requests(merged) == 7
+    assert merged[DB_CONNECTIONS_OPEN.name].get((), 0) == own_gauge  # Dead gauges are dropped
+    assert sorted(os.listdir(tmp_path)) == [ARCHIVE_FILE, f"{ARCHIVE_FILE}.lock"]
+
+    # Archived counters are not counted twice, and survive this worker's flushes
+    REGISTRY.flush()
+    assert _requests(REGISTRY.aggregate()) == 7
+    _write_snapshot(tmp_path, "4194305_1", 1)
+    assert _requests(REGISTRY.aggregate()) == 8
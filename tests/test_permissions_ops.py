@@ -0,0 +1,62 @@
+"""
+Tests of the permission checks (database/operations/permissions_ops.py).
+"""
+
+import sqlite3
+
+import pytest
+
+from database.fixtures import TemplateDatabase
+from database.operations.permissions_ops import telegram_user_has_permission
+from database.permission_snapshot import permission_snapshots
+
+TEMPLATE = TemplateDatabase()
+
+
+@pytest.fixture(name="snapshot_database")
+def fixture_snapshot_database():
+    """A user with Telegram ID 1001 and the `profile_requests` permission, snapshot loaded."""
+    with TEMPLATE.database() as path:
+        connection = sqlite3.connect(path)
+        user_id = connection.execute("INSERT INTO users (full_name) VALUES ('Ada')").lastrowid
+        connection.execute(
+            "INSERT INTO auth_telegram (user_id, telegram_id) VALUES (?, 1001)", (user_id,)
+        )
+        role_id = connection.execute("INSERT INTO roles (name) VALUES ('profilers')").lastrowid
+        connection.execute(
+            "INSERT INTO role_permissions (role_id, permission_id) "
+            "SELECT ?, id FROM permissions WHERE name = 'profile_requests'",
+            (role_id,),
+        )
+        connection.execute(
+            "INSERT INTO user_roles (user_id, role_id) VALUES (?, ?)", (user_id, role_id)
+        )
+        connection.commit()
+        connection.close()
+
+        permission_snapshots.check_interval = 3600  # No reload during the test
+        permission_snapshots.load()
+        try:
+            assert permission_snapshots.current() is not None
+            yield path
+        finally:
+            permission_snapshots.stop()
+
+
+def test_string_telegram_id_uses_snapshot(snapshot_database):
+    # The `sub` of a JWT is a string
+    assert telegram_user_has_permission("1001", "profile_requests")
+    assert telegram_user_has_permission(1001, "profile_requests")
+    assert not telegram_user_has_permission("1002", "profile_requests")
+    assert not telegram_user_has_permission("1001", "unknown_permission")
+
+
+def test_non_numeric_telegram_id_is_denied(snapshot_database):
+    assert not telegram_user_has_permission("abc", "profile_requests")
+    assert not telegram_user_has_permission(None, "profile_requests")
+
+
+def test_string_telegram_id_without_snapshot(snapshot_database):
+    permission_snapshots.stop()
+    assert telegram_user_has_permission("1001", "profile_requests")
+    assert not telegram_user_has_permission("abc", "profile_requests")
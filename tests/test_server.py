@@ -0,0 +1,26 @@
+"""
+Tests of the production server launcher (server.py).
+"""
+
+import os
+
+from server import clear_metrics_dir
+
+
+def test_clear_metrics_dir_only_removes_metrics_files(tmp_path):
+    for filename in (
+        "metrics_12_34.json",
+        "metrics_archived.json",
+        "metrics_archived.json.lock",
+        "metrics_12_34.json.12.tmp",
+        "notes.txt",
+        "other.json",
+    ):
+        (tmp_path / filename).write_text("{}", encoding="utf-8")
+    (tmp_path / "data").mkdir()
+
+    clear_metrics_dir(str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["data", "notes.txt", "other.json"]
+
+    clear_metrics_dir(str(tmp_path / "new"))
+    assert os.path.isdir(tmp_path / "new")